@@ -0,0 +1,35 @@
+"""Add content-addressed blobs
+
+Revision ID: 04527972ab67
+Revises: 8d5da675d9f0
+Create Date: 2026-10-18 15:02:48.663190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '04527972ab67'
+down_revision: Union[str, Sequence[str], None] = '8d5da675d9f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    # Existing files stay where they are until `python -m backend.storage import-legacy` moves them
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('blobs')
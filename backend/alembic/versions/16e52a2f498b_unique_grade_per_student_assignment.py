@@ -0,0 +1,33 @@
+"""Unique grade per student and assignment
+
+Revision ID: 16e52a2f498b
+Revises: 395f1883da65
+Create Date: 2026-10-18 09:12:40.118532
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '16e52a2f498b'
+down_revision: Union[str, Sequence[str], None] = '395f1883da65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Drop duplicate grades left by the old per-row upsert, keeping the newest one
+    op.execute(
+        "DELETE FROM grades WHERE id NOT IN ("
+        "SELECT MAX(id) FROM grades GROUP BY student_id, assignment_id)"
+    )
+    op.create_index('uq_grades_student_assignment', 'grades', ['student_id', 'assignment_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_grades_student_assignment', table_name='grades')
@@ -0,0 +1,45 @@
+"""Index due dates and track sent reminders
+
+Revision ID: 1e79340f70aa
+Revises: 876bbf569789
+Create Date: 2026-10-18 19:12:47.602931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1e79340f70aa'
+down_revision: Union[str, Sequence[str], None] = '876bbf569789'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_assignments_due_date'), 'assignments', ['due_date'], unique=False)
+    op.create_index(op.f('ix_milestones_due_date'), 'milestones', ['due_date'], unique=False)
+    op.create_table('reminders_sent',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=16), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('due_at', sa.DateTime(), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_reminders_sent_id'), 'reminders_sent', ['id'], unique=False)
+    op.create_index('uq_reminders_sent_item_student', 'reminders_sent', ['kind', 'item_id', 'student_id', 'due_at'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_reminders_sent_item_student', table_name='reminders_sent')
+    op.drop_index(op.f('ix_reminders_sent_id'), table_name='reminders_sent')
+    op.drop_table('reminders_sent')
+    op.drop_index(op.f('ix_milestones_due_date'), table_name='milestones')
+    op.drop_index(op.f('ix_assignments_due_date'), table_name='assignments')
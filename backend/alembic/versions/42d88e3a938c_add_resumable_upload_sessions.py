@@ -0,0 +1,53 @@
+"""Add resumable upload sessions
+
+Revision ID: 42d88e3a938c
+Revises: 04527972ab67
+Create Date: 2026-10-18 16:37:11.250861
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '42d88e3a938c'
+down_revision: Union[str, Sequence[str], None] = '04527972ab67'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('upload_sessions',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('assignment_id', sa.Integer(), nullable=True),
+    sa.Column('student_id', sa.Integer(), nullable=True),
+    sa.Column('filename', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['assignment_id'], ['assignments.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_upload_sessions_created_at'), 'upload_sessions', ['created_at'], unique=False)
+    op.create_table('upload_parts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('upload_id', sa.String(length=32), nullable=False),
+    sa.Column('part_number', sa.Integer(), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.ForeignKeyConstraint(['upload_id'], ['upload_sessions.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_upload_parts_id'), 'upload_parts', ['id'], unique=False)
+    op.create_index('uq_upload_parts_upload_part', 'upload_parts', ['upload_id', 'part_number'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_upload_parts_upload_part', table_name='upload_parts')
+    op.drop_index(op.f('ix_upload_parts_id'), table_name='upload_parts')
+    op.drop_table('upload_parts')
+    op.drop_index(op.f('ix_upload_sessions_created_at'), table_name='upload_sessions')
+    op.drop_table('upload_sessions')
@@ -0,0 +1,28 @@
+"""Index audit_logs on timestamp and id
+
+Revision ID: 69b1c812ce90
+Revises: d2d5ddfb690e
+Create Date: 2026-10-18 12:41:52.306117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '69b1c812ce90'
+down_revision: Union[str, Sequence[str], None] = 'd2d5ddfb690e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_audit_logs_timestamp_id', 'audit_logs', ['timestamp', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audit_logs_timestamp_id', table_name='audit_logs')
@@ -0,0 +1,33 @@
+"""Unique attendance per session and student
+
+Revision ID: 8b999088d209
+Revises: 16e52a2f498b
+Create Date: 2026-10-18 10:03:17.542906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b999088d209'
+down_revision: Union[str, Sequence[str], None] = '16e52a2f498b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Drop duplicate attendance records, keeping the newest one
+    op.execute(
+        "DELETE FROM attendance WHERE id NOT IN ("
+        "SELECT MAX(id) FROM attendance GROUP BY session_id, student_id)"
+    )
+    op.create_index('uq_attendance_session_student', 'attendance', ['session_id', 'student_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_attendance_session_student', table_name='attendance')
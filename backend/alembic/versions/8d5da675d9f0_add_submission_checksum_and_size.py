@@ -0,0 +1,33 @@
+"""Add submission checksum and size
+
+Revision ID: 8d5da675d9f0
+Revises: 69b1c812ce90
+Create Date: 2026-10-18 14:20:33.904718
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d5da675d9f0'
+down_revision: Union[str, Sequence[str], None] = '69b1c812ce90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('submissions', sa.Column('sha256', sa.String(length=64), nullable=True))
+    op.add_column('submissions', sa.Column('size_bytes', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_submissions_sha256'), 'submissions', ['sha256'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_submissions_sha256'), table_name='submissions')
+    with op.batch_alter_table('submissions') as batch_op:
+        batch_op.drop_column('size_bytes')
+        batch_op.drop_column('sha256')
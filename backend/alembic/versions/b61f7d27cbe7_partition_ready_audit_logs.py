@@ -0,0 +1,36 @@
+"""Partition-ready audit logs
+
+Revision ID: b61f7d27cbe7
+Revises: 42d88e3a938c
+Create Date: 2026-10-18 18:05:26.487113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b61f7d27cbe7'
+down_revision: Union[str, Sequence[str], None] = '42d88e3a938c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite only: rebuild audit_logs with AUTOINCREMENT so ids are never
+    # reused once old months are moved out to audit_logs_YYYYMM tables
+    if op.get_bind().dialect.name == 'sqlite':
+        with op.batch_alter_table('audit_logs', recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+            pass
+    op.create_index(op.f('ix_audit_logs_user_id'), 'audit_logs', ['user_id'], unique=False)
+    # Router view; `python -m backend.audit_partitions maintain` extends it as partitions appear
+    op.execute("CREATE VIEW audit_logs_all AS SELECT id, timestamp, action, user_id, details FROM audit_logs")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP VIEW IF EXISTS audit_logs_all")
+    op.drop_index(op.f('ix_audit_logs_user_id'), table_name='audit_logs')
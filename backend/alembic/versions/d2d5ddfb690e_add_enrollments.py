@@ -0,0 +1,59 @@
+"""Add enrollments
+
+Revision ID: d2d5ddfb690e
+Revises: 8b999088d209
+Create Date: 2026-10-18 11:26:05.871244
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2d5ddfb690e'
+down_revision: Union[str, Sequence[str], None] = '8b999088d209'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('enrollments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('enrolled_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_enrollments_id'), 'enrollments', ['id'], unique=False)
+    op.create_index(op.f('ix_enrollments_student_id'), 'enrollments', ['student_id'], unique=False)
+    op.create_index('uq_enrollments_course_student', 'enrollments', ['course_id', 'student_id'], unique=True)
+
+    # Backfill rosters from existing attendance, grades and submissions so
+    # course pages keep showing the students who already have records there.
+    op.execute(
+        "INSERT INTO enrollments (course_id, student_id, enrolled_at) "
+        "SELECT course_id, student_id, CURRENT_TIMESTAMP FROM ("
+        "SELECT s.course_id AS course_id, a.student_id AS student_id "
+        "FROM attendance a JOIN sessions s ON s.id = a.session_id "
+        "UNION "
+        "SELECT asg.course_id, g.student_id "
+        "FROM grades g JOIN assignments asg ON asg.id = g.assignment_id "
+        "UNION "
+        "SELECT asg.course_id, sub.student_id "
+        "FROM submissions sub JOIN assignments asg ON asg.id = sub.assignment_id"
+        ") AS roster "
+        "WHERE course_id IS NOT NULL AND student_id IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_enrollments_course_student', table_name='enrollments')
+    op.drop_index(op.f('ix_enrollments_student_id'), table_name='enrollments')
+    op.drop_index(op.f('ix_enrollments_id'), table_name='enrollments')
+    op.drop_table('enrollments')
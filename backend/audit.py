@@ -0,0 +1,191 @@
+# backend/audit.py
+"""
+Batched audit logging.
+
+Handlers call `record()` after their own commit (`await record_async()` from
+async handlers). Events go into a bounded in-process queue and a background
+thread writes them out as multi-row INSERTs, so audit coverage costs no
+extra transaction per request.
+"""
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Optional, Tuple, Union
+
+from sqlalchemy import insert
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import database, models
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# (engine to write to, audit_logs row)
+Event = Tuple[Engine, dict]
+
+
+class AuditWriter:
+    def __init__(self, batch_size: int, flush_interval: float, max_queue: int, enqueue_timeout: float, flush_timeout: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.flush_timeout = flush_timeout
+        # Events, plus the markers flush() puts in line behind them
+        self._queue: "queue.Queue[Union[Event, threading.Event]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._flush_requested = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Stops the background thread and writes out everything still queued."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def record(self, db: Union[Session, AsyncSession], user_id: Optional[int], action: str, details: Optional[str] = None):
+        """
+        Queues an audit entry, written to the same database as `db`.
+
+        When the queue is full the caller waits up to `enqueue_timeout` for room;
+        if the writer still cannot keep up the entry is written inline instead
+        of being dropped.
+        """
+        self._enqueue(self._event(db, user_id, action, details))
+
+    async def record_async(self, db: Union[Session, AsyncSession], user_id: Optional[int], action: str, details: Optional[str] = None):
+        """`record` for async handlers: waiting for room, or writing inline, happens off the event loop."""
+        event = self._event(db, user_id, action, details)
+        self.start()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            await run_in_threadpool(self._enqueue, event)
+
+    def flush(self):
+        """
+        Writes every queued entry now and waits, up to `flush_timeout`, for any
+        batch already in flight. Entries queued after the call are not waited for.
+        """
+        self._flush_requested.set()
+        try:
+            batch = []
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Markers of concurrent flushes taken here are released once this one is done
+            waiting = self._write_and_ack(batch)
+            try:
+                self._wait_for_writer()
+            finally:
+                for marker in waiting:
+                    marker.set()
+        finally:
+            self._flush_requested.clear()
+
+    def _wait_for_writer(self):
+        if self._thread is None or not self._thread.is_alive():
+            return
+        # The writer sets the marker once everything it took before it is written
+        done = threading.Event()
+        deadline = time.monotonic() + self.flush_timeout
+        try:
+            self._queue.put(done, timeout=self.flush_timeout)
+        except queue.Full:
+            return
+        done.wait(max(deadline - time.monotonic(), 0))
+
+    def _event(self, db: Union[Session, AsyncSession], user_id: Optional[int], action: str, details: Optional[str]) -> Event:
+        row = {"timestamp": datetime.utcnow(), "user_id": user_id, "action": action, "details": details}
+        # Async sessions are written through their sync twin; the writer is a plain thread
+        return (database.sync_engine_for(db.get_bind()), row)
+
+    def _enqueue(self, event: Event):
+        self.start()
+        try:
+            self._queue.put(event, timeout=self.enqueue_timeout)
+        except queue.Full:
+            logger.warning("Audit queue full, writing %s inline", event[1]["action"])
+            self._write([event])
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+
+            # Gather up to batch_size entries or until the interval runs out,
+            # cutting the wait short if someone asks for a flush
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and not self._cut_short(batch[-1]):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=min(remaining, 0.05)))
+                except queue.Empty:
+                    pass
+            for marker in self._write_and_ack(batch):
+                marker.set()
+
+    def _cut_short(self, last) -> bool:
+        return isinstance(last, threading.Event) or self._flush_requested.is_set() or self._stopping.is_set()
+
+    def _write_and_ack(self, batch: List[Union[Event, threading.Event]]) -> List[threading.Event]:
+        """Writes the events in `batch` and returns the flush markers that were in it."""
+        try:
+            self._write([item for item in batch if not isinstance(item, threading.Event)])
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+        return [item for item in batch if isinstance(item, threading.Event)]
+
+    def _write(self, batch: List[Event]):
+        by_engine = defaultdict(list)
+        for engine, row in batch:
+            by_engine[engine].append(row)
+
+        for engine, rows in by_engine.items():
+            try:
+                with engine.begin() as connection:
+                    connection.execute(insert(models.AuditLog), rows)
+            except Exception:
+                logger.exception("Failed to write %d audit log entries", len(rows))
+
+
+audit_writer = AuditWriter(
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    max_queue=settings.AUDIT_QUEUE_MAX,
+    enqueue_timeout=settings.AUDIT_ENQUEUE_TIMEOUT_SECONDS,
+    flush_timeout=settings.AUDIT_FLUSH_TIMEOUT_SECONDS,
+)
+
+
+def record(db: Union[Session, AsyncSession], user_id: Optional[int], action: str, details: Optional[str] = None):
+    audit_writer.record(db, user_id, action, details)
+
+
+async def record_async(db: Union[Session, AsyncSession], user_id: Optional[int], action: str, details: Optional[str] = None):
+    await audit_writer.record_async(db, user_id, action, details)
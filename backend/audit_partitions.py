@@ -0,0 +1,374 @@
+# backend/audit_partitions.py
+"""
+Monthly partitioning, retention and archival for the audit log.
+
+New entries land in the hot `audit_logs` table. Maintenance moves each
+closed month into its own `audit_logs_YYYYMM` table, keeps the newest
+AUDIT_ONLINE_MONTHS of those in the database, and exports older ones to
+gzip-compressed JSONL files in AUDIT_ARCHIVE_DIR before dropping them.
+The `audit_logs_all` view unions the hot table with every online month.
+
+Run maintenance (e.g. nightly from cron), from the project root:
+    python -m backend.audit_partitions maintain
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import (
+    Column, DateTime, Index, Integer, MetaData, String, Table, and_, delete, func, inspect, select, text, true, tuple_,
+    union_all,
+)
+from sqlalchemy.engine import Engine
+
+from . import models
+from .config import settings
+from .database import engine as default_engine
+
+VIEW_NAME = "audit_logs_all"
+PARTITION_PATTERN = re.compile(r"^audit_logs_(\d{4})(\d{2})$")
+COLUMNS = ("id", "timestamp", "action", "user_id", "details")
+
+# Month tables live in their own MetaData so Base.metadata.create_all() never touches them
+partition_metadata = MetaData()
+
+Month = Tuple[int, int]
+
+# online_months() per engine, so reads do not inspect the schema every time.
+# Maintenance here drops the entry; other processes see its changes after the TTL.
+_online_months_cache: Dict[Engine, Tuple[float, List[Month]]] = {}
+
+
+# --- Month helpers ---
+def month_of(moment: datetime) -> Month:
+    return moment.year, moment.month
+
+
+def month_start(month: Month) -> datetime:
+    return datetime(month[0], month[1], 1)
+
+
+def next_month(month: Month) -> Month:
+    year, mon = month
+    return (year + 1, 1) if mon == 12 else (year, mon + 1)
+
+
+def partition_name(month: Month) -> str:
+    return f"audit_logs_{month[0]:04d}{month[1]:02d}"
+
+
+def partition_table(month: Month) -> Table:
+    name = partition_name(month)
+    if name in partition_metadata.tables:
+        return partition_metadata.tables[name]
+    return Table(
+        name,
+        partition_metadata,
+        Column("id", Integer, primary_key=True, autoincrement=False),
+        Column("timestamp", DateTime),
+        Column("action", String),
+        Column("user_id", Integer),
+        Column("details", String, nullable=True),
+        Index(f"ix_{name}_timestamp_id", "timestamp", "id"),
+        Index(f"ix_{name}_action", "action"),
+        Index(f"ix_{name}_user_id", "user_id"),
+    )
+
+
+def online_months(bind: Engine) -> List[Month]:
+    """Months that currently have a partition table, newest first."""
+    cached = _online_months_cache.get(bind)
+    if cached is not None and time.monotonic() - cached[0] < settings.AUDIT_PARTITION_CACHE_SECONDS:
+        return list(cached[1])
+
+    months = []
+    for name in inspect(bind).get_table_names():
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            months.append((int(match.group(1)), int(match.group(2))))
+    months.sort(reverse=True)
+    _online_months_cache[bind] = (time.monotonic(), months)
+    return list(months)
+
+
+def forget_online_months(bind: Engine) -> None:
+    _online_months_cache.pop(bind, None)
+
+
+def archive_path(month: Month) -> Path:
+    return Path(settings.AUDIT_ARCHIVE_DIR) / f"{partition_name(month)}.jsonl.gz"
+
+
+def archived_months() -> List[Month]:
+    """Months that have an archive file, newest first."""
+    directory = Path(settings.AUDIT_ARCHIVE_DIR)
+    months = []
+    if directory.exists():
+        for path in directory.glob("audit_logs_*.jsonl.gz"):
+            match = PARTITION_PATTERN.match(path.name[: -len(".jsonl.gz")])
+            if match:
+                months.append((int(match.group(1)), int(match.group(2))))
+    return sorted(months, reverse=True)
+
+
+# --- Router ---
+def refresh_view(bind: Engine) -> None:
+    """Recreates `audit_logs_all` over the hot table and every online month."""
+    forget_online_months(bind)
+    column_list = ", ".join(COLUMNS)
+    sources = ["audit_logs"] + [partition_name(month) for month in online_months(bind)]
+    union = " UNION ALL ".join(f"SELECT {column_list} FROM {source}" for source in sources)
+    with bind.begin() as connection:
+        connection.execute(text(f"DROP VIEW IF EXISTS {VIEW_NAME}"))
+        connection.execute(text(f"CREATE VIEW {VIEW_NAME} AS {union}"))
+
+
+def _filters(table, before, action, user_id, start, end):
+    conditions = []
+    if before is not None:
+        conditions.append(tuple_(table.c.timestamp, table.c.id) < tuple_(*before))
+    if action is not None:
+        conditions.append(table.c.action == action)
+    if user_id is not None:
+        conditions.append(table.c.user_id == user_id)
+    if start is not None:
+        conditions.append(table.c.timestamp >= start)
+    if end is not None:
+        conditions.append(table.c.timestamp < end)
+    return and_(true(), *conditions)
+
+
+def query_recent(
+    bind: Engine,
+    limit: int,
+    skip: int = 0,
+    before: Optional[Tuple[datetime, int]] = None,
+    action: Optional[str] = None,
+    user_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[Dict]:
+    """
+    Newest-first audit entries across the hot table and online months.
+
+    Sources are read newest first and the walk stops as soon as enough rows
+    are collected, so a recent page only ever touches the hot table no
+    matter how much history is online. `before` is a (timestamp, id) keyset.
+    A `skip` goes to the database as one UNION ALL with ORDER BY, LIMIT and
+    OFFSET, so deep pages are not gathered and sliced here.
+    """
+    hot = models.AuditLog.__table__
+    if skip:
+        sources = [
+            select(*(table.c[name] for name in COLUMNS)).where(_filters(table, before, action, user_id, start, end))
+            for table in [hot] + [partition_table(month) for month in _months_between(bind, start, end)]
+        ]
+        combined = union_all(*sources).subquery() if len(sources) > 1 else sources[0].subquery()
+        stmt = (
+            select(combined)
+            .order_by(combined.c.timestamp.desc(), combined.c.id.desc())
+            .limit(limit)
+            .offset(skip)
+        )
+        with bind.connect() as connection:
+            return [dict(row._mapping) for row in connection.execute(stmt)]
+
+    wanted = limit
+    tables = [hot]
+    collected: List[Dict] = []
+
+    with bind.connect() as connection:
+        index = 0
+        while index < len(tables) and len(collected) < wanted:
+            table = tables[index]
+            stmt = (
+                select(*(table.c[name] for name in COLUMNS))
+                .where(_filters(table, before, action, user_id, start, end))
+                .order_by(table.c.timestamp.desc(), table.c.id.desc())
+                .limit(wanted - len(collected))
+            )
+            collected.extend(dict(row._mapping) for row in connection.execute(stmt))
+
+            # Only look up month tables once the hot table has run dry
+            if table is hot:
+                tables.extend(partition_table(month) for month in _months_between(bind, start, end))
+            index += 1
+
+    return collected
+
+
+def _months_between(bind: Engine, start: Optional[datetime], end: Optional[datetime]) -> List[Month]:
+    """Online months that can hold entries in [start, end), newest first."""
+    months = online_months(bind)
+    if end is not None:
+        months = [m for m in months if month_start(m) < end]
+    if start is not None:
+        months = [m for m in months if month_start(next_month(m)) > start]
+    return months
+
+
+def search_archives(
+    action: Optional[str] = None,
+    user_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 100,
+) -> List[Dict]:
+    """Scans archived months (newest first) for matching entries, streaming each file."""
+    results: List[Dict] = []
+    for month in archived_months():
+        if end is not None and month_start(month) >= end:
+            continue
+        if start is not None and month_start(next_month(month)) <= start:
+            continue
+
+        matches = []
+        for entry in _read_archive(archive_path(month)):
+            if action is not None and entry["action"] != action:
+                continue
+            if user_id is not None and entry["user_id"] != user_id:
+                continue
+            if start is not None and entry["timestamp"] < start:
+                continue
+            if end is not None and entry["timestamp"] >= end:
+                continue
+            matches.append(entry)
+
+        matches.sort(key=lambda e: (e["timestamp"], e["id"]), reverse=True)
+        results.extend(matches[: limit - len(results)])
+        if len(results) >= limit:
+            break
+    return results
+
+
+def _read_archive(path: Path) -> Iterator[Dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        for line in archive:
+            entry = json.loads(line)
+            entry["timestamp"] = datetime.fromisoformat(entry["timestamp"])
+            yield entry
+
+
+# --- Maintenance ---
+def rotate(bind: Engine, now: Optional[datetime] = None) -> List[Month]:
+    """Moves every closed month out of the hot table into its own partition."""
+    current = month_start(month_of(now or datetime.utcnow()))
+    hot = models.AuditLog.__table__
+    rotated = []
+
+    with bind.connect() as connection:
+        oldest = connection.execute(select(func.min(hot.c.timestamp)).where(hot.c.timestamp < current)).scalar()
+    if oldest is None:
+        return rotated
+
+    month = month_of(oldest)
+    while month_start(month) < current:
+        lower, upper = month_start(month), month_start(next_month(month))
+        in_month = and_(hot.c.timestamp >= lower, hot.c.timestamp < upper)
+        table = partition_table(month)
+        forget_online_months(bind)
+        with bind.begin() as connection:
+            table.create(connection, checkfirst=True)
+            moved = connection.execute(
+                table.insert().from_select(list(COLUMNS), select(*(hot.c[name] for name in COLUMNS)).where(in_month))
+            ).rowcount
+            connection.execute(delete(hot).where(in_month))
+        if moved:
+            rotated.append(month)
+        month = next_month(month)
+
+    refresh_view(bind)
+    return rotated
+
+
+def archive_month(bind: Engine, month: Month) -> int:
+    """
+    Exports one partition to gzip JSONL, verifies the row count, then drops it.
+
+    If the month was archived before (its partition re-created by late
+    entries), the new rows go in as another gzip member after the earlier
+    archive's, so nothing already archived is lost.
+    """
+    table = partition_table(month)
+    path = archive_path(month)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(".tmp")
+    if path.exists():
+        shutil.copyfile(path, temp_path)
+    elif temp_path.exists():
+        os.remove(temp_path)  # left by an interrupted run
+
+    written = 0
+    with bind.connect() as connection, gzip.open(temp_path, "at", encoding="utf-8") as archive:
+        rows = connection.execution_options(yield_per=5000).execute(
+            select(*(table.c[name] for name in COLUMNS)).order_by(table.c.timestamp, table.c.id)
+        )
+        for row in rows:
+            entry = dict(row._mapping)
+            entry["timestamp"] = entry["timestamp"].isoformat() if entry["timestamp"] else None
+            archive.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            written += 1
+
+    with bind.connect() as connection:
+        expected = connection.execute(select(func.count()).select_from(table)).scalar()
+    if expected != written:
+        os.remove(temp_path)
+        raise RuntimeError(f"Archive of {table.name} wrote {written} of {expected} rows")
+
+    os.replace(temp_path, path)
+    forget_online_months(bind)
+    with bind.begin() as connection:
+        table.drop(connection)
+    partition_metadata.remove(table)
+    return written
+
+
+def maintain(bind: Engine, now: Optional[datetime] = None) -> Dict[str, object]:
+    """Rotates closed months, archives partitions past retention and prunes old archives."""
+    now = now or datetime.utcnow()
+    stats: Dict[str, object] = {"rotated": [], "archived": [], "pruned": []}
+    stats["rotated"] = [partition_name(m) for m in rotate(bind, now)]
+
+    # Keep the newest AUDIT_ONLINE_MONTHS partitions queryable in the database
+    for month in online_months(bind)[settings.AUDIT_ONLINE_MONTHS:]:
+        archive_month(bind, month)
+        stats["archived"].append(partition_name(month))
+    if stats["archived"]:
+        refresh_view(bind)
+
+    # Delete archive files past AUDIT_ARCHIVE_RETENTION_MONTHS (0 keeps them forever)
+    if settings.AUDIT_ARCHIVE_RETENTION_MONTHS > 0:
+        year, mon = month_of(now)
+        total = year * 12 + (mon - 1) - settings.AUDIT_ARCHIVE_RETENTION_MONTHS
+        cutoff = (total // 12, total % 12 + 1)
+        for month in archived_months():
+            if month < cutoff:
+                archive_path(month).unlink()
+                stats["pruned"].append(partition_name(month))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("maintain", help="rotate, archive and prune audit log partitions")
+    subparsers.add_parser("refresh-view", help=f"recreate the {VIEW_NAME} view")
+    args = parser.parse_args()
+
+    if args.command == "maintain":
+        stats = maintain(default_engine)
+        print(", ".join(f"{key}={','.join(value) or '-'}" for key, value in stats.items()))
+    else:
+        refresh_view(default_engine)
+        print(f"Recreated {VIEW_NAME}")
+
+
+if __name__ == "__main__":
+    main()
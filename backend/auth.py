@@ -5,21 +5,31 @@ from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 # New imports
 from . import database, models
+from .cache import TTLCache
+from .config import settings
 
 # --- Configuration ---
 SECRET_KEY = "your-super-secret-key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 # This tells FastAPI where to get the token from
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Token subject (email) -> snapshot of the user's columns
+principal_cache = TTLCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_CACHE_TTL_SECONDS,
+)
+
 # --- Helper Functions ---
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -37,22 +47,85 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# --- Principal Cache Helpers ---
+def _snapshot(user: models.User) -> dict:
+    return {"id": user.id, "email": user.email, "hashed_password": user.hashed_password}
+
+def _attach(db: Session, snapshot: dict) -> models.User:
+    """Rebuilds a cached user inside the request session without querying."""
+    user = models.User(**snapshot)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+def invalidate_principal(email: str):
+    principal_cache.invalidate(email)
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    # Drop the current key and, if the email itself changed, the old one too
+    invalidate_principal(target.email)
+    for old_email in inspect(target).attrs.email.history.deleted:
+        invalidate_principal(old_email)
+
 # --- NEW: Get Current User Dependency ---
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+def _decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
     except JWTError:
         raise credentials_exception
+    if payload.get("sub") is None:
+        raise credentials_exception
+    return payload
+
+def _cached_principal(payload: dict) -> Optional[dict]:
+    """The cached snapshot, if the token's user id still matches it."""
+    cached = principal_cache.get(payload["sub"])
+    if cached is not None and payload.get("uid", cached["id"]) == cached["id"]:
+        return cached
+    return None
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+    payload = _decode_token(token)
+    email: str = payload["sub"]
+
+    # Serve the user from the principal cache when the token's user id still matches
+    cached = _cached_principal(payload)
+    if cached is not None:
+        return _attach(db, cached)
 
     user = db.query(models.User).filter(models.User.email == email).first()
     if user is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+    principal_cache.set(email, _snapshot(user))
+    return user
+
+def get_admin_user(current_user: models.User = Depends(get_current_user)):
+    """get_current_user, limited to the logins listed in ADMIN_EMAILS."""
+    admins = {email.strip() for email in settings.ADMIN_EMAILS.split(",") if email.strip()}
+    if current_user.email not in admins:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(database.get_async_db)):
+    """get_current_user for async endpoints: same cache, same checks, no threadpool hop."""
+    payload = _decode_token(token)
+    email: str = payload["sub"]
+
+    cached = _cached_principal(payload)
+    if cached is not None:
+        user = models.User(**cached)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    user = (await db.execute(select(models.User).where(models.User.email == email))).scalars().first()
+    if user is None:
+        raise credentials_exception
+    principal_cache.set(email, _snapshot(user))
+    return user
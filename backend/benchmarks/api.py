@@ -0,0 +1,311 @@
+# backend/benchmarks/api.py
+"""
+End-to-end API benchmarks.
+
+Generates a dataset with backend.datagen into a temporary SQLite file, runs
+backend.main:app in-process against it and times the hot endpoints one
+request at a time, recording p50/p95/p99 latency, throughput and SQL
+statements per request. Results are written as JSON so runs can be compared.
+
+Usage, from the project root:
+    python -m backend.benchmarks.api run --students 5000 --courses 200 --output bench.json
+    python -m backend.benchmarks.api run --only gradebook attendance_get --requests 500
+    python -m backend.benchmarks.api compare baseline.json bench.json --threshold 0.2
+
+`compare` exits with status 1 when a latency or throughput metric is worse
+than the baseline by more than the threshold, or when any endpoint issues
+more SQL statements per request than it used to.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from fastapi import Request
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from backend import audit, auth, database, datagen, models
+from backend.config import settings
+from backend.main import app
+
+# Latency-like metrics: higher is worse
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+UPLOAD_BYTES = 256 * 1024
+
+
+class QueryCounter:
+    """Counts SQL statements run on an engine, ignoring the audit writer's background inserts."""
+
+    def __init__(self, binds):
+        self.count = 0
+        for bind in binds:
+            event.listen(bind, "before_cursor_execute", self._count)
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.current_thread().name != "audit-writer":
+            self.count += 1
+
+
+class Bench:
+    """A client logged in to the app, pointed at a generated dataset."""
+
+    def __init__(self, workdir: Path, volumes: datagen.Volumes):
+        path = workdir / "bench.db"
+        datagen.generate(
+            datagen.fresh_sqlite_engine(path), volumes,
+            admin_password_hash=auth.get_password_hash(datagen.ADMIN_PASSWORD),
+        )
+        # Same engine profile and read/write routing as the app's own engines
+        url = f"sqlite:///{path}"
+        self.engines = [database.create_app_engine(url), database.create_app_engine(url, read_only=True)]
+        self.async_engines = [database.create_async_app_engine(url), database.create_async_app_engine(url, read_only=True)]
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engines[0])
+        read_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engines[1])
+        async_factory = async_sessionmaker(self.async_engines[0], autoflush=False, expire_on_commit=False)
+        async_read_factory = async_sessionmaker(self.async_engines[1], autoflush=False, expire_on_commit=False)
+        self.queries = QueryCounter(self.engines + [bind.sync_engine for bind in self.async_engines])
+        self.rng = random.Random(volumes.seed)
+        self._upload_dir = settings.UPLOAD_DIR
+        settings.UPLOAD_DIR = str(workdir / "uploads")
+
+        def override_get_db(request: Request):
+            db = read_factory() if request.method in database.READ_ONLY_METHODS else self.session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        async def override_get_async_db(request: Request):
+            factory = async_read_factory if request.method in database.READ_ONLY_METHODS else async_factory
+            async with factory() as db:
+                yield db
+
+        app.dependency_overrides[database.get_db] = override_get_db
+        app.dependency_overrides[database.get_async_db] = override_get_async_db
+        auth.principal_cache.clear()
+        self.client = TestClient(app)
+        self.headers = {"Authorization": f"Bearer {self.login().json()['access_token']}"}
+
+        # Ids to pick from, and each course's roster for the write endpoints
+        with self.session_factory() as db:
+            self.student_count = db.query(models.Student).count()
+            self.courses = [row.id for row in db.query(models.Course.id)]
+            self.sessions = db.query(models.Session.id, models.Session.course_id).all()
+            self.assignments = db.query(models.Assignment.id, models.Assignment.course_id).all()
+            self.rosters: Dict[int, List[int]] = {}
+            for course_id, student_id in db.query(models.Enrollment.course_id, models.Enrollment.student_id):
+                self.rosters.setdefault(course_id, []).append(student_id)
+
+    def close(self):
+        self.client.close()
+        app.dependency_overrides.pop(database.get_db, None)
+        app.dependency_overrides.pop(database.get_async_db, None)
+        audit.audit_writer.flush()
+        auth.principal_cache.clear()
+        settings.UPLOAD_DIR = self._upload_dir
+        for bind in self.engines:
+            bind.dispose()
+        for bind in self.async_engines:
+            asyncio.run(bind.dispose())
+
+    def login(self):
+        return self.client.post(
+            "/token", data={"username": datagen.ADMIN_EMAIL, "password": datagen.ADMIN_PASSWORD}
+        )
+
+    # --- Scenarios ---
+    def students_page(self):
+        skip = self.rng.randrange(max(1, self.student_count - 100))
+        return self.client.get("/students/", params={"skip": skip, "limit": 100}, headers=self.headers)
+
+    def gradebook(self):
+        course_id = self.rng.choice(self.courses)
+        return self.client.get(f"/courses/{course_id}/gradebook/", headers=self.headers)
+
+    def gradebook_matrix(self):
+        course_id = self.rng.choice(self.courses)
+        return self.client.get(f"/courses/{course_id}/gradebook/", params={"format": "matrix"}, headers=self.headers)
+
+    def attendance_get(self):
+        session_id, _ = self.rng.choice(self.sessions)
+        return self.client.get(f"/sessions/{session_id}/attendance/", headers=self.headers)
+
+    def attendance_post(self):
+        session_id, course_id = self.rng.choice(self.sessions)
+        statuses = [status.value for status in models.AttendanceStatus]
+        attendances = [
+            {"student_id": student_id, "status": self.rng.choice(statuses)}
+            for student_id in self.rosters.get(course_id, [])
+        ]
+        return self.client.post(
+            f"/sessions/{session_id}/attendance/", json={"attendances": attendances}, headers=self.headers
+        )
+
+    def grades_post(self):
+        assignment_id, course_id = self.rng.choice(self.assignments)
+        grades = [
+            {"assignment_id": assignment_id, "student_id": student_id, "score": round(self.rng.uniform(40, 100), 1)}
+            for student_id in self.rosters.get(course_id, [])
+        ]
+        return self.client.post("/grades/", json={"grades": grades}, headers=self.headers)
+
+    def upload(self):
+        assignment_id, course_id = self.rng.choice(self.assignments)
+        student_id = self.rng.choice(self.rosters.get(course_id) or [1])
+        content = self.rng.randbytes(UPLOAD_BYTES)
+        return self.client.post(
+            f"/assignments/{assignment_id}/submissions/",
+            data={"student_id": student_id},
+            files={"file": ("submission.pdf", content, "application/pdf")},
+            headers=self.headers,
+        )
+
+
+# name -> (scenario, share of --requests it runs; bcrypt makes /token slow by design)
+SCENARIOS: Dict[str, tuple] = {
+    "students_page": (Bench.students_page, 1.0),
+    "gradebook": (Bench.gradebook, 1.0),
+    "gradebook_matrix": (Bench.gradebook_matrix, 1.0),
+    "attendance_get": (Bench.attendance_get, 1.0),
+    "attendance_post": (Bench.attendance_post, 1.0),
+    "grades_post": (Bench.grades_post, 1.0),
+    "token": (Bench.login, 0.1),
+    "upload": (Bench.upload, 0.5),
+}
+
+
+def measure(bench: Bench, scenario: Callable, requests: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        scenario(bench)
+
+    latencies = []
+    queries = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        before = bench.queries.count
+        request_started = time.perf_counter()
+        response = scenario(bench)
+        latencies.append(time.perf_counter() - request_started)
+        queries.append(bench.queries.count - before)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{scenario.__name__}: HTTP {response.status_code}: {response.text[:200]}")
+    elapsed = time.perf_counter() - started
+
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99]).tolist()
+    return {
+        "requests": requests,
+        "p50_ms": round(p50, 3),
+        "p95_ms": round(p95, 3),
+        "p99_ms": round(p99, 3),
+        "mean_ms": round(1000 * sum(latencies) / requests, 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "queries_per_request": round(sum(queries) / requests, 2),
+        "max_queries": max(queries),
+    }
+
+
+def run(volumes: datagen.Volumes, requests: int = 200, warmup: int = 5, only: Optional[List[str]] = None) -> dict:
+    """Runs the selected scenarios and returns the results document."""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="sis-bench-") as workdir:
+        bench = Bench(Path(workdir), volumes)
+        try:
+            for name, (scenario, share) in SCENARIOS.items():
+                if only and name not in only:
+                    continue
+                results[name] = measure(bench, scenario, max(1, int(requests * share)), warmup)
+                print(
+                    f"{name:<18} p50 {results[name]['p50_ms']:8.2f} ms  p95 {results[name]['p95_ms']:8.2f} ms  "
+                    f"p99 {results[name]['p99_ms']:8.2f} ms  {results[name]['throughput_rps']:8.1f} req/s  "
+                    f"{results[name]['queries_per_request']:6.1f} queries"
+                )
+        finally:
+            bench.close()
+
+    return {
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "volumes": asdict(volumes),
+        "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.2) -> List[str]:
+    """
+    Returns a line per regression: latency up or throughput down by more than
+    `threshold` (a fraction), or more SQL statements per request at all.
+    """
+    regressions = []
+    for name, before in baseline["results"].items():
+        after = current["results"].get(name)
+        if after is None:
+            continue
+        for metric in LATENCY_METRICS:
+            if after[metric] > before[metric] * (1 + threshold):
+                regressions.append(f"{name}: {metric} {before[metric]:.2f} -> {after[metric]:.2f}")
+        if after["throughput_rps"] < before["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput_rps {before['throughput_rps']:.1f} -> {after['throughput_rps']:.1f}"
+            )
+        if after["queries_per_request"] > before["queries_per_request"]:
+            regressions.append(
+                f"{name}: queries_per_request {before['queries_per_request']} -> {after['queries_per_request']}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="benchmark the API and write the results as JSON")
+    defaults = datagen.Volumes()
+    run_parser.add_argument("--students", type=int, default=2000)
+    run_parser.add_argument("--courses", type=int, default=60)
+    run_parser.add_argument("--seed", type=int, default=defaults.seed)
+    run_parser.add_argument("--requests", type=int, default=200, help="measured requests per endpoint")
+    run_parser.add_argument("--warmup", type=int, default=5)
+    run_parser.add_argument("--only", nargs="+", choices=list(SCENARIOS), default=None)
+    run_parser.add_argument("--output", type=Path, default=Path("bench.json"))
+
+    compare_parser = subparsers.add_parser("compare", help="fail if a run regressed against a baseline")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown, e.g. 0.2 for 20%%")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        volumes = datagen.Volumes(students=args.students, courses=args.courses, seed=args.seed)
+        document = run(volumes, requests=args.requests, warmup=args.warmup, only=args.only)
+        args.output.write_text(json.dumps(document, indent=2))
+        print(f"Wrote {args.output}")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    current = json.loads(args.current.read_text())
+    if baseline["volumes"] != current["volumes"]:
+        print("warning: the runs used different dataset volumes", file=sys.stderr)
+    regressions = compare(baseline, current, args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
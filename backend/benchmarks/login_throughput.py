@@ -0,0 +1,49 @@
+# backend/benchmarks/login_throughput.py
+"""
+Measures bcrypt login throughput (verifications/second) for different
+process pool sizes at the configured BCRYPT_ROUNDS.
+
+Usage, from the project root:
+    python -m backend.benchmarks.login_throughput --workers 1 2 4 --logins 200
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from backend import auth, hashing
+from backend.config import settings
+
+PASSWORD = "benchmark-password"
+
+
+def run(workers: int, logins: int, hashed_password: str) -> float:
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        # Warm up every worker so process start-up is not counted
+        list(pool.map(hashing._verify_and_update, [PASSWORD] * workers, [hashed_password] * workers))
+
+        start = time.perf_counter()
+        results = list(pool.map(hashing._verify_and_update, [PASSWORD] * logins, [hashed_password] * logins))
+        elapsed = time.perf_counter() - start
+
+    assert all(valid for valid, _ in results)
+    return logins / elapsed
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, cores}))
+    parser.add_argument("--logins", type=int, default=200)
+    args = parser.parse_args()
+
+    hashed_password = auth.get_password_hash(PASSWORD)
+    print(f"bcrypt rounds={settings.BCRYPT_ROUNDS}, cores={cores}, logins per run={args.logins}")
+    for workers in args.workers:
+        rate = run(workers, args.logins, hashed_password)
+        print(f"workers={workers:<3} {rate:8.1f} logins/s  {rate / workers:8.1f} logins/s/worker")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# backend/benchmarks/serialization.py
+"""
+CPU cost per row of building a JSON list response, the response_model way
+versus the fastjson way.
+
+  response_model: ORM objects -> Pydantic validation -> dump to Python ->
+                  stdlib json, which is what FastAPI does for a returned list
+  fastjson:       schema columns as Core rows -> dicts -> orjson
+
+Both read the same rows from a generated SQLite dataset; time is process
+CPU time, best of --repeat runs.
+
+Usage, from the project root:
+    python -m backend.benchmarks.serialization --rows 10000 --repeat 5
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend import datagen, fastjson, models, schemas
+
+
+def response_model_path(db: Session, schema, model, rows: int) -> bytes:
+    objects = db.query(model).order_by(model.id).limit(rows).all()
+    adapter = TypeAdapter(List[schema])
+    content = adapter.dump_python(adapter.validate_python(objects, from_attributes=True), mode="json")
+    # Starlette's JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def fastjson_path(db: Session, schema, model, rows: int) -> bytes:
+    result = db.execute(select(*fastjson.schema_columns(schema, model)).order_by(model.id).limit(rows))
+    return fastjson.list_response(result).body
+
+
+def cpu_per_row(path: Callable, db: Session, schema, model, rows: int, repeat: int) -> float:
+    count = min(rows, db.query(model).count())
+    best = float("inf")
+    for _ in range(repeat):
+        db.expunge_all()
+        started = time.process_time()
+        path(db, schema, model, rows)
+        best = min(best, time.process_time() - started)
+    return best / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="sis-bench-") as workdir:
+        bind = datagen.fresh_sqlite_engine(Path(workdir) / "bench.db")
+        datagen.generate(bind, datagen.Volumes(students=args.rows, courses=max(12, args.rows // 50)))
+        with Session(bind) as db:
+            for schema, model in ((schemas.Student, models.Student), (schemas.Assignment, models.Assignment), (schemas.Grade, models.Grade)):
+                before = cpu_per_row(response_model_path, db, schema, model, args.rows, args.repeat)
+                after = cpu_per_row(fastjson_path, db, schema, model, args.rows, args.repeat)
+                print(f"{model.__tablename__:<12} response_model {before:6.2f} us/row   fastjson {after:6.2f} us/row   {before / after:4.1f}x")
+        bind.dispose()
+
+
+if __name__ == "__main__":
+    main()
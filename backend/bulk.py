@@ -0,0 +1,170 @@
+# backend/bulk.py
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+
+
+def upsert_grades(db: Session, grades: Iterable[schemas.GradeCreate]) -> Dict[str, int]:
+    """
+    Inserts or updates grades in a fixed number of statements.
+
+    Existing rows for the submitted (student_id, assignment_id) pairs are
+    loaded with a single query, then new rows go out as one multi-row INSERT
+    and changed rows as one executemany UPDATE. The caller commits.
+    Returns inserted/updated/unchanged counts.
+
+    A pair another request inserts in the meantime is updated by the INSERT's
+    ON CONFLICT clause instead of failing on the unique index.
+    """
+    # 1. Collapse duplicate pairs in the payload (last one wins)
+    submitted: Dict[Tuple[int, int], schemas.GradeCreate] = {}
+    for grade in grades:
+        submitted[(grade.student_id, grade.assignment_id)] = grade
+
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    if not submitted:
+        return counts
+
+    # 2. Load every existing grade for the submitted pairs in one round trip
+    student_ids = {student_id for student_id, _ in submitted}
+    assignment_ids = {assignment_id for _, assignment_id in submitted}
+    rows = db.query(
+        models.Grade.id,
+        models.Grade.student_id,
+        models.Grade.assignment_id,
+        models.Grade.score,
+        models.Grade.comments,
+    ).filter(
+        models.Grade.student_id.in_(student_ids),
+        models.Grade.assignment_id.in_(assignment_ids),
+    ).all()
+    existing = {(row.student_id, row.assignment_id): row for row in rows}
+
+    # 3. Diff the payload against what is stored
+    to_insert = []
+    to_update = []
+    for key, grade in submitted.items():
+        row = existing.get(key)
+        if row is None:
+            to_insert.append(grade.model_dump())
+        elif row.score != grade.score or row.comments != grade.comments:
+            to_update.append({"id": row.id, "score": grade.score, "comments": grade.comments})
+        else:
+            counts["unchanged"] += 1
+
+    # 4. Write the changes in bulk
+    if to_insert:
+        dialect_insert = {
+            "sqlite": sqlite.insert,
+            "postgresql": postgresql.insert,
+        }.get(db.get_bind().dialect.name)
+        if dialect_insert is not None:
+            stmt = dialect_insert(models.Grade)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["student_id", "assignment_id"],
+                set_={"score": stmt.excluded.score, "comments": stmt.excluded.comments},
+            )
+        else:
+            stmt = insert(models.Grade)
+        db.execute(stmt, to_insert)
+    if to_update:
+        db.execute(update(models.Grade), to_update)
+
+    counts["inserted"] = len(to_insert)
+    counts["updated"] = len(to_update)
+    return counts
+
+
+def upsert_attendance(
+    db: Session, session_id: int, attendances: Iterable[schemas.AttendanceCreate]
+) -> int:
+    """
+    Writes a whole session roster with a single INSERT ... ON CONFLICT statement.
+
+    Relies on the unique (session_id, student_id) index. Dialects without
+    ON CONFLICT support fall back to one lookup query plus bulk writes.
+    The caller commits. Returns the number of records written.
+    """
+    # 1. Collapse duplicate students in the payload (last one wins)
+    statuses = {att.student_id: att.status for att in attendances}
+    if not statuses:
+        return 0
+
+    rows = [
+        {"session_id": session_id, "student_id": student_id, "status": status}
+        for student_id, status in statuses.items()
+    ]
+
+    # 2. Use the dialect's native upsert where there is one
+    dialect_insert = {
+        "sqlite": sqlite.insert,
+        "postgresql": postgresql.insert,
+    }.get(db.get_bind().dialect.name)
+
+    if dialect_insert is not None:
+        stmt = dialect_insert(models.Attendance).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["session_id", "student_id"],
+            set_={"status": stmt.excluded.status},
+        )
+        db.execute(stmt)
+        return len(rows)
+
+    # 3. Otherwise load the existing records once and split inserts from updates
+    existing = dict(
+        db.query(models.Attendance.student_id, models.Attendance.id).filter(
+            models.Attendance.session_id == session_id,
+            models.Attendance.student_id.in_(statuses),
+        ).all()
+    )
+    to_insert = [row for row in rows if row["student_id"] not in existing]
+    to_update = [
+        {"id": existing[row["student_id"]], "status": row["status"]}
+        for row in rows if row["student_id"] in existing
+    ]
+    if to_insert:
+        db.execute(insert(models.Attendance), to_insert)
+    if to_update:
+        db.execute(update(models.Attendance), to_update)
+    return len(rows)
+
+
+def enroll_students(db: Session, course_id: int, student_ids: Iterable[int]) -> Dict[str, object]:
+    """
+    Enrolls many students in a course with two lookups and one multi-row INSERT.
+
+    Students that are already enrolled are skipped and ids that match no
+    student are reported back. The caller commits.
+    """
+    requested = set(student_ids)
+    if not requested:
+        return {"enrolled": 0, "already_enrolled": 0, "unknown_student_ids": []}
+
+    # 1. Keep only ids that belong to real students
+    known = {
+        row.id for row in db.query(models.Student.id).filter(models.Student.id.in_(requested))
+    }
+    unknown: List[int] = sorted(requested - known)
+
+    # 2. Skip students who are already on the roster
+    already = {
+        row.student_id
+        for row in db.query(models.Enrollment.student_id).filter(
+            models.Enrollment.course_id == course_id,
+            models.Enrollment.student_id.in_(known),
+        )
+    }
+    to_enroll = sorted(known - already)
+
+    # 3. Insert the rest in one statement
+    if to_enroll:
+        db.execute(
+            insert(models.Enrollment),
+            [{"course_id": course_id, "student_id": student_id} for student_id in to_enroll],
+        )
+
+    return {"enrolled": len(to_enroll), "already_enrolled": len(already), "unknown_student_ids": unknown}
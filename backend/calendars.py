@@ -0,0 +1,292 @@
+# backend/calendars.py
+"""
+Cached iCalendar subscription feeds for courses and students.
+
+Calendar clients poll a feed every few minutes, so each feed is rendered
+once and kept with a strong ETag until a row it was built from changes.
+Every cached feed lists the rows it depends on (its course, or a
+student's courses and projects); mapper events on those models note the
+rows a flush touched and the session's commit drops exactly the feeds that
+mention them, so no reader re-renders a feed from data that is not
+committed yet. The cache is per process, so a write
+handled by another worker only shows up here once the entry's
+CALENDAR_CACHE_TTL_SECONDS run out.
+
+Feeds carry personal data and calendar clients cannot log in, so each
+feed URL is signed: an HMAC of the feed key under the app's secret,
+handed out to authenticated users by the calendar-link endpoints.
+"""
+import hashlib
+import hmac
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ics import Event
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from . import auth, models
+from .cache import TTLCache
+from .config import settings
+
+PRODID = "-//Student Information System//Calendar Feeds//EN"
+
+# ("course", 3), ("student", 7), ("project", 2) ...
+Dependency = Tuple[str, int]
+FeedKey = Tuple[str, int]
+
+# Session.info key for the dependencies flushed but not committed yet
+PENDING_INFO_KEY = "calendar_feeds_pending"
+
+
+@dataclass(frozen=True)
+class Feed:
+    body: str
+    etag: str
+
+
+class FeedCache:
+    """
+    A TTLCache of rendered feeds plus a reverse index from dependencies to feeds.
+
+    The index only holds feeds that were set and not invalidated since; a
+    feed set again replaces its old dependencies, so it stays bounded by the
+    number of distinct feeds even as cached entries expire.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self._feeds = TTLCache(max_entries=max_entries, ttl=ttl)
+        self._dependents: Dict[Dependency, Set[FeedKey]] = {}
+        self._depends_on: Dict[FeedKey, Set[Dependency]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: FeedKey) -> Optional[Feed]:
+        return self._feeds.get(key)
+
+    def set(self, key: FeedKey, feed: Feed, depends_on: Iterable[Dependency]) -> None:
+        with self._lock:
+            self._forget(key)
+            self._depends_on[key] = set(depends_on)
+            for dependency in self._depends_on[key]:
+                self._dependents.setdefault(dependency, set()).add(key)
+            self._feeds.set(key, feed)
+
+    def invalidate(self, dependency: Dependency) -> None:
+        with self._lock:
+            for key in self._dependents.pop(dependency, set()):
+                self._forget(key)
+                self._feeds.invalidate(key)
+
+    def _forget(self, key: FeedKey) -> None:
+        """Drops `key` from the index of every dependency it was listed under. Hold the lock."""
+        for dependency in self._depends_on.pop(key, ()):
+            keys = self._dependents.get(dependency)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._dependents[dependency]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._dependents.clear()
+            self._depends_on.clear()
+        self._feeds.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return self._feeds.stats()
+
+
+feed_cache = FeedCache(
+    max_entries=settings.CALENDAR_CACHE_MAX_ENTRIES,
+    ttl=settings.CALENDAR_CACHE_TTL_SECONDS,
+)
+
+
+# --- Signed links ---
+def feed_token(key: FeedKey) -> str:
+    """Token that makes the URL of one feed unguessable."""
+    message = f"calendar-feed:{key[0]}:{key[1]}".encode()
+    return hmac.new(auth.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()[:32]
+
+
+def valid_token(key: FeedKey, token: Optional[str]) -> bool:
+    return bool(token) and hmac.compare_digest(token, feed_token(key))
+
+
+# --- Rendering ---
+def _assignment_event(assignment: models.Assignment, course: Optional[models.Course]) -> Event:
+    prefix = f"{course.code}: " if course is not None and course.code else ""
+    return Event(
+        name=f"{prefix}Due: {assignment.title}",
+        begin=assignment.due_date,
+        description=assignment.description,
+        uid=f"assignment-{assignment.id}@sis",
+    )
+
+
+def _session_event(session: models.Session, course: Optional[models.Course]) -> Event:
+    prefix = f"{course.code}: " if course is not None and course.code else ""
+    item = Event(name=f"{prefix}{session.topic or 'Class session'}", begin=session.date, uid=f"session-{session.id}@sis")
+    item.make_all_day()
+    return item
+
+
+def _milestone_event(milestone: models.Milestone, project: models.ResearchProject) -> Event:
+    item = Event(
+        name=f"{project.title}: {milestone.title}",
+        begin=milestone.due_date,
+        description=milestone.description,
+        uid=f"milestone-{milestone.id}@sis",
+    )
+    item.make_all_day()
+    return item
+
+
+def render(name: str, events: List[Event]) -> Feed:
+    """
+    Serializes the events in a stable order, so the same rows always give the
+    same bytes and therefore the same ETag in every worker process.
+    """
+    ordered = sorted(events, key=lambda item: (item.begin, item.uid))
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}", f"X-WR-CALNAME:{name}"]
+    lines.extend(item.serialize() for item in ordered)
+    lines.append("END:VCALENDAR")
+    body = "\r\n".join(lines) + "\r\n"
+    return Feed(body=body, etag=f'"{hashlib.sha256(body.encode()).hexdigest()[:32]}"')
+
+
+def course_feed(db: Session, course: models.Course) -> Tuple[Feed, Set[Dependency]]:
+    """Assignments and sessions of one course."""
+    events = [
+        _assignment_event(assignment, course)
+        for assignment in db.query(models.Assignment).filter(
+            models.Assignment.course_id == course.id, models.Assignment.due_date.isnot(None)
+        )
+    ]
+    events += [
+        _session_event(session, course)
+        for session in db.query(models.Session).filter(models.Session.course_id == course.id)
+    ]
+    return render(f"{course.code} {course.title}", events), {("course", course.id)}
+
+
+def student_feed(db: Session, student: models.Student) -> Tuple[Feed, Set[Dependency]]:
+    """Assignments and sessions of every course the student is enrolled in, plus their project milestones."""
+    courses = {
+        course.id: course
+        for course in db.query(models.Course).join(
+            models.Enrollment, models.Enrollment.course_id == models.Course.id
+        ).filter(models.Enrollment.student_id == student.id)
+    }
+    projects = {
+        project.id: project
+        for project in db.query(models.ResearchProject).filter(models.ResearchProject.student_id == student.id)
+    }
+
+    events = []
+    if courses:
+        events += [
+            _assignment_event(assignment, courses[assignment.course_id])
+            for assignment in db.query(models.Assignment).filter(
+                models.Assignment.course_id.in_(courses), models.Assignment.due_date.isnot(None)
+            )
+        ]
+        events += [
+            _session_event(session, courses[session.course_id])
+            for session in db.query(models.Session).filter(models.Session.course_id.in_(courses))
+        ]
+    if projects:
+        events += [
+            _milestone_event(milestone, projects[milestone.project_id])
+            for milestone in db.query(models.Milestone).filter(
+                models.Milestone.project_id.in_(projects), models.Milestone.due_date.isnot(None)
+            )
+        ]
+
+    depends_on = {("student", student.id)}
+    depends_on |= {("course", course_id) for course_id in courses}
+    depends_on |= {("project", project_id) for project_id in projects}
+    return render(f"{student.first_name} {student.last_name}", events), depends_on
+
+
+def matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Strong comparison against an If-None-Match header."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+# --- Invalidation ---
+def _invalidate_on_commit(target, dependencies: Iterable[Dependency]):
+    """Queues the feeds `target` shows up in to be dropped when its session commits."""
+    session = object_session(target)
+    if session is None:
+        for dependency in dependencies:
+            feed_cache.invalidate(dependency)
+        return
+    session.info.setdefault(PENDING_INFO_KEY, set()).update(dependencies)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for dependency in session.info.pop(PENDING_INFO_KEY, ()):
+        feed_cache.invalidate(dependency)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop(PENDING_INFO_KEY, None)
+
+
+def _changed(target, attribute: str) -> Set[int]:
+    """Current and (if it was just changed) previous value of a foreign key."""
+    values = {getattr(target, attribute)}
+    values.update(inspect(target).attrs[attribute].history.deleted)
+    return {value for value in values if value is not None}
+
+
+@event.listens_for(models.Assignment, "after_insert")
+@event.listens_for(models.Assignment, "after_update")
+@event.listens_for(models.Assignment, "after_delete")
+@event.listens_for(models.Session, "after_insert")
+@event.listens_for(models.Session, "after_update")
+@event.listens_for(models.Session, "after_delete")
+def _invalidate_course_rows(mapper, connection, target):
+    _invalidate_on_commit(target, [("course", course_id) for course_id in _changed(target, "course_id")])
+
+
+@event.listens_for(models.Course, "after_update")
+@event.listens_for(models.Course, "after_delete")
+def _invalidate_course(mapper, connection, target):
+    _invalidate_on_commit(target, [("course", target.id)])
+
+
+@event.listens_for(models.Enrollment, "after_insert")
+@event.listens_for(models.Enrollment, "after_update")
+@event.listens_for(models.Enrollment, "after_delete")
+@event.listens_for(models.ResearchProject, "after_insert")
+@event.listens_for(models.ResearchProject, "after_update")
+@event.listens_for(models.ResearchProject, "after_delete")
+def _invalidate_student_rows(mapper, connection, target):
+    _invalidate_on_commit(target, [("student", student_id) for student_id in _changed(target, "student_id")])
+
+
+@event.listens_for(models.Student, "after_update")
+@event.listens_for(models.Student, "after_delete")
+def _invalidate_student(mapper, connection, target):
+    _invalidate_on_commit(target, [("student", target.id)])
+
+
+@event.listens_for(models.Milestone, "after_insert")
+@event.listens_for(models.Milestone, "after_update")
+@event.listens_for(models.Milestone, "after_delete")
+def _invalidate_project_rows(mapper, connection, target):
+    _invalidate_on_commit(target, [("project", project_id) for project_id in _changed(target, "project_id")])
+
+
+@event.listens_for(models.ResearchProject, "after_update")
+@event.listens_for(models.ResearchProject, "after_delete")
+def _invalidate_project(mapper, connection, target):
+    _invalidate_on_commit(target, [("project", target.id)])
@@ -13,6 +13,74 @@ class Settings(BaseSettings):
     MAIL_PORT: int
     MAIL_SERVER: str
     MAIL_FROM_NAME: str
+    # Logins allowed on the /admin/ routes, comma-separated (the seeded admin by default)
+    ADMIN_EMAILS: str = "admin@example.com"
+    # Principal cache for authenticated requests (0 entries disables it)
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    # Password hashing: bcrypt cost and the process pool that runs it
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 0  # 0 means one per CPU core
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    # Submission uploads
+    UPLOAD_DIR: str = "uploads"
+    MAX_UPLOAD_BYTES: int = 50 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+    # Resumable (multipart) uploads for large submissions
+    MAX_RESUMABLE_UPLOAD_BYTES: int = 2 * 1024 * 1024 * 1024
+    MAX_UPLOAD_PART_BYTES: int = 64 * 1024 * 1024
+    UPLOAD_SESSION_TTL_HOURS: int = 48
+    # Background audit log writer
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_QUEUE_MAX: int = 10000
+    AUDIT_ENQUEUE_TIMEOUT_SECONDS: float = 0.5
+    AUDIT_FLUSH_TIMEOUT_SECONDS: float = 5.0  # longest a flush waits for the batch the writer is on
+    # Audit log partitioning: monthly tables kept online, then gzip JSONL archives
+    AUDIT_ONLINE_MONTHS: int = 12
+    AUDIT_ARCHIVE_DIR: str = "audit_archive"
+    AUDIT_ARCHIVE_RETENTION_MONTHS: int = 0  # 0 keeps archives forever
+    AUDIT_PARTITION_CACHE_SECONDS: float = 60.0  # how long a process trusts its list of online months
+    # Rendered .ics feeds; invalidated on change in this process, the TTL bounds staleness elsewhere
+    CALENDAR_CACHE_MAX_ENTRIES: int = 5000
+    CALENDAR_CACHE_TTL_SECONDS: int = 60  # also how long other workers may serve a feed after a change
+    # SMTP connection and the outbox worker that drains email_outbox
+    MAIL_STARTTLS: bool = True
+    MAIL_USE_CREDENTIALS: bool = True
+    MAIL_TIMEOUT_SECONDS: float = 30.0
+    MAIL_OUTBOX_WORKER_ENABLED: bool = True
+    MAIL_BATCH_SIZE: int = 50
+    MAIL_POLL_INTERVAL_SECONDS: float = 5.0
+    MAIL_RATE_PER_SECOND: float = 10.0  # 0 disables rate limiting
+    MAIL_MAX_ATTEMPTS: int = 5
+    MAIL_RETRY_BASE_SECONDS: float = 30.0  # doubled after every failed attempt
+    MAIL_CLAIM_LEASE_SECONDS: int = 300
+    MAIL_IDLE_DISCONNECT_SECONDS: float = 60.0
+    # Due-date reminders for assignments and milestones
+    REMINDERS_ENABLED: bool = True
+    REMINDER_WINDOW_HOURS: int = 24
+    REMINDER_INTERVAL_MINUTES: float = 15.0
+    REMINDER_BATCH_SIZE: int = 1000
+    # Connection pools (the read pool serves GET requests; 0 sends them to the main pool)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_READ_POOL_SIZE: int = 20
+    DB_READ_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    # SQLite engine profile, applied to every new connection to a SQLite file
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # durable in WAL mode except for the last commits on power loss
+    SQLITE_MMAP_SIZE_BYTES: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KIB: int = 32 * 1024  # per connection
+    SQLITE_BUSY_TIMEOUT_MS: int = 10000
+    # Bulk CSV imports: rows validated, looked up and inserted per batch
+    IMPORT_BATCH_ROWS: int = 5000
+    IMPORT_MAX_REPORTED_ERRORS: int = 1000
+    # Streaming exports: rows fetched, encoded and sent per partition
+    EXPORT_CHUNK_ROWS: int = 5000
+    # Per-request SQL counting (Server-Timing header, /admin/query-stats) and the slow query log
+    QUERY_STATS_ENABLED: bool = True
+    SLOW_QUERY_MS: float = 200.0
 
     class Config:
         env_file = "backend/.env"
@@ -1,22 +1,158 @@
 # backend/database.py
-from sqlalchemy import create_engine
+import threading
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .config import settings # Import settings
 
 # Use the DATABASE_URL directly from the settings object
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
+# Requests that only read get a session from the read-only pool
+READ_ONLY_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def is_sqlite_file(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def apply_sqlite_profile(bind: Engine, read_only: bool = False) -> None:
+    """
+    Sets the SQLITE_* pragmas on every new connection. WAL lets readers run
+    alongside the single writer, and busy_timeout makes a blocked writer wait
+    for the lock instead of failing with "database is locked".
+    """
+
+    @event.listens_for(bind, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        if not read_only:
+            # journal_mode is stored in the database file; only a writer may change it
+            cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE_BYTES)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KIB)}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
+def _pool_options(url: str, read_only: bool = False) -> dict:
+    if url.startswith("sqlite") and not is_sqlite_file(url):
+        return {}
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    }
+    if read_only:
+        options.update(pool_size=settings.DB_READ_POOL_SIZE, max_overflow=settings.DB_READ_MAX_OVERFLOW)
+    if not url.startswith("sqlite"):
+        options["pool_pre_ping"] = True
+    return options
+
+
+def create_app_engine(url: str, read_only: bool = False) -> Engine:
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    bind = create_engine(url, connect_args=connect_args, **_pool_options(url, read_only))
+    if is_sqlite_file(url):
+        apply_sqlite_profile(bind, read_only=read_only)
+    return bind
+
+
+# --- Async engines: aiosqlite for SQLite, asyncpg for PostgreSQL ---
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_url(url: str) -> URL:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(
+            f"DATABASE_URL uses {backend!r}, which has no async driver here; supported backends: {', '.join(ASYNC_DRIVERS)}"
+        )
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def create_async_app_engine(url: str, read_only: bool = False) -> AsyncEngine:
+    options = _pool_options(url, read_only)
+    if is_sqlite_file(url):
+        options["poolclass"] = AsyncAdaptedQueuePool
+    bind = create_async_engine(async_url(url), **options)
+    if is_sqlite_file(url):
+        # Connect events fire on the sync facade, the pragmas are the same
+        apply_sqlite_profile(bind.sync_engine, read_only=read_only)
+    return bind
+
+
+engine = create_app_engine(SQLALCHEMY_DATABASE_URL)
+# A second pool of query_only connections for GETs, so reads never queue behind writers for a connection
+read_engine = (
+    create_app_engine(SQLALCHEMY_DATABASE_URL, read_only=True)
+    if settings.DB_READ_POOL_SIZE > 0 and is_sqlite_file(SQLALCHEMY_DATABASE_URL)
+    else engine
+)
+
+async_engine = create_async_app_engine(SQLALCHEMY_DATABASE_URL)
+async_read_engine = (
+    create_async_app_engine(SQLALCHEMY_DATABASE_URL, read_only=True) if read_engine is not engine else async_engine
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+# Objects stay loaded after commit: an expired attribute cannot be lazily refreshed
+# while FastAPI serializes the response outside the session's greenlet
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
-def get_db():
+def get_db(request: Request):
+    db = ReadSessionLocal() if request.method in READ_ONLY_METHODS else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_write_db():
+    """For the rare GET endpoint that writes."""
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db(request: Request):
+    """
+    Async counterpart of get_db. Waiting on the database no longer holds one
+    of the threadpool's threads, so in-flight requests are not capped by its size.
+    """
+    factory = AsyncReadSessionLocal if request.method in READ_ONLY_METHODS else AsyncSessionLocal
+    async with factory() as db:
+        yield db
+
+
+# --- Sync twins of async engines, for code that runs in threads (e.g. the audit writer) ---
+_sync_engines = {}
+_sync_engines_lock = threading.Lock()
+
+
+def sync_engine_for(bind: Engine) -> Engine:
+    """The sync engine on the same database as `bind`, writable even if `bind` is the read pool."""
+    if bind is read_engine:
+        return engine
+    if not bind.dialect.is_async:
+        return bind
+    url = bind.url.set(drivername=bind.url.get_backend_name())
+    key = url.render_as_string(hide_password=False)
+    if url == make_url(SQLALCHEMY_DATABASE_URL).set(drivername=url.drivername):
+        return engine
+    with _sync_engines_lock:
+        if key not in _sync_engines:
+            _sync_engines[key] = create_app_engine(key)
+        return _sync_engines[key]
@@ -0,0 +1,421 @@
+# backend/datagen.py
+"""
+Synthetic dataset generator for load testing and demos.
+
+Produces students, courses, enrollments, sessions, attendance, assignments,
+grades, research projects and milestones with skewed, realistic shapes:
+course popularity is long-tailed, every student has their own attendance
+habit and ability level, and scores cluster around that ability. Everything
+is drawn from one seeded NumPy generator, so a given seed and volume always
+produce the same rows. Rows go in through multi-row Core INSERTs inside one
+transaction, with ids assigned up front so no insert has to wait on another.
+
+Replace the configured database's students, courses and everything under them, from the project root:
+    python -m backend.datagen --students 50000 --courses 2000 --seed 42
+Write a fresh SQLite file instead:
+    python -m backend.datagen --students 50000 --courses 2000 --sqlite loadtest.db --force
+"""
+import argparse
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import create_engine, delete, event, insert, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+
+from . import models, resumable
+from .database import engine as default_engine
+
+ADMIN_EMAIL = "admin@example.com"
+ADMIN_PASSWORD = "adminpass"
+
+TERM_START = date(2025, 9, 1)
+TERM_WEEKS = 12
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Charlie", "Diana", "Ethan", "Fatima", "George", "Hana", "Ivan", "Julia", "Kofi", "Layla",
+    "Mateo", "Nadia", "Omar", "Priya", "Quinn", "Rosa", "Sven", "Tariq", "Uma", "Victor", "Wei", "Ximena",
+    "Yusuf", "Zoe", "Aiko", "Bruno", "Chen", "Dmitri", "Elena", "Farah", "Gustav", "Ines", "Jamal", "Keiko",
+]
+LAST_NAMES = [
+    "Smith", "Garcia", "Nguyen", "Okafor", "Kowalski", "Haddad", "Tanaka", "Silva", "Müller", "Patel", "Rossi",
+    "Johansson", "Kim", "Dubois", "Novak", "Mensah", "Ivanova", "Costa", "Lee", "Schmidt", "Ahmed", "Brown",
+]
+DEPARTMENTS = ["CS", "MATH", "PHYS", "CHEM", "BIO", "ECON", "HIST", "PHIL", "ENG", "PSY", "STAT", "LING"]
+TOPICS = [
+    "Foundations", "Methods", "Systems", "Theory", "Applications", "Modelling", "Analysis", "Design",
+    "Seminar", "Laboratory", "Special Topics", "Research Practice",
+]
+LEVELS = ["Introduction to", "Intermediate", "Advanced", "Graduate"]
+PROJECT_TOPICS = ["Graph Algorithms", "Protein Folding", "Labour Markets", "Dark Matter", "Language Models", "Soil Ecology"]
+MILESTONE_TITLES = ["Proposal", "Literature review", "First draft", "Final submission"]
+
+# Tables that get millions of rows; their indexes are rebuilt after loading
+BULK_MODELS = (models.Enrollment, models.Attendance, models.Grade)
+
+# Tables `generate` replaces. Submissions, upload sessions and sent reminders go too,
+# since they point at students and assignments (and reminders are keyed by their ids);
+# blobs stay and storage GC collects them once unreferenced.
+# Users, audit logs, the outbox and blobs are kept.
+GENERATED_MODELS = (
+    models.Student, models.Course, models.Enrollment, models.Session, models.Attendance,
+    models.Assignment, models.Grade, models.ResearchProject, models.Milestone,
+)
+CLEARED_MODELS = GENERATED_MODELS + (models.Submission, models.UploadSession, models.UploadPart, models.SentReminder)
+
+
+@dataclass
+class Volumes:
+    students: int = 200
+    courses: int = 12
+    courses_per_student: float = 5.0  # Poisson mean, clipped to 1..max_courses_per_student
+    max_courses_per_student: int = 8
+    sessions_per_course: int = 24
+    assignments_per_course: int = 8
+    submission_rate: float = 0.9  # share of (student, assignment) pairs that get a grade
+    project_rate: float = 0.1  # share of students with a research project
+    seed: int = 42
+
+
+# --- Generation ---
+def _students(rng: np.random.Generator, v: Volumes) -> List[dict]:
+    first = rng.integers(len(FIRST_NAMES), size=v.students)
+    last = rng.integers(len(LAST_NAMES), size=v.students)
+    return [
+        {
+            "id": i + 1,
+            "first_name": FIRST_NAMES[f],
+            "last_name": LAST_NAMES[l],
+            "email": f"{FIRST_NAMES[f].lower()}.{LAST_NAMES[l].lower()}.{i + 1}@example.edu",
+        }
+        for i, (f, l) in enumerate(zip(first.tolist(), last.tolist()))
+    ]
+
+
+def _courses(rng: np.random.Generator, v: Volumes) -> List[dict]:
+    rows = []
+    numbers: Dict[tuple, int] = {}
+    for i in range(v.courses):
+        department = DEPARTMENTS[int(rng.integers(len(DEPARTMENTS)))]
+        level = int(rng.integers(len(LEVELS)))
+        numbers[department, level] = numbers.get((department, level), 0) + 1
+        rows.append({
+            "id": i + 1,
+            "code": f"{department}{level + 1}{numbers[department, level]:03d}",  # e.g. CS1007, unique per course
+            "title": f"{LEVELS[level]} {department} {TOPICS[int(rng.integers(len(TOPICS)))]}",
+            "description": f"Synthetic course {i + 1}.",
+        })
+    return rows
+
+
+def _enrollments(rng: np.random.Generator, v: Volumes) -> np.ndarray:
+    """
+    (student_id, course_id) pairs. Course popularity is log-normal, and each
+    student draws distinct courses weighted by it (Gumbel top-k, vectorized).
+    """
+    log_popularity = rng.normal(0.0, 1.0, size=v.courses)
+    max_k = min(v.max_courses_per_student, v.courses)
+    counts = np.clip(rng.poisson(v.courses_per_student, size=v.students), 1, max_k)
+
+    pairs = []
+    chunk = max(1, 2_000_000 // max(v.courses, 1))
+    for start in range(0, v.students, chunk):
+        stop = min(start + chunk, v.students)
+        keys = log_popularity + rng.gumbel(size=(stop - start, v.courses))
+        top = np.argpartition(-keys, max_k - 1, axis=1)[:, :max_k] if max_k < v.courses else np.argsort(-keys, axis=1)
+        # Order each student's picks by key so taking the first k is a weighted sample of k
+        order = np.take_along_axis(keys, top, axis=1).argsort(axis=1)[:, ::-1]
+        top = np.take_along_axis(top, order, axis=1)
+        mask = np.arange(max_k) < counts[start:stop, None]
+        student_ids = np.broadcast_to(np.arange(start + 1, stop + 1)[:, None], mask.shape)[mask]
+        pairs.append(np.column_stack([student_ids, top[mask] + 1]))
+    return np.concatenate(pairs) if pairs else np.empty((0, 2), dtype=np.int64)
+
+
+def _session_dates(v: Volumes) -> List[date]:
+    """Meetings spread over the term, two or more a week on Mon/Wed/Fri then Tue/Thu."""
+    per_week = min(5, max(2, -(-v.sessions_per_course // TERM_WEEKS)))
+    weekdays = sorted([0, 2, 4, 1, 3][:per_week])
+    return [
+        TERM_START + timedelta(weeks=i // per_week, days=weekdays[i % per_week])
+        for i in range(v.sessions_per_course)
+    ]
+
+
+# --- Loading ---
+def clear(connection: Connection) -> None:
+    """Deletes every row of the tables `generate` replaces, children first, and the parts staged for dropped uploads."""
+    uploads = connection.execute(select(models.UploadSession.id)).scalars().all()
+    cleared = {model.__table__ for model in CLEARED_MODELS}
+    for table in reversed(models.Base.metadata.sorted_tables):
+        if table in cleared:
+            connection.execute(delete(table))
+    for upload_id in uploads:
+        resumable.discard(upload_id)
+
+
+def _load_admin(connection: Connection, password_hash: str) -> None:
+    """Creates the admin login, or resets its password; other users are left alone."""
+    users = models.User.__table__
+    updated = connection.execute(
+        update(users).where(users.c.email == ADMIN_EMAIL).values(hashed_password=password_hash)
+    ).rowcount
+    if not updated:
+        connection.execute(insert(users).values(email=ADMIN_EMAIL, hashed_password=password_hash))
+
+
+def advance_sequences(connection: Connection, tables) -> None:
+    """
+    Moves PostgreSQL's id sequences past the explicit ids written here, so the
+    next insert through the API does not collide. Other dialects pick the
+    next id from the table itself.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    for table in tables:
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {table.name}"
+        ))
+
+
+def insert_rows(
+    connection: Connection, table, data: Dict[str, Sequence], batch_size: int = 50_000, skip_conflicts_on: Sequence[str] = ()
+) -> int:
+    """
+    Multi-row INSERT from column-oriented data (lists or NumPy arrays).
+
+    The statement is compiled once and the column types' bind processors run
+    column by column up front, then chunks go straight to the driver's
+    executemany. `connection.execute(insert(...), dicts)` spends most of its
+    time rebuilding parameters row by row.
+
+    With `skip_conflicts_on` (the columns of a unique index) rows whose key is
+    already stored are left out by ON CONFLICT DO NOTHING, and the count
+    returned is of the rows actually inserted.
+    """
+    values = {name: column.tolist() if isinstance(column, np.ndarray) else list(column) for name, column in data.items()}
+    count = len(next(iter(values.values()), []))
+    if not count:
+        return 0
+    dialect = connection.dialect
+    statement = insert(table)
+    if skip_conflicts_on:
+        dialect_insert = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}[dialect.name]
+        statement = dialect_insert(table).on_conflict_do_nothing(index_elements=list(skip_conflicts_on))
+    compiled = statement.compile(dialect=dialect, column_keys=list(values))
+    names = list(compiled.positiontup) if dialect.positional else list(values)
+
+    for name in names:
+        processor = table.c[name].type.bind_processor(dialect)
+        if processor is not None:
+            # Enum and date columns repeat a handful of values; convert each once
+            distinct = set(values[name])
+            if len(distinct) * 4 < count:
+                converted = {value: processor(value) for value in distinct}
+                values[name] = list(map(converted.__getitem__, values[name]))
+            else:
+                values[name] = list(map(processor, values[name]))
+
+    rows = zip(*(values[name] for name in names))
+    params = list(rows) if dialect.positional else [dict(zip(names, row)) for row in rows]
+    inserted = 0
+    for start in range(0, count, batch_size):
+        inserted += connection.exec_driver_sql(compiled.string, params[start:start + batch_size]).rowcount
+    return inserted if skip_conflicts_on else count
+
+
+def generate(
+    bind: Engine, volumes: Volumes, admin_password_hash: Optional[str] = None, batch_size: int = 50_000
+) -> Dict[str, int]:
+    """Replaces the generated tables' contents with a new dataset and returns row counts."""
+    rng = np.random.default_rng(volumes.seed)
+    counts: Dict[str, int] = {}
+
+    with bind.begin() as connection:
+
+        def load(model, rows: List[dict]):
+            if rows:
+                load_columns(model, {name: [row[name] for row in rows] for name in rows[0]})
+
+        def load_columns(model, data: Dict[str, Sequence]):
+            inserted = insert_rows(connection, model.__table__, data, batch_size)
+            counts[model.__tablename__] = counts.get(model.__tablename__, 0) + inserted
+
+        clear(connection)
+
+        # Building the big tables' indexes once at the end beats updating them row by row
+        deferred = [index for model in BULK_MODELS for index in model.__table__.indexes]
+        for index in deferred:
+            index.drop(connection)
+
+        # 1. An admin to log in with
+        if admin_password_hash is not None:
+            _load_admin(connection, admin_password_hash)
+            counts["users"] = 1
+
+        # 2. Students and courses
+        load(models.Student, _students(rng, volumes))
+        load(models.Course, _courses(rng, volumes))
+
+        # 3. Enrollments, grouped by course for the per-course work below
+        pairs = _enrollments(rng, volumes)
+        pairs = pairs[np.lexsort((pairs[:, 0], pairs[:, 1]))]
+        load_columns(models.Enrollment, {
+            "id": np.arange(1, len(pairs) + 1),
+            "student_id": pairs[:, 0],
+            "course_id": pairs[:, 1],
+            "enrolled_at": [datetime.combine(TERM_START, datetime.min.time())] * len(pairs),
+        })
+        boundaries = np.searchsorted(pairs[:, 1], np.arange(1, volumes.courses + 2))
+        rosters = [pairs[boundaries[c]:boundaries[c + 1], 0] for c in range(volumes.courses)]
+
+        # Per-student habits: how reliably they attend and how well they score
+        attendance_habit = rng.beta(8, 1.5, size=volumes.students + 1)
+        ability = np.clip(rng.normal(74, 11, size=volumes.students + 1), 35, 98)
+
+        # 4. Sessions and attendance, one course at a time to bound memory
+        statuses = np.array([s.name for s in models.AttendanceStatus])  # PRESENT, ABSENT, LATE
+        dates = _session_dates(volumes)
+        session_id = attendance_id = 0
+        for course_index, roster in enumerate(rosters):
+            first_session = session_id + 1
+            session_id += len(dates)
+            load(models.Session, [
+                {
+                    "id": first_session + i,
+                    "date": session_date,
+                    "topic": f"Week {(session_date - TERM_START).days // 7 + 1}",
+                    "course_id": course_index + 1,
+                }
+                for i, session_date in enumerate(dates)
+            ])
+
+            # Every enrolled student at every session
+            students = np.tile(roster, len(dates))
+            habit = attendance_habit[students]
+            draw = rng.random(len(students))
+            # Present with the student's habit, otherwise late a third of the time, else absent
+            codes = np.where(draw < habit, 0, np.where(draw < habit + (1 - habit) / 3, 2, 1))
+            load_columns(models.Attendance, {
+                "id": np.arange(attendance_id + 1, attendance_id + len(students) + 1),
+                "session_id": np.repeat(np.arange(first_session, session_id + 1), len(roster)),
+                "student_id": students,
+                "status": statuses[codes],
+            })
+            attendance_id += len(students)
+
+        # 5. Assignments and grades
+        assignment_id = grade_id = 0
+        due_days = np.linspace(10, TERM_WEEKS * 7 - 3, volumes.assignments_per_course).astype(int).tolist()
+        for course_index, roster in enumerate(rosters):
+            first_assignment = assignment_id + 1
+            assignment_id += len(due_days)
+            load(models.Assignment, [
+                {
+                    "id": first_assignment + i,
+                    "title": f"Assignment {i + 1}",
+                    "description": f"Problem set {i + 1}.",
+                    "due_date": datetime.combine(TERM_START + timedelta(days=days), datetime.min.time()) + timedelta(hours=23, minutes=59),
+                    "course_id": course_index + 1,
+                }
+                for i, days in enumerate(due_days)
+            ])
+
+            # Most students hand in most assignments; scores scatter around their ability
+            students = np.tile(roster, len(due_days))
+            assignments = np.repeat(np.arange(first_assignment, assignment_id + 1), len(roster))
+            submitted = rng.random(len(students)) < volumes.submission_rate
+            students, assignments = students[submitted], assignments[submitted]
+            load_columns(models.Grade, {
+                "id": np.arange(grade_id + 1, grade_id + len(students) + 1),
+                "assignment_id": assignments,
+                "student_id": students,
+                "score": np.clip(rng.normal(ability[students], 8), 0, 100).round(1),
+            })
+            grade_id += len(students)
+
+        # 6. Research projects with a handful of milestones each
+        researchers = np.flatnonzero(rng.random(volumes.students) < volumes.project_rate) + 1
+        projects, milestones = [], []
+        for project_id, student_id in enumerate(researchers.tolist(), start=1):
+            start = TERM_START + timedelta(days=int(rng.integers(0, 30)))
+            projects.append({
+                "id": project_id,
+                "title": PROJECT_TOPICS[int(rng.integers(len(PROJECT_TOPICS)))],
+                "description": "Synthetic research project.",
+                "start_date": start,
+                "student_id": student_id,
+            })
+            for number, title in enumerate(MILESTONE_TITLES):
+                milestones.append({
+                    "id": len(milestones) + 1,
+                    "title": title,
+                    "due_date": start + timedelta(weeks=4 * (number + 1)),
+                    "status": "COMPLETED" if number == 0 else "PENDING",
+                    "project_id": project_id,
+                })
+        load(models.ResearchProject, projects)
+        load(models.Milestone, milestones)
+
+        for index in deferred:
+            index.create(connection)
+        advance_sequences(connection, [model.__table__ for model in GENERATED_MODELS])
+
+    return counts
+
+
+def fresh_sqlite_engine(path: Path, force: bool = False) -> Engine:
+    """
+    An engine on a new SQLite file with the schema created. Journaling and
+    fsyncs are off while loading: if the run dies, the file is just thrown away.
+    """
+    if path.exists():
+        if not force:
+            raise SystemExit(f"{path} already exists (use --force to replace it)")
+        path.unlink()
+    bind = create_engine(f"sqlite:///{path}")
+
+    @event.listens_for(bind, "connect")
+    def _fast_load(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=OFF")
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA cache_size=-262144")  # 256 MiB
+        cursor.close()
+
+    models.Base.metadata.create_all(bind)
+    return bind
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    defaults = Volumes()
+    for field, value in asdict(defaults).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(value), default=value)
+    parser.add_argument("--sqlite", type=Path, default=None, help="write to a fresh SQLite file instead of DATABASE_URL")
+    parser.add_argument("--force", action="store_true", help="replace the --sqlite file if it exists")
+    parser.add_argument("--no-admin", action="store_true", help=f"skip creating {ADMIN_EMAIL} / {ADMIN_PASSWORD}")
+    args = parser.parse_args()
+
+    volumes = Volumes(**{field: getattr(args, field) for field in asdict(defaults)})
+    bind = fresh_sqlite_engine(args.sqlite, args.force) if args.sqlite else default_engine
+    admin_hash = None
+    if not args.no_admin:
+        from .auth import get_password_hash
+
+        admin_hash = get_password_hash(ADMIN_PASSWORD)
+
+    started = time.perf_counter()
+    counts = generate(bind, volumes, admin_password_hash=admin_hash)
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    print(", ".join(f"{table}={count}" for table, count in counts.items()))
+    print(f"{total} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# backend/exports.py
+"""
+Streaming exports of students, grades and attendance as NDJSON or CSV.
+
+Rows come off a server-side cursor in partitions of EXPORT_CHUNK_ROWS and
+are encoded and sent one partition at a time, so an export of millions of
+attendance records needs the same memory as one of a hundred, and the
+first bytes go out as soon as the first partition is read. With gzip the
+compressor is sync-flushed after every partition for the same reason.
+"""
+import csv
+import enum
+import io
+import zlib
+from datetime import date, datetime, time, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+
+import orjson
+from sqlalchemy import Select, exists, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from . import models
+from .config import settings
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+# --- Queries ---
+def _date_range(column, start: Optional[date], end: Optional[date], is_datetime: bool = False) -> List:
+    """Inclusive [start, end] filters; for datetime columns `end` covers the whole day."""
+    filters = []
+    if start is not None:
+        filters.append(column >= (datetime.combine(start, time()) if is_datetime else start))
+    if end is not None:
+        filters.append(column < datetime.combine(end + timedelta(days=1), time()) if is_datetime else column <= end)
+    return filters
+
+
+def students_query(course_id: Optional[int] = None, start: Optional[date] = None, end: Optional[date] = None) -> Select:
+    """Students, optionally only those enrolled in `course_id`. Students have no dates to filter on."""
+    query = select(models.Student.id, models.Student.first_name, models.Student.last_name, models.Student.email)
+    if course_id is not None:
+        query = query.where(exists().where(
+            models.Enrollment.student_id == models.Student.id, models.Enrollment.course_id == course_id
+        ))
+    return query.order_by(models.Student.id)
+
+
+def grades_query(course_id: Optional[int] = None, start: Optional[date] = None, end: Optional[date] = None) -> Select:
+    """Grades with their assignment's course and due date; the date range applies to the due date."""
+    query = select(
+        models.Grade.id, models.Grade.assignment_id, models.Assignment.course_id, models.Assignment.due_date,
+        models.Grade.student_id, models.Grade.score, models.Grade.comments,
+    ).join(models.Assignment, models.Assignment.id == models.Grade.assignment_id)
+    if course_id is not None:
+        query = query.where(models.Assignment.course_id == course_id)
+    return query.where(*_date_range(models.Assignment.due_date, start, end, is_datetime=True)).order_by(models.Grade.id)
+
+
+def attendance_query(course_id: Optional[int] = None, start: Optional[date] = None, end: Optional[date] = None) -> Select:
+    """Attendance with its session's course and date; the date range applies to the session date."""
+    query = select(
+        models.Attendance.id, models.Attendance.session_id, models.Session.course_id, models.Session.date,
+        models.Attendance.student_id, models.Attendance.status,
+    ).join(models.Session, models.Session.id == models.Attendance.session_id)
+    if course_id is not None:
+        query = query.where(models.Session.course_id == course_id)
+    return query.where(*_date_range(models.Session.date, start, end)).order_by(models.Attendance.id)
+
+
+QUERIES = {"students": students_query, "grades": grades_query, "attendance": attendance_query}
+
+
+# --- Encoding ---
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def encode_ndjson(keys: List[str], rows) -> bytes:
+    return b"".join(orjson.dumps(dict(zip(keys, row))) + b"\n" for row in rows)
+
+
+def encode_csv(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+async def stream(
+    bind: AsyncEngine, query: Select, format: str = "ndjson", compress: bool = False, chunk_rows: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """Yields the encoded export, one partition of rows at a time."""
+    compressor = zlib.compressobj(wbits=31) if compress else None  # 31: gzip container
+
+    def emit(data: bytes) -> bytes:
+        if compressor is None:
+            return data
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    async with bind.connect() as connection:
+        result = await connection.stream(query.execution_options(yield_per=chunk_rows or settings.EXPORT_CHUNK_ROWS))
+        keys = list(result.keys())
+        if format == "csv":
+            yield emit(encode_csv([keys]))
+        async for partition in result.partitions():
+            yield emit(encode_ndjson(keys, partition) if format == "ndjson" else encode_csv(partition))
+
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def headers(name: str, format: str, compress: bool) -> Dict[str, str]:
+    filename = f"{name}.{format}" + (".gz" if compress else "")
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
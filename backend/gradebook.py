@@ -0,0 +1,53 @@
+# backend/gradebook.py
+import warnings
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+def _to_list(values: np.ndarray) -> List[Optional[float]]:
+    """Converts a float array to a JSON-friendly list with NaN as None."""
+    return [None if np.isnan(value) else float(value) for value in values]
+
+
+def _stats(scores: np.ndarray, axis: int) -> Dict[str, List[Optional[float]]]:
+    """Mean, median and population stddev along an axis, ignoring missing grades."""
+    # All-NaN rows/columns (nobody graded yet) legitimately produce NaN
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        return {
+            "mean": _to_list(np.nanmean(scores, axis=axis)),
+            "median": _to_list(np.nanmedian(scores, axis=axis)),
+            "stddev": _to_list(np.nanstd(scores, axis=axis)),
+        }
+
+
+def build_matrix(
+    student_ids: List[int],
+    assignment_ids: List[int],
+    grades: Iterable[Tuple[int, int, Optional[float]]],
+) -> Dict[str, object]:
+    """
+    Lays grades out as a dense students x assignments matrix.
+
+    `grades` yields (student_id, assignment_id, score) tuples; pairs outside
+    the given id vectors are ignored and missing grades become None.
+    Per-assignment stats run down the columns and per-student stats across the rows.
+    """
+    scores = np.full((len(student_ids), len(assignment_ids)), np.nan)
+    row_of = {student_id: i for i, student_id in enumerate(student_ids)}
+    col_of = {assignment_id: j for j, assignment_id in enumerate(assignment_ids)}
+
+    for student_id, assignment_id, score in grades:
+        i = row_of.get(student_id)
+        j = col_of.get(assignment_id)
+        if i is not None and j is not None and score is not None:
+            scores[i, j] = score
+
+    return {
+        "student_ids": student_ids,
+        "assignment_ids": assignment_ids,
+        "scores": [_to_list(row) for row in scores],
+        "assignment_stats": _stats(scores, axis=0),
+        "student_stats": _stats(scores, axis=1),
+    }
@@ -0,0 +1,82 @@
+# backend/hashing.py
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from . import auth
+from .config import settings
+
+# bcrypt is CPU-bound, so it runs in worker processes instead of the
+# event loop or Starlette's threadpool. Created lazily on first use.
+_pool: Optional[ProcessPoolExecutor] = None
+
+# Caps queued + running hash jobs so a login storm gets fast 503s instead
+# of an ever-growing backlog. Non-blocking, so it works from any event loop.
+_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_MAX_PENDING)
+
+
+def _pool_size() -> int:
+    return settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # "spawn" avoids forking a process that already runs server threads
+        _pool = ProcessPoolExecutor(
+            max_workers=_pool_size(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+        _pool = None
+
+
+# --- Worker functions (must be importable top-level callables) ---
+def _hash(password: str) -> str:
+    return auth.get_password_hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return auth.pwd_context.verify_and_update(password, hashed_password)
+
+
+# --- Async API used by request handlers ---
+async def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent sign-ins, please retry",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_pool(), fn, *args)
+    finally:
+        _slots.release()
+
+
+async def hash_password(password: str) -> str:
+    return await _run(_hash, password)
+
+
+async def verify_password(password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """
+    Checks a password off the event loop.
+
+    Returns (valid, new_hash); new_hash is set when the stored hash was made
+    with different settings (e.g. fewer bcrypt rounds) and should be replaced.
+    """
+    if not hashed_password:
+        return False, None
+    return await _run(_verify_and_update, password, hashed_password)
@@ -0,0 +1,241 @@
+# backend/imports.py
+"""
+Bulk CSV imports of students, enrollments and grades.
+
+The file is parsed as a stream and handled IMPORT_BATCH_ROWS rows at a
+time: a batch is validated against the dataset's schema in one pass, then
+checked for keys repeated earlier in the file and for ids that match nothing
+(one query each), and what is left goes in as chunked multi-row INSERTs
+that skip keys already stored with ON CONFLICT DO NOTHING. Everything
+happens in the caller's transaction; rows that cannot be imported are
+reported back by line number instead of failing the whole file.
+
+    students     first_name,last_name,email                 stored emails are skipped
+    enrollments  course_id,student_id                       stored enrollments are skipped
+    grades       assignment_id,student_id,score[,comments]  stored grades are updated
+
+Import into the configured database, from the project root:
+    python -m backend.imports students new_term.csv
+    python -m backend.imports grades midterm.csv --dry-run
+"""
+import argparse
+import csv
+import io
+import json
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import IO, Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import bulk, calendars, datagen, models, schemas
+from .config import settings
+from .database import SessionLocal
+
+
+@dataclass(frozen=True)
+class Dataset:
+    schema: Type[BaseModel]
+    model: type
+    key: Tuple[str, ...]  # unique in the file and in the table
+    references: Dict[str, type] = field(default_factory=dict)  # field -> model whose id it must match
+    defaults: Dict[str, Callable[[], Any]] = field(default_factory=dict)  # columns not in the schema
+    upsert: Optional[Callable[[Session, List[BaseModel]], Dict[str, int]]] = None  # replaces skip-and-insert
+    feed: Optional[Callable[[BaseModel], calendars.Dependency]] = None  # calendar feed a written row shows up in
+
+
+def invalidate_feeds(feeds: Iterable[calendars.Dependency]):
+    """
+    Multi-row INSERTs bypass the ORM events that keep calendar feeds fresh;
+    call this with the feeds `run` collected once the import is committed.
+    """
+    for dependency in feeds:
+        calendars.feed_cache.invalidate(dependency)
+
+
+DATASETS = {
+    "students": Dataset(schemas.StudentCreate, models.Student, key=("email",)),
+    "enrollments": Dataset(
+        schemas.EnrollmentImport, models.Enrollment, key=("course_id", "student_id"),
+        references={"course_id": models.Course, "student_id": models.Student},
+        defaults={"enrolled_at": datetime.utcnow},
+        feed=lambda enrollment: ("student", enrollment.student_id),
+    ),
+    "grades": Dataset(
+        schemas.GradeCreate, models.Grade, key=("assignment_id", "student_id"),
+        references={"assignment_id": models.Assignment, "student_id": models.Student},
+        upsert=bulk.upsert_grades,
+    ),
+}
+
+
+# --- Reading ---
+def _records(reader: csv.DictReader, batch_size: int) -> Iterator[List[Tuple[int, dict]]]:
+    """Yields batches of (line number, non-empty fields) as the file is read."""
+    batch = []
+    try:
+        for raw in reader:
+            # Blank fields are left out, so optional columns fall back to their defaults
+            values = {name: value.strip() for name, value in raw.items() if name is not None and value and value.strip()}
+            if None in raw:
+                values[None] = raw[None]  # more fields than the header; reported by _validate
+            batch.append((reader.line_num, values))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    except (csv.Error, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=400, detail=f"Unreadable CSV after line {reader.line_num}: {exc}")
+    if batch:
+        yield batch
+
+
+def _check_header(dataset: Dataset, columns: Optional[List[str]]):
+    if not columns:
+        raise HTTPException(status_code=400, detail="The file is empty")
+    required = [name for name, info in dataset.schema.model_fields.items() if info.is_required()]
+    missing = [name for name in required if name not in columns]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing columns: {', '.join(missing)}")
+
+
+# --- Checking ---
+def _validate(adapter: TypeAdapter, batch: List[Tuple[int, dict]], errors: Dict[int, List[str]]) -> List[Tuple[int, BaseModel]]:
+    """Validates the whole batch in one call; rows with errors are left out and reported."""
+    for line, values in batch:
+        if None in values:
+            errors[line].append("more fields than the header")
+    rows = [(line, values) for line, values in batch if line not in errors]
+    try:
+        items = adapter.validate_python([values for _, values in rows])
+    except ValidationError as exc:
+        failed = set()
+        for error in exc.errors(include_url=False):
+            index, *location = error["loc"]
+            errors[rows[index][0]].append(f"{'.'.join(map(str, location))}: {error['msg']}")
+            failed.add(index)
+        rows = [row for index, row in enumerate(rows) if index not in failed]
+        items = adapter.validate_python([values for _, values in rows])
+    return [(line, item) for (line, _), item in zip(rows, items)]
+
+
+def _unknown_references(db: Session, dataset: Dataset, items: List[Tuple[int, BaseModel]], errors: Dict[int, List[str]]):
+    for name, model in dataset.references.items():
+        ids = {getattr(item, name) for _, item in items}
+        known = set(db.scalars(select(model.id).where(model.id.in_(ids))))
+        for line, item in items:
+            if getattr(item, name) not in known:
+                errors[line].append(f"{name}: no {model.__tablename__} row with id {getattr(item, name)}")
+
+
+# --- Importing ---
+def _insert(db: Session, dataset: Dataset, items: List[BaseModel], batch_size: int) -> int:
+    data = {name: [getattr(item, name) for item in items] for name in dataset.schema.model_fields}
+    for name, default in dataset.defaults.items():
+        data[name] = [default()] * len(items)
+    # Keys stored before or during the import (by a concurrent writer) are skipped, not failed
+    return datagen.insert_rows(db.connection(), dataset.model.__table__, data, batch_size, skip_conflicts_on=dataset.key)
+
+
+def run(
+    db: Session, name: str, text: IO[str], batch_size: Optional[int] = None, feeds: Optional[Set[calendars.Dependency]] = None
+) -> Dict[str, Any]:
+    """
+    Imports a CSV text stream into the dataset `name` and returns the
+    report: rows read, inserted, updated, skipped and failed, plus the
+    errors of each failed row. The caller commits (or rolls back); the
+    calendar feeds the written rows show up in are added to `feeds`, for
+    `invalidate_feeds` after the commit.
+    """
+    dataset = DATASETS[name]
+    batch_size = batch_size or settings.IMPORT_BATCH_ROWS
+    reader = csv.DictReader(text)
+    _check_header(dataset, reader.fieldnames)
+
+    adapter = TypeAdapter(List[dataset.schema])
+    report: Dict[str, Any] = {"rows": 0, "inserted": 0, "updated": 0, "skipped": 0, "failed": 0, "errors": []}
+    first_seen: Dict[tuple, int] = {}  # key -> line it first appeared on
+
+    for batch in _records(reader, batch_size):
+        report["rows"] += len(batch)
+        errors: Dict[int, List[str]] = defaultdict(list)
+
+        # 1. Schema validation, for the whole batch at once
+        items = _validate(adapter, batch, errors)
+
+        # 2. Keys repeated within the file; the first occurrence wins
+        unique = []
+        for line, item in items:
+            key = tuple(getattr(item, column) for column in dataset.key)
+            if key in first_seen:
+                errors[line].append(f"duplicate of line {first_seen[key]}")
+            else:
+                first_seen[key] = line
+                unique.append((line, item))
+
+        # 3. Ids that match nothing
+        if dataset.references and unique:
+            _unknown_references(db, dataset, unique, errors)
+        rows = [item for line, item in unique if line not in errors]
+
+        # 4. Write: upsert, or insert and skip the keys already stored
+        if rows and dataset.upsert is not None:
+            counts = dataset.upsert(db, rows)
+            report["inserted"] += counts["inserted"]
+            report["updated"] += counts["updated"]
+            report["skipped"] += counts["unchanged"]
+        elif rows:
+            inserted = _insert(db, dataset, rows, batch_size)
+            report["inserted"] += inserted
+            report["skipped"] += len(rows) - inserted
+        if rows and dataset.feed is not None and feeds is not None:
+            feeds.update(map(dataset.feed, rows))
+
+        report["failed"] += len(errors)
+        room = settings.IMPORT_MAX_REPORTED_ERRORS - len(report["errors"])
+        report["errors"].extend({"row": line, "errors": errors[line]} for line in sorted(errors)[:max(room, 0)])
+
+    return report
+
+
+def run_file(
+    db: Session, name: str, file: BinaryIO, batch_size: Optional[int] = None, feeds: Optional[Set[calendars.Dependency]] = None
+) -> Dict[str, Any]:
+    """`run` over an uploaded binary file, read as UTF-8 (with or without a BOM)."""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        return run(db, name, text, batch_size, feeds)
+    finally:
+        text.detach()  # leave closing the upload to its owner
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", choices=list(DATASETS))
+    parser.add_argument("path", help="CSV file with a header row")
+    parser.add_argument("--batch-rows", type=int, default=settings.IMPORT_BATCH_ROWS)
+    parser.add_argument("--dry-run", action="store_true", help="check and report, without saving anything")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    feeds: Set[calendars.Dependency] = set()
+    with SessionLocal() as db, open(args.path, encoding="utf-8-sig", newline="") as text:
+        try:
+            report = run(db, args.dataset, text, args.batch_rows, feeds)
+        except HTTPException as exc:
+            parser.error(exc.detail)
+        if args.dry_run:
+            db.rollback()
+        else:
+            db.commit()
+            invalidate_feeds(feeds)
+    print(json.dumps(report, indent=2))
+    print(f"{report['rows']} rows in {time.perf_counter() - started:.2f}s" + (" (dry run, nothing saved)" if args.dry_run else ""))
+
+
+if __name__ == "__main__":
+    main()
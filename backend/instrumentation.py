@@ -0,0 +1,136 @@
+# backend/instrumentation.py
+"""
+Per-request SQL instrumentation.
+
+Engine events time every statement and charge it to the request being
+served, found through a context variable the HTTP middleware sets (it is
+copied into the threadpool that runs sync endpoints). Each response gets a
+`Server-Timing` header with the query count and DB time, statements slower
+than SLOW_QUERY_MS are logged with their route, and per-route totals are
+kept for the admin stats endpoint. Work outside a request, like the audit
+writer's batches, is not counted.
+"""
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RequestStats:
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.slow_queries = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def route(self) -> str:
+        # The router stores the matched route in the scope before the endpoint runs; requests
+        # that match none share one key, so random 404 paths cannot grow the totals
+        route = self.scope.get("route")
+        return f"{self.scope.get('method', '')} {getattr(route, 'path', '<unmatched>')}"
+
+
+_current: "contextvars.ContextVar[Optional[RequestStats]]" = contextvars.ContextVar("request_stats", default=None)
+
+
+# --- Engine events ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    elapsed = time.perf_counter() - context._query_started
+    stats.queries += 1
+    stats.db_seconds += elapsed
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        stats.slow_queries += 1
+        logger.warning("Slow query (%.1f ms) in %s: %s", elapsed * 1000, stats.route, " ".join(statement.split())[:1000])
+
+
+def instrument(bind: Engine) -> None:
+    """Starts timing statements on `bind`. Safe to call more than once."""
+    if not event.contains(bind, "before_cursor_execute", _before_cursor_execute):
+        event.listen(bind, "before_cursor_execute", _before_cursor_execute)
+        event.listen(bind, "after_cursor_execute", _after_cursor_execute)
+
+
+# --- Per-route totals ---
+class RouteStats:
+    """Thread-safe running totals per "METHOD /path/{template}"."""
+
+    def __init__(self):
+        self._routes: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stats: RequestStats) -> None:
+        with self._lock:
+            totals = self._routes.setdefault(stats.route, {
+                "requests": 0, "queries": 0, "max_queries": 0, "db_seconds": 0.0, "seconds": 0.0, "slow_queries": 0,
+            })
+            totals["requests"] += 1
+            totals["queries"] += stats.queries
+            totals["max_queries"] = max(totals["max_queries"], stats.queries)
+            totals["db_seconds"] += stats.db_seconds
+            totals["seconds"] += stats.elapsed
+            totals["slow_queries"] += stats.slow_queries
+
+    def snapshot(self) -> List[dict]:
+        """One row per route, the most total DB time first."""
+        with self._lock:
+            routes = [(route, dict(totals)) for route, totals in self._routes.items()]
+        rows = [
+            {
+                "route": route,
+                "requests": totals["requests"],
+                "queries": totals["queries"],
+                "avg_queries": round(totals["queries"] / totals["requests"], 2),
+                "max_queries": totals["max_queries"],
+                "db_ms": round(totals["db_seconds"] * 1000, 2),
+                "avg_db_ms": round(totals["db_seconds"] * 1000 / totals["requests"], 3),
+                "avg_ms": round(totals["seconds"] * 1000 / totals["requests"], 3),
+                "slow_queries": totals["slow_queries"],
+            }
+            for route, totals in routes
+        ]
+        return sorted(rows, key=lambda row: row["db_ms"], reverse=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+route_stats = RouteStats()
+
+
+@contextmanager
+def track(scope: dict) -> Iterator[RequestStats]:
+    """Charges statements run inside the block (and the tasks/threads it spawns) to one request."""
+    stats = RequestStats(scope)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        route_stats.add(stats)
+
+
+def server_timing(stats: RequestStats) -> str:
+    return f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.queries} queries", app;dur={stats.elapsed * 1000:.2f}'
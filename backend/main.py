@@ -2,27 +2,48 @@
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
+from contextlib import asynccontextmanager
 from datetime import timedelta, datetime, date
-from typing import List
+from typing import List, Literal, Optional, Tuple, Union
 
 from fastapi import Response
 from ics import Calendar, Event
 
-from . import models, schemas, auth
-from .database import engine, get_db
+from . import models, schemas, auth, audit, audit_partitions, bulk, calendars, datagen, exports, fastjson, gradebook, hashing, imports, instrumentation, outbox, reminders, resumable, storage
+from .pagination import encode_cursor, decode_cursor, decode_id_cursor, page_size
+from .database import async_engine, async_read_engine, engine, get_async_db, get_db, get_write_db, read_engine
 
-from fastapi import UploadFile, File, Form
-import shutil
+from fastapi import Header, Path as FastAPIPath, Request, UploadFile, File, Form
 import uuid
-from pathlib import Path
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
 from .config import settings
 
 models.Base.metadata.create_all(bind=engine)
+instrumentation.instrument(engine)
+instrumentation.instrument(read_engine)
+instrumentation.instrument(async_engine.sync_engine)
+instrumentation.instrument(async_read_engine.sync_engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.MAIL_OUTBOX_WORKER_ENABLED:
+        outbox.outbox_worker.start()
+    if settings.REMINDERS_ENABLED:
+        reminders.reminder_scheduler.start()
+    yield
+    # --- Shutdown ---
+    reminders.reminder_scheduler.stop()
+    outbox.outbox_worker.stop()
+    audit.audit_writer.stop()
+    hashing.shutdown_pool()
 
 app = FastAPI(
+    lifespan=lifespan,
     title="Student Information System API",
     description="API for managing students, courses, and grades.",
     version="0.1.0",
@@ -40,19 +61,34 @@ app.add_middleware(
     allow_headers=["*"], # Allows all headers
 )
 
-# --- Email Configuration ---
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.MAIL_USERNAME,
-    MAIL_PASSWORD=settings.MAIL_PASSWORD,
-    MAIL_FROM=settings.MAIL_FROM,
-    MAIL_PORT=settings.MAIL_PORT,
-    MAIL_SERVER=settings.MAIL_SERVER,
-    MAIL_FROM_NAME=settings.MAIL_FROM_NAME,
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True
-)
+# Refuse oversized submission uploads before their body is read
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    if request.method == "POST" and request.url.path.endswith("/submissions/"):
+        content_length = request.headers.get("content-length")
+        # Without a declared length the form parser would spool the whole body before any check runs
+        if not content_length or not content_length.isdigit():
+            return JSONResponse(
+                status_code=status.HTTP_411_LENGTH_REQUIRED,
+                content={"detail": "Submission uploads need a Content-Length; use an upload session to stream"},
+            )
+        if storage.exceeds_upload_limit(content_length):
+            return JSONResponse(
+                status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                content={"detail": f"File exceeds the {settings.MAX_UPLOAD_BYTES} byte upload limit"},
+            )
+    return await call_next(request)
+
+# Count and time each request's SQL statements and report them in Server-Timing
+@app.middleware("http")
+async def instrument_queries(request: Request, call_next):
+    if not settings.QUERY_STATS_ENABLED:
+        return await call_next(request)
+    with instrumentation.track(request.scope) as stats:
+        response = await call_next(request)
+    response.headers["Server-Timing"] = instrumentation.server_timing(stats)
+    return response
+
 
 
 # --- Endpoints ---
@@ -61,41 +97,81 @@ def read_root():
     return {"message": "Welcome to the Student Information System API"}
 
 @app.post("/users/", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     # Check if user already exists
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+    db_user = await run_in_threadpool(
+        lambda: db.query(models.User).filter(models.User.email == user.email).first()
+    )
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    # Hash the password and create the user
-    hashed_password = auth.get_password_hash(user.password)
+    # Hash the password in the worker pool and create the user
+    hashed_password = await hashing.hash_password(user.password)
     new_user = models.User(email=user.email, hashed_password=hashed_password)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+
+    def save():
+        db.add(new_user)
+        db.commit()
+        db.refresh(new_user)
+
+    await run_in_threadpool(save)
+    await audit.record_async(db, new_user.id, "CREATE_USER", f"Registered user with ID {new_user.id}.")
     return new_user
 
 @app.post("/token")
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     # Find the user by email (form_data.username is the email)
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
+    user = await run_in_threadpool(
+        lambda: db.query(models.User).filter(models.User.email == form_data.username).first()
+    )
 
-    # Check if user exists and password is correct
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+    # Check if user exists and password is correct (bcrypt runs in the worker pool)
+    valid, new_hash = await hashing.verify_password(
+        form_data.password, user.hashed_password if user else None
+    )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Transparently upgrade hashes made with outdated settings (e.g. bcrypt rounds)
+    if new_hash:
+        def rehash():
+            user.hashed_password = new_hash
+            db.commit()
+
+        await run_in_threadpool(rehash)
+
     # Create the access token
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth.create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": user.id}, expires_delta=access_token_expires
     )
 
     return {"access_token": access_token, "token_type": "bearer"}
 
+@app.get("/auth/cache-stats")
+def read_auth_cache_stats(current_user: models.User = Depends(auth.get_current_user)):
+    """
+    Hit/miss counters for the principal cache used by authenticated endpoints.
+    """
+    return auth.principal_cache.stats()
+
+@app.get("/admin/query-stats")
+def read_query_stats(current_user: models.User = Depends(auth.get_admin_user)):
+    """
+    Per-route SQL totals since startup (or the last reset): requests, queries,
+    DB time and slow statements, the routes spending the most DB time first.
+    """
+    return instrumentation.route_stats.snapshot()
+
+@app.delete("/admin/query-stats", status_code=status.HTTP_200_OK)
+def reset_query_stats(current_user: models.User = Depends(auth.get_admin_user)):
+    instrumentation.route_stats.clear()
+    return {"detail": "Query stats reset"}
+
 # --- STUDENT CRUD ENDPOINTS ---
 
 @app.post("/students/", response_model=schemas.Student, status_code=status.HTTP_201_CREATED)
@@ -109,36 +185,49 @@ def create_student(
     db.commit()
     db.refresh(new_student)
 
-    # --- ADD AUDIT LOG ENTRY ---
-    log_entry = models.AuditLog(
+    # --- ADD AUDIT LOG ENTRY (written in the background, batched) ---
+    audit.record(
+        db,
         user_id=current_user.id,
         action="CREATE_STUDENT",
         details=f"Created student '{new_student.first_name} {new_student.last_name}' with ID {new_student.id}."
     )
-    db.add(log_entry)
-    db.commit()
-    # -------------------------
 
     return new_student
 
-@app.get("/students/", response_model=List[schemas.Student])
-def read_students(
-    skip: int = 0, 
-    limit: int = 100, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+@app.get("/students/", response_model=Union[List[schemas.Student], schemas.StudentPage])
+async def read_students(
+    skip: int = 0,
+    limit: int = page_size(),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async)
 ):
-    students = db.query(models.Student).offset(skip).limit(limit).all()
-    return students
+    """
+    Retrieve students. Pass `cursor` (empty for the first page) to switch to
+    keyset pagination, which returns `items` plus an opaque `next_cursor`.
+    """
+    # Rows go straight from the result to orjson (see fastjson.py)
+    columns = fastjson.schema_columns(schemas.Student, models.Student)
+    if cursor is None:
+        return fastjson.list_response(await db.execute(select(*columns).offset(skip).limit(limit)))
+
+    query = select(*columns)
+    if cursor:
+        query = query.where(models.Student.id > decode_id_cursor(cursor))
+    students = fastjson.rows(await db.execute(query.order_by(models.Student.id).limit(limit + 1)))
+
+    next_cursor = encode_cursor([students[limit - 1]["id"]]) if len(students) > limit else None
+    return fastjson.page_response(students[:limit], next_cursor)
 
 # --- NEW: GET A SINGLE STUDENT ---
 @app.get("/students/{student_id}", response_model=schemas.Student)
-def read_student(
-    student_id: int, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+async def read_student(
+    student_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async)
 ):
-    db_student = db.query(models.Student).filter(models.Student.id == student_id).first()
+    db_student = await db.get(models.Student, student_id)
     if db_student is None:
         raise HTTPException(status_code=404, detail="Student not found")
     return db_student
@@ -161,6 +250,7 @@ def update_student(
 
     db.commit()
     db.refresh(db_student)
+    audit.record(db, current_user.id, "UPDATE_STUDENT", f"Updated student with ID {student_id}.")
     return db_student
 
 # --- NEW: DELETE A STUDENT ---
@@ -176,6 +266,7 @@ def delete_student(
 
     db.delete(db_student)
     db.commit()
+    audit.record(db, current_user.id, "DELETE_STUDENT", f"Deleted student with ID {student_id}.")
     return {"detail": "Student deleted successfully"}
 
 # --- COURSE CRUD ENDPOINTS ---
@@ -190,25 +281,40 @@ def create_course(
     db.add(db_course)
     db.commit()
     db.refresh(db_course)
+    audit.record(db, current_user.id, "CREATE_COURSE", f"Created course '{db_course.code}' with ID {db_course.id}.")
     return db_course
 
-@app.get("/courses/", response_model=List[schemas.Course])
-def read_courses(
+@app.get("/courses/", response_model=Union[List[schemas.Course], schemas.CoursePage])
+async def read_courses(
     skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    limit: int = page_size(),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async)
 ):
-    courses = db.query(models.Course).offset(skip).limit(limit).all()
-    return courses
+    """
+    Retrieve courses. Pass `cursor` (empty for the first page) to switch to
+    keyset pagination, which returns `items` plus an opaque `next_cursor`.
+    """
+    columns = fastjson.schema_columns(schemas.Course, models.Course)
+    if cursor is None:
+        return fastjson.list_response(await db.execute(select(*columns).offset(skip).limit(limit)))
+
+    query = select(*columns)
+    if cursor:
+        query = query.where(models.Course.id > decode_id_cursor(cursor))
+    courses = fastjson.rows(await db.execute(query.order_by(models.Course.id).limit(limit + 1)))
+
+    next_cursor = encode_cursor([courses[limit - 1]["id"]]) if len(courses) > limit else None
+    return fastjson.page_response(courses[:limit], next_cursor)
 
 @app.get("/courses/{course_id}", response_model=schemas.Course)
-def read_course(
+async def read_course(
     course_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async)
 ):
-    db_course = db.query(models.Course).filter(models.Course.id == course_id).first()
+    db_course = await db.get(models.Course, course_id)
     if db_course is None:
         raise HTTPException(status_code=404, detail="Course not found")
     return db_course
@@ -229,6 +335,7 @@ def update_course(
 
     db.commit()
     db.refresh(db_course)
+    audit.record(db, current_user.id, "UPDATE_COURSE", f"Updated course with ID {course_id}.")
     return db_course
 
 @app.delete("/courses/{course_id}", status_code=status.HTTP_200_OK)
@@ -243,89 +350,135 @@ def delete_course(
 
     db.delete(db_course)
     db.commit()
+    audit.record(db, current_user.id, "DELETE_COURSE", f"Deleted course with ID {course_id}.")
     return {"detail": "Course deleted successfully"}
 
-# --- DEVELOPMENT: SEED DATABASE ---
-@app.get("/seed-db/", status_code=status.HTTP_200_OK)
-# backend/main.py
-# ...
+# --- ENROLLMENT ENDPOINTS ---
 
-@app.get("/seed-db/", status_code=status.HTTP_200_OK)
-def seed_database(
-    db: Session = Depends(get_db)
+@app.post("/courses/{course_id}/enrollments/", response_model=schemas.Enrollment, status_code=status.HTTP_201_CREATED)
+def create_enrollment(
+    course_id: int,
+    enrollment: schemas.EnrollmentCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
 ):
-    """
-    Populates the database with a rich set of sample data.
-    Deletes existing data before adding new records.
-    """
-    # current_user: models.User = Depends(auth.get_current_user)
-    # 1. Clear existing data in the correct order to avoid foreign key errors
-    db.query(models.Attendance).delete()
-    db.query(models.Submission).delete()
-    db.query(models.Session).delete()
-    db.query(models.Assignment).delete()
-    db.query(models.Student).delete()
-    db.query(models.Course).delete()
-    db.query(models.User).delete()
+    db_course = db.query(models.Course).filter(models.Course.id == course_id).first()
+    if not db_course:
+        raise HTTPException(status_code=404, detail="Course not found")
+    db_student = db.query(models.Student).filter(models.Student.id == enrollment.student_id).first()
+    if not db_student:
+        raise HTTPException(status_code=404, detail="Student not found")
+
+    existing = db.query(models.Enrollment).filter(
+        models.Enrollment.course_id == course_id,
+        models.Enrollment.student_id == enrollment.student_id
+    ).first()
+    if existing:
+        raise HTTPException(status_code=400, detail="Student already enrolled in this course")
+
+    db_enrollment = models.Enrollment(course_id=course_id, student_id=enrollment.student_id)
+    db.add(db_enrollment)
     db.commit()
+    db.refresh(db_enrollment)
+    audit.record(
+        db, current_user.id, "ENROLL_STUDENT",
+        f"Enrolled student {enrollment.student_id} in course {course_id}."
+    )
+    return db_enrollment
+
+@app.post("/courses/{course_id}/enrollments/bulk", response_model=schemas.BulkEnrollmentResult, status_code=status.HTTP_200_OK)
+def enroll_students_bulk(
+    course_id: int,
+    enrollment_data: schemas.BulkEnrollment,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    db_course = db.query(models.Course).filter(models.Course.id == course_id).first()
+    if not db_course:
+        raise HTTPException(status_code=404, detail="Course not found")
 
-    # 2. Create a default user
-    hashed_password = auth.get_password_hash("adminpass")
-    default_user = models.User(email="admin@example.com", hashed_password=hashed_password)
-    db.add(default_user)
-
-    # 3. Create students
-    student1 = models.Student(first_name="Alice", last_name="Wonderland", email="alice@example.com")
-    student2 = models.Student(first_name="Bob", last_name="Builder", email="bob@example.com")
-    student3 = models.Student(first_name="Charlie", last_name="Chocolate", email="charlie@example.com")
-    student4 = models.Student(first_name="Diana", last_name="Prince", email="diana@example.com")
-    db.add_all([student1, student2, student3, student4])
-
-    # 4. Create courses
-    course1 = models.Course(title="Introduction to Python", code="CS101", description="A beginner's course.")
-    course2 = models.Course(title="Web Development with FastAPI", code="CS205", description="Building modern web APIs.")
-    course3 = models.Course(title="Advanced Algorithms", code="CS501", description="Deep dive into algorithms.")
-    db.add_all([course1, course2, course3])
-
-    # Commit users, students, and courses to get their IDs
+    result = bulk.enroll_students(db, course_id, enrollment_data.student_ids)
     db.commit()
+    # The multi-row INSERT bypasses the ORM events that keep student feeds fresh
+    for student_id in enrollment_data.student_ids:
+        calendars.feed_cache.invalidate(("student", student_id))
+    audit.record(
+        db, current_user.id, "BULK_ENROLL",
+        f"Enrolled {result['enrolled']} students in course {course_id}."
+    )
+    return {"detail": "Students enrolled successfully", **result}
 
-    # 5. Create assignments for courses
-    assignment1 = models.Assignment(title="Basic Syntax Quiz", due_date=datetime(2025, 10, 15, 23, 59), course_id=course1.id)
-    assignment2 = models.Assignment(title="First API Project", due_date=datetime(2025, 11, 1, 23, 59), course_id=course2.id)
-    db.add_all([assignment1, assignment2])
+@app.get("/courses/{course_id}/enrollments/", response_model=List[schemas.Enrollment])
+def read_enrollments_for_course(
+    course_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    Retrieve the enrollment roster for a specific course.
+    """
+    enrollments = db.query(models.Enrollment).filter(
+        models.Enrollment.course_id == course_id
+    ).order_by(models.Enrollment.student_id).all()
+    return enrollments
 
-    # 6. Create sessions for courses
-    session1 = models.Session(date=date(2025, 10, 5), topic="Variables and Types", course_id=course1.id)
-    session2 = models.Session(date=date(2025, 10, 12), topic="Loops and Conditionals", course_id=course1.id)
-    session3 = models.Session(date=date(2025, 10, 8), topic="Path Parameters", course_id=course2.id)
-    db.add_all([session1, session2, session3])
+@app.get("/courses/{course_id}/students/", response_model=List[schemas.Student])
+def read_students_for_course(
+    course_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    Retrieve the students enrolled in a specific course.
+    """
+    students = db.query(models.Student).join(
+        models.Enrollment, models.Enrollment.student_id == models.Student.id
+    ).filter(models.Enrollment.course_id == course_id).order_by(models.Student.id).all()
+    return students
 
-    # Commit assignments and sessions to get their IDs
+@app.delete("/courses/{course_id}/enrollments/{student_id}", status_code=status.HTTP_200_OK)
+def delete_enrollment(
+    course_id: int,
+    student_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    db_enrollment = db.query(models.Enrollment).filter(
+        models.Enrollment.course_id == course_id,
+        models.Enrollment.student_id == student_id
+    ).first()
+    if db_enrollment is None:
+        raise HTTPException(status_code=404, detail="Enrollment not found")
+
+    db.delete(db_enrollment)
     db.commit()
+    audit.record(db, current_user.id, "UNENROLL_STUDENT", f"Removed student {student_id} from course {course_id}.")
+    return {"detail": "Enrollment deleted successfully"}
 
-    # 7. Create a submission for an assignment
-    submission1 = models.Submission(
-        assignment_id=assignment1.id, 
-        student_id=student1.id, 
-        submission_date=datetime.now(),
-        file_path="uploads/dummy_submission.pdf"
-    )
-    db.add(submission1)
-
-    # 8. Mark attendance for a session
-    attendance_records = [
-        models.Attendance(session_id=session1.id, student_id=student1.id, status="present"),
-        models.Attendance(session_id=session1.id, student_id=student2.id, status="present"),
-        models.Attendance(session_id=session1.id, student_id=student3.id, status="absent"),
-        models.Attendance(session_id=session1.id, student_id=student4.id, status="late"),
-    ]
-    db.add_all(attendance_records)
-
-    # Final commit for submissions and attendance
-    db.commit()
+# --- DEVELOPMENT: SEED DATABASE ---
+@app.get("/seed-db/", status_code=status.HTTP_200_OK)
+def seed_database(
+    students: int = 200,
+    courses: int = 12,
+    seed: int = 42,
+    db: Session = Depends(get_write_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    Replaces students, courses and everything under them with a generated
+    dataset (see backend/datagen.py) and adds an admin@example.com / adminpass
+    login. The same seed and sizes always produce the same data; for millions
+    of rows use `python -m backend.datagen`.
+    """
+    if not 1 <= students <= 10_000 or not 1 <= courses <= 500:
+        raise HTTPException(status_code=400, detail="Use at most 10000 students and 500 courses here; run backend.datagen for more.")
+
+    volumes = datagen.Volumes(students=students, courses=courses, seed=seed)
+    counts = datagen.generate(db.get_bind(), volumes, admin_password_hash=auth.get_password_hash(datagen.ADMIN_PASSWORD))
+    auth.principal_cache.clear()
+    calendars.feed_cache.clear()
 
-    return {"detail": "Database has been seeded with a rich set of sample data."}
+    return {"detail": "Database has been seeded with generated sample data.", "counts": counts}
 
 # --- SESSION & ATTENDANCE ENDPOINTS ---
 @app.post("/courses/{course_id}/sessions/", response_model=schemas.Session, status_code=status.HTTP_201_CREATED)
@@ -343,70 +496,61 @@ def create_session_for_course(
     db.add(db_session)
     db.commit()
     db.refresh(db_session)
+    audit.record(db, current_user.id, "CREATE_SESSION", f"Created session {db_session.id} for course {course_id}.")
     return db_session
 
 @app.get("/courses/{course_id}/sessions/", response_model=List[schemas.Session])
-def read_sessions_for_course(
+async def read_sessions_for_course(
     course_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async)
 ):
     """
     Retrieve all sessions for a specific course.
     """
-    sessions = db.query(models.Session).filter(models.Session.course_id == course_id).all()
-    return sessions
+    return fastjson.list_response(await db.execute(
+        select(*fastjson.schema_columns(schemas.Session, models.Session)).where(models.Session.course_id == course_id)
+    ))
 
-# NOTE: For a real app, you'd fetch students enrolled in the course. For now, we fetch all students.
 @app.get("/sessions/{session_id}/attendance/", response_model=List[schemas.StudentAttendance])
-def get_attendance_for_session(
+async def get_attendance_for_session(
     session_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async)
 ):
-    # Fetch all students (in a real app, this would be students for the session's course)
-    all_students = db.query(models.Student).all()
-
-    # Fetch existing attendance records for this session
-    attendance_records = db.query(models.Attendance).filter(models.Attendance.session_id == session_id).all()
-    attendance_map = {record.student_id: record.status for record in attendance_records}
+    db_session = await db.get(models.Session, session_id)
+    if not db_session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    # Fetch the course roster together with each student's status for this session
+    result = await db.execute(select(
+        *fastjson.schema_columns(schemas.Student, models.Student, prefix="student."),
+        models.Attendance.status.label("status"),
+    ).join(
+        models.Enrollment, models.Enrollment.student_id == models.Student.id
+    ).outerjoin(
+        models.Attendance,
+        and_(
+            models.Attendance.student_id == models.Student.id,
+            models.Attendance.session_id == session_id
+        )
+    ).where(
+        models.Enrollment.course_id == db_session.course_id
+    ).order_by(models.Student.id))
 
-    # Combine student list with their attendance status
-    response_data = []
-    for student in all_students:
-        response_data.append({
-            "student": student,
-            "status": attendance_map.get(student.id) # Will be None if not marked yet
-        })
-    return response_data
+    # Status is None for students not marked yet
+    return fastjson.response(fastjson.nested_rows(result))
 
 @app.post("/sessions/{session_id}/attendance/", status_code=status.HTTP_200_OK)
-def update_attendance_for_session(
+async def update_attendance_for_session(
     session_id: int,
     update_data: schemas.BulkAttendanceUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async)
 ):
-    for att_data in update_data.attendances:
-        # Check if an attendance record already exists for this student and session
-        record = db.query(models.Attendance).filter(
-            models.Attendance.session_id == session_id,
-            models.Attendance.student_id == att_data.student_id
-        ).first()
-
-        if record:
-            # If it exists, update the status
-            record.status = att_data.status
-        else:
-            # If not, create a new record
-            new_record = models.Attendance(
-                session_id=session_id,
-                student_id=att_data.student_id,
-                status=att_data.status
-            )
-            db.add(new_record)
-
-    db.commit()
+    written = await db.run_sync(bulk.upsert_attendance, session_id, update_data.attendances)
+    await db.commit()
+    await audit.record_async(db, current_user.id, "UPDATE_ATTENDANCE", f"Recorded attendance for {written} students in session {session_id}.")
     return {"detail": "Attendance updated successfully"}
 
 # --- ASSIGNMENT & SUBMISSION ENDPOINTS ---
@@ -421,38 +565,181 @@ def create_assignment_for_course(
     db.add(db_assignment)
     db.commit()
     db.refresh(db_assignment)
+    audit.record(
+        db, current_user.id, "CREATE_ASSIGNMENT",
+        f"Created assignment '{db_assignment.title}' with ID {db_assignment.id} for course {course_id}."
+    )
     return db_assignment
 
 @app.post("/assignments/{assignment_id}/submissions/", response_model=schemas.Submission, status_code=status.HTTP_201_CREATED)
-def create_submission_for_assignment(
+async def create_submission_for_assignment(
     assignment_id: int,
     student_id: int = Form(...), # Get student_id from form data
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    # 1. Generate a unique filename to prevent conflicts
-    unique_id = uuid.uuid4()
-    file_extension = Path(file.filename).suffix
-    unique_filename = f"{unique_id}{file_extension}"
-    file_path = f"uploads/{unique_filename}"
+    # 1. Stream the file into the blob store, hashing it on the way
+    stored = await storage.save_upload(file)
 
-    # 2. Save the file to the 'uploads' directory
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    # 3. Create the submission record in the database
+    # 2. Create the submission record in the database
     db_submission = models.Submission(
         assignment_id=assignment_id,
         student_id=student_id,
         submission_date=datetime.now(),
-        file_path=file_path
+        file_path=stored.path,
+        sha256=stored.sha256,
+        size_bytes=stored.size_bytes
     )
-    db.add(db_submission)
+
+    def save():
+        storage.add_reference(db, stored)
+        db.add(db_submission)
+        db.commit()
+        db.refresh(db_submission)
+
+    await run_in_threadpool(save)
+    await audit.record_async(
+        db, current_user.id, "CREATE_SUBMISSION",
+        f"Created submission {db_submission.id} for assignment {assignment_id} by student {student_id}."
+    )
+    return db_submission
+
+# --- RESUMABLE UPLOAD ENDPOINTS ---
+def get_upload_session_or_404(db: Session, upload_id: str) -> models.UploadSession:
+    upload_session = db.query(models.UploadSession).options(
+        joinedload(models.UploadSession.parts)
+    ).filter(models.UploadSession.id == upload_id).first()
+    if upload_session is None:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return upload_session
+
+@app.post("/assignments/{assignment_id}/upload-sessions/", response_model=schemas.UploadSession, status_code=status.HTTP_201_CREATED)
+def create_upload_session(
+    assignment_id: int,
+    upload: schemas.UploadSessionCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    Start a resumable upload. PUT numbered parts to
+    /upload-sessions/{id}/parts/{n} (optionally with an X-Part-SHA256 header),
+    then POST /upload-sessions/{id}/complete to create the submission.
+    """
+    db_assignment = db.query(models.Assignment).filter(models.Assignment.id == assignment_id).first()
+    if not db_assignment:
+        raise HTTPException(status_code=404, detail="Assignment not found")
+
+    upload_session = models.UploadSession(id=uuid.uuid4().hex, assignment_id=assignment_id, **upload.model_dump())
+    db.add(upload_session)
     db.commit()
-    db.refresh(db_submission)
+    db.refresh(upload_session)
+    return upload_session
+
+@app.get("/upload-sessions/{upload_id}", response_model=schemas.UploadSession)
+def read_upload_session(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    Report which parts have arrived, so an interrupted client can resume.
+    """
+    return get_upload_session_or_404(db, upload_id)
+
+@app.put("/upload-sessions/{upload_id}/parts/{part_number}", response_model=schemas.UploadPart)
+async def upload_part(
+    upload_id: str,
+    request: Request,
+    part_number: int = FastAPIPath(..., ge=1),
+    x_part_sha256: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    upload_session = await run_in_threadpool(get_upload_session_or_404, db, upload_id)
+
+    # 1. Stream the part to a temp file, checking its size against what is left of the budget
+    other_bytes = sum(p.size_bytes for p in upload_session.parts if p.part_number != part_number)
+    size, sha256, temp_path = await resumable.receive_part(
+        request, upload_id, x_part_sha256, settings.MAX_RESUMABLE_UPLOAD_BYTES - other_bytes
+    )
+
+    # 2. Record it, replacing any earlier attempt at the same part
+    def save():
+        # Re-read the parts; others may have arrived while this one streamed
+        db.expire(upload_session, ["parts"])
+        other_bytes = sum(p.size_bytes for p in upload_session.parts if p.part_number != part_number)
+        if other_bytes + size > settings.MAX_RESUMABLE_UPLOAD_BYTES:
+            raise resumable.upload_too_large()
+
+        part = next((p for p in upload_session.parts if p.part_number == part_number), None)
+        if part is None:
+            part = models.UploadPart(part_number=part_number)
+            upload_session.parts.append(part)
+        part.size_bytes = size
+        part.sha256 = sha256
+        db.commit()
+        db.refresh(part)
+        return part
+
+    try:
+        part = await run_in_threadpool(save)
+    except BaseException:
+        # A rejected re-send leaves the part accepted earlier untouched
+        resumable.drop_part(temp_path)
+        raise
+    resumable.keep_part(temp_path, upload_id, part_number)
+    return part
+
+@app.post("/upload-sessions/{upload_id}/complete", response_model=schemas.Submission, status_code=status.HTTP_201_CREATED)
+async def complete_upload_session(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    upload_session = await run_in_threadpool(get_upload_session_or_404, db, upload_id)
+
+    # 1. Stitch the parts into the blob store without loading them into memory
+    stored = await run_in_threadpool(resumable.assemble, upload_id, list(upload_session.parts))
+
+    # 2. Create the submission and retire the session
+    db_submission = models.Submission(
+        assignment_id=upload_session.assignment_id,
+        student_id=upload_session.student_id,
+        submission_date=datetime.now(),
+        file_path=stored.path,
+        sha256=stored.sha256,
+        size_bytes=stored.size_bytes
+    )
+
+    def save():
+        storage.add_reference(db, stored)
+        db.add(db_submission)
+        db.delete(upload_session)
+        db.commit()
+        db.refresh(db_submission)
+
+    await run_in_threadpool(save)
+    resumable.discard(upload_id)
+    await audit.record_async(
+        db, current_user.id, "CREATE_SUBMISSION",
+        f"Created submission {db_submission.id} for assignment {db_submission.assignment_id} "
+        f"by student {db_submission.student_id} from upload session {upload_id}."
+    )
     return db_submission
 
+@app.delete("/upload-sessions/{upload_id}", status_code=status.HTTP_200_OK)
+def abort_upload_session(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    upload_session = get_upload_session_or_404(db, upload_id)
+    db.delete(upload_session)
+    db.commit()
+    resumable.discard(upload_id)
+    return {"detail": "Upload session aborted"}
+
 @app.get("/assignments/{assignment_id}/submissions/", response_model=List[schemas.SubmissionDetail])
 def read_submissions_for_assignment(
     assignment_id: int,
@@ -463,23 +750,20 @@ def read_submissions_for_assignment(
         joinedload(models.Submission.student)
     ).filter(models.Submission.assignment_id == assignment_id).all()
 
-    if submissions:
-        print("DEBUG: First submission's student object:", submissions[0].student)
-    
     return submissions
 
 @app.get("/courses/{course_id}/assignments/", response_model=List[schemas.Assignment])
-def read_assignments_for_course(
+async def read_assignments_for_course(
     course_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async)
 ):
     """
     Retrieve all assignments for a specific course.
     """
-    assignments = db.query(models.Assignment).filter(models.Assignment.course_id == course_id).all()
-    
-    return assignments
+    return fastjson.list_response(await db.execute(
+        select(*fastjson.schema_columns(schemas.Assignment, models.Assignment)).where(models.Assignment.course_id == course_id)
+    ))
 
 @app.get("/assignments/{assignment_id}", response_model=schemas.Assignment)
 def read_assignment(
@@ -494,67 +778,137 @@ def read_assignment(
 
 # --- GRADEBOOK ENDPOINTS ---
 
-@app.get("/courses/{course_id}/gradebook/", response_model=schemas.Gradebook)
-def get_gradebook_for_course(
+@app.get("/courses/{course_id}/gradebook/", response_model=Union[schemas.Gradebook, schemas.GradebookMatrix])
+async def get_gradebook_for_course(
     course_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    format: Literal["full", "matrix"] = "full",
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async)
 ):
-    # NOTE: For a real app, you'd fetch students enrolled in the course. For now, we fetch all.
-    students = db.query(models.Student).all()
-    assignments = db.query(models.Assignment).filter(models.Assignment.course_id == course_id).all()
-
-    # Get all student and assignment IDs for efficient filtering
-    student_ids = [student.id for student in students]
-    assignment_ids = [assignment.id for assignment in assignments]
-
-    grades = db.query(models.Grade).filter(
-        models.Grade.student_id.in_(student_ids),
-        models.Grade.assignment_id.in_(assignment_ids)
-    ).all()
-
-    return {"students": students, "assignments": assignments, "grades": grades}
-
-@app.post("/grades/", status_code=status.HTTP_200_OK)
-def update_grades_bulk(
+    """
+    Retrieve the gradebook for a course. `format=matrix` returns id vectors,
+    a dense score matrix and per-assignment/per-student statistics instead
+    of full student, assignment and grade objects.
+    """
+    # Grades for this course's assignments, restricted to enrolled students
+    def course_grades(*columns):
+        return select(*columns).join(
+            models.Assignment, models.Assignment.id == models.Grade.assignment_id
+        ).join(
+            models.Enrollment,
+            and_(
+                models.Enrollment.student_id == models.Grade.student_id,
+                models.Enrollment.course_id == course_id
+            )
+        ).where(models.Assignment.course_id == course_id)
+
+    if format == "matrix":
+        student_ids = (await db.scalars(select(models.Enrollment.student_id).where(
+            models.Enrollment.course_id == course_id
+        ).order_by(models.Enrollment.student_id))).all()
+        assignment_ids = (await db.scalars(select(models.Assignment.id).where(
+            models.Assignment.course_id == course_id
+        ).order_by(models.Assignment.id))).all()
+        grades = (await db.execute(course_grades(models.Grade.student_id, models.Grade.assignment_id, models.Grade.score))).all()
+        return gradebook.build_matrix(list(student_ids), list(assignment_ids), grades)
+
+    students = await db.execute(select(*fastjson.schema_columns(schemas.Student, models.Student)).join(
+        models.Enrollment, models.Enrollment.student_id == models.Student.id
+    ).where(models.Enrollment.course_id == course_id).order_by(models.Student.id))
+    assignments = await db.execute(select(*fastjson.schema_columns(schemas.Assignment, models.Assignment)).where(
+        models.Assignment.course_id == course_id
+    ))
+    grades = await db.execute(course_grades(*fastjson.schema_columns(schemas.Grade, models.Grade)))
+
+    return fastjson.response({
+        "students": fastjson.rows(students),
+        "assignments": fastjson.rows(assignments),
+        "grades": fastjson.rows(grades),
+    })
+
+@app.post("/grades/", response_model=schemas.BulkUpsertResult, status_code=status.HTTP_200_OK)
+async def update_grades_bulk(
     update_data: schemas.BulkGradeUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async)
+):
+    counts = await db.run_sync(bulk.upsert_grades, update_data.grades)
+    await db.commit()
+    await audit.record_async(
+        db, current_user.id, "UPDATE_GRADES",
+        f"Saved grades: {counts['inserted']} inserted, {counts['updated']} updated, {counts['unchanged']} unchanged."
+    )
+    return {"detail": "Grades updated successfully", **counts}
+
+# --- IMPORT ENDPOINTS ---
+@app.post("/imports/{dataset}", response_model=schemas.ImportResult, status_code=status.HTTP_200_OK)
+def import_dataset(
+    dataset: Literal["students", "enrollments", "grades"],
+    file: UploadFile = File(...),
+    dry_run: bool = False,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    for grade_data in update_data.grades:
-        # Look for an existing grade for this student and assignment
-        existing_grade = db.query(models.Grade).filter(
-            models.Grade.student_id == grade_data.student_id,
-            models.Grade.assignment_id == grade_data.assignment_id
-        ).first()
-
-        if existing_grade:
-            # If found, update it
-            existing_grade.score = grade_data.score
-            existing_grade.comments = grade_data.comments
-        else:
-            # If not found, create a new grade record
-            new_grade = models.Grade(**grade_data.model_dump())
-            db.add(new_grade)
+    """
+    Bulk-import a CSV file in one transaction (columns per dataset are listed
+    in imports.py). Rows that cannot be imported are reported by line number;
+    with `dry_run` the file is checked the same way and nothing is saved.
+    """
+    feeds = set()
+    report = imports.run_file(db, dataset, file.file, feeds=feeds)
+    if dry_run:
+        db.rollback()
+        return {"detail": "Dry run, nothing was saved", **report}
 
     db.commit()
-    return {"detail": "Grades updated successfully"}
+    imports.invalidate_feeds(feeds)
+    audit.record(
+        db, current_user.id, f"IMPORT_{dataset.upper()}",
+        f"Imported {dataset}: {report['inserted']} inserted, {report['updated']} updated, "
+        f"{report['skipped']} skipped, {report['failed']} failed."
+    )
+    return {"detail": "Import complete", **report}
+
+# --- EXPORT ENDPOINTS ---
+@app.get("/exports/{dataset}")
+async def export_dataset(
+    dataset: Literal["students", "grades", "attendance"],
+    format: Literal["ndjson", "csv"] = "ndjson",
+    course_id: Optional[int] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    gzip: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async)
+):
+    """
+    Stream a whole table as NDJSON or CSV, optionally gzipped. Filter by
+    course and an inclusive date range (assignment due date for grades,
+    session date for attendance).
+    """
+    query = exports.QUERIES[dataset](course_id, start, end)
+    return StreamingResponse(
+        exports.stream(db.bind, query, format, compress=gzip),
+        media_type="application/gzip" if gzip else exports.MEDIA_TYPES[format],
+        headers=exports.headers(dataset, format, gzip),
+    )
 
 # --- Test Email Endpoint ---
-@app.post("/email-test/")
-async def send_test_email(
+@app.post("/email-test/", status_code=status.HTTP_202_ACCEPTED)
+def send_test_email(
+    db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    message = MessageSchema(
-        subject="FastAPI Mail Test",
+    # Queued in the outbox; the background worker does the SMTP round trip
+    outbox.enqueue(
+        db,
         recipients=[current_user.email],  # Send to the logged-in user's email
+        subject="FastAPI Mail Test",
         body="<p>This is a test email sent from the Student Management System.</p>",
         subtype="html"
     )
-
-    fm = FastMail(conf)
-    await fm.send_message(message)
-    return {"message": "Test email has been sent"}
+    db.commit()
+    return {"message": "Test email has been queued"}
 
 @app.get("/assignments/{assignment_id}/ics")
 def get_assignment_ics(
@@ -584,6 +938,95 @@ def get_assignment_ics(
         headers={"Content-Disposition": f"attachment; filename=assignment_{assignment_id}.ics"}
     )
 
+def _calendar_response(feed: calendars.Feed, if_none_match: Optional[str], filename: str) -> Response:
+    headers = {
+        "ETag": feed.etag,
+        "Cache-Control": "no-cache",  # always revalidate; a 304 costs next to nothing
+        "Content-Disposition": f"inline; filename={filename}",
+    }
+    if calendars.matches(if_none_match, feed.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=feed.body, media_type="text/calendar", headers=headers)
+
+def _feed_link(request: Request, endpoint: str, key: Tuple[str, int], **path_params) -> dict:
+    url = request.url_for(endpoint, **path_params).include_query_params(token=calendars.feed_token(key))
+    return {"url": str(url)}
+
+@app.get("/courses/{course_id}/calendar-link", response_model=schemas.CalendarLink)
+def get_course_calendar_link(
+    course_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    Signed subscription URL for a course feed, to paste into a calendar client.
+    """
+    if not db.query(models.Course.id).filter(models.Course.id == course_id).first():
+        raise HTTPException(status_code=404, detail="Course not found")
+    return _feed_link(request, "get_course_calendar", ("course", course_id), course_id=course_id)
+
+@app.get("/students/{student_id}/calendar-link", response_model=schemas.CalendarLink)
+def get_student_calendar_link(
+    student_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    Signed subscription URL for a student feed, to paste into a calendar client.
+    """
+    if not db.query(models.Student.id).filter(models.Student.id == student_id).first():
+        raise HTTPException(status_code=404, detail="Student not found")
+    return _feed_link(request, "get_student_calendar", ("student", student_id), student_id=student_id)
+
+@app.get("/courses/{course_id}/calendar.ics")
+def get_course_calendar(
+    course_id: int,
+    token: Optional[str] = None,
+    if_none_match: Optional[str] = Header(default=None),
+    db: Session = Depends(get_db)
+    # Calendar clients cannot log in; the signed token from /calendar-link stands in
+):
+    """
+    Subscription feed with every assignment deadline and session of a course.
+    Served from the feed cache with a strong ETag; answers 304 when unchanged.
+    """
+    key = ("course", course_id)
+    if not calendars.valid_token(key, token):
+        raise HTTPException(status_code=404, detail="Calendar feed not found")
+    feed = calendars.feed_cache.get(key)
+    if feed is None:
+        db_course = db.query(models.Course).filter(models.Course.id == course_id).first()
+        if not db_course:
+            raise HTTPException(status_code=404, detail="Course not found")
+        feed, depends_on = calendars.course_feed(db, db_course)
+        calendars.feed_cache.set(key, feed, depends_on)
+    return _calendar_response(feed, if_none_match, f"course_{course_id}.ics")
+
+@app.get("/students/{student_id}/calendar.ics")
+def get_student_calendar(
+    student_id: int,
+    token: Optional[str] = None,
+    if_none_match: Optional[str] = Header(default=None),
+    db: Session = Depends(get_db)
+):
+    """
+    Subscription feed for one student: assignments and sessions of every
+    enrolled course plus the milestones of their research projects.
+    """
+    key = ("student", student_id)
+    if not calendars.valid_token(key, token):
+        raise HTTPException(status_code=404, detail="Calendar feed not found")
+    feed = calendars.feed_cache.get(key)
+    if feed is None:
+        db_student = db.query(models.Student).filter(models.Student.id == student_id).first()
+        if not db_student:
+            raise HTTPException(status_code=404, detail="Student not found")
+        feed, depends_on = calendars.student_feed(db, db_student)
+        calendars.feed_cache.set(key, feed, depends_on)
+    return _calendar_response(feed, if_none_match, f"student_{student_id}.ics")
+
 # --- RESEARCH & MILESTONE ENDPOINTS ---
 
 @app.post("/students/{student_id}/projects/", response_model=schemas.ResearchProject, status_code=status.HTTP_201_CREATED)
@@ -597,6 +1040,7 @@ def create_project_for_student(
     db.add(db_project)
     db.commit()
     db.refresh(db_project)
+    audit.record(db, current_user.id, "CREATE_PROJECT", f"Created project {db_project.id} for student {student_id}.")
     return db_project
 
 @app.get("/students/{student_id}/projects/", response_model=List[schemas.ResearchProject])
@@ -619,6 +1063,7 @@ def create_milestone_for_project(
     db.add(db_milestone)
     db.commit()
     db.refresh(db_milestone)
+    audit.record(db, current_user.id, "CREATE_MILESTONE", f"Created milestone {db_milestone.id} for project {project_id}.")
     return db_milestone
 
 @app.get("/projects/{project_id}/milestones/", response_model=List[schemas.Milestone])
@@ -646,18 +1091,67 @@ def update_milestone(
 
     db.commit()
     db.refresh(db_milestone)
+    audit.record(db, current_user.id, "UPDATE_MILESTONE", f"Updated milestone with ID {milestone_id}.")
     return db_milestone
 
 
-@app.get("/audit-logs/", response_model=List[schemas.AuditLog])
+@app.get("/audit-logs/", response_model=Union[List[schemas.AuditLog], schemas.AuditLogPage])
 def read_audit_logs(
     skip: int = 0,
-    limit: int = 100,
+    limit: int = page_size(),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     """
-    Retrieve audit log entries, newest first.
+    Retrieve audit log entries, newest first, across the hot table and the
+    monthly partitions still in the database. Pass `cursor` (empty for the
+    first page) to switch to keyset pagination on (timestamp, id).
     """
-    logs = db.query(models.AuditLog).order_by(models.AuditLog.timestamp.desc()).offset(skip).limit(limit).all()
-    return logs 
\ No newline at end of file
+    # Read-your-writes: make sure queued entries are in the table first
+    audit.audit_writer.flush()
+
+    if cursor is None:
+        return audit_partitions.query_recent(db.get_bind(), limit=limit, skip=skip)
+
+    before = None
+    if cursor:
+        last_timestamp, last_id = decode_cursor(cursor, 2)
+        try:
+            before = (datetime.fromisoformat(last_timestamp), int(last_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    logs = audit_partitions.query_recent(db.get_bind(), limit=limit + 1, before=before)
+
+    next_cursor = None
+    if len(logs) > limit:
+        last = logs[limit - 1]
+        next_cursor = encode_cursor([last["timestamp"].isoformat(), last["id"]])
+    return {"items": logs[:limit], "next_cursor": next_cursor}
+
+@app.get("/audit-logs/search", response_model=List[schemas.AuditLog])
+def search_audit_logs(
+    action: Optional[str] = None,
+    user_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    include_archived: bool = False,
+    limit: int = page_size(),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    Search audit entries by action, user and time range, newest first.
+    With `include_archived`, months exported to archive files are scanned
+    too once the online partitions are exhausted.
+    """
+    audit.audit_writer.flush()
+
+    logs = audit_partitions.query_recent(
+        db.get_bind(), limit=limit, action=action, user_id=user_id, start=start, end=end
+    )
+    if include_archived and len(logs) < limit:
+        logs += audit_partitions.search_archives(
+            action=action, user_id=user_id, start=start, end=end, limit=limit - len(logs)
+        )
+    return logs
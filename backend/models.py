@@ -1,6 +1,6 @@
 # backend/models.py
 import enum 
-from sqlalchemy import Column, Integer, String, Date, Enum, ForeignKey, DateTime, Float
+from sqlalchemy import Column, Integer, String, Date, Enum, ForeignKey, DateTime, Float, Index
 from sqlalchemy.orm import relationship 
 from .database import Base
 from datetime import datetime
@@ -19,6 +19,7 @@ class Student(Base):
     email = Column(String, unique=True, index=True)
 
     submissions = relationship("Submission", back_populates="student")
+    enrollments = relationship("Enrollment", back_populates="student", cascade="all, delete-orphan")
 
 
 class Course(Base):
@@ -29,6 +30,24 @@ class Course(Base):
     code = Column(String, unique=True, index=True)
     description = Column(String)
 
+    enrollments = relationship("Enrollment", back_populates="course", cascade="all, delete-orphan")
+
+class Enrollment(Base):
+    __tablename__ = "enrollments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False, index=True)
+    enrolled_at = Column(DateTime, default=datetime.utcnow)
+
+    course = relationship("Course", back_populates="enrollments")
+    student = relationship("Student", back_populates="enrollments")
+
+    # One enrollment per student per course; leads with course_id for roster scans.
+    __table_args__ = (
+        Index("uq_enrollments_course_student", "course_id", "student_id", unique=True),
+    )
+
 class User(Base):
     __tablename__ = "users"
 
@@ -58,13 +77,18 @@ class Attendance(Base):
     session = relationship("Session", back_populates="attendance_records")
     student = relationship("Student")
 
+    # One record per student per session; the conflict target for roll-call upserts.
+    __table_args__ = (
+        Index("uq_attendance_session_student", "session_id", "student_id", unique=True),
+    )
+
 class Assignment(Base):
     __tablename__ = "assignments"
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     description = Column(String)
-    due_date = Column(DateTime)
+    due_date = Column(DateTime, index=True)
     course_id = Column(Integer, ForeignKey("courses.id"))
 
     course = relationship("Course")
@@ -77,11 +101,50 @@ class Submission(Base):
     assignment_id = Column(Integer, ForeignKey("assignments.id"))
     student_id = Column(Integer, ForeignKey("students.id"))
     submission_date = Column(DateTime)
-    file_path = Column(String) # Path to the stored file
+    file_path = Column(String) # Path to the stored file (a content-addressed blob)
+    sha256 = Column(String(64), nullable=True, index=True) # Hex digest of the file contents
+    size_bytes = Column(Integer, nullable=True)
 
     assignment = relationship("Assignment", back_populates="submissions")
     student = relationship("Student", back_populates="submissions")
 
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True) # Content hash; also names the file on disk
+    size_bytes = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0) # Submissions pointing at this blob
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    id = Column(String(32), primary_key=True) # Random hex token handed to the client
+    assignment_id = Column(Integer, ForeignKey("assignments.id"))
+    student_id = Column(Integer, ForeignKey("students.id"))
+    filename = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    parts = relationship(
+        "UploadPart", back_populates="session", cascade="all, delete-orphan", order_by="UploadPart.part_number"
+    )
+
+class UploadPart(Base):
+    __tablename__ = "upload_parts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    upload_id = Column(String(32), ForeignKey("upload_sessions.id"), nullable=False)
+    part_number = Column(Integer, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    sha256 = Column(String(64), nullable=False)
+
+    session = relationship("UploadSession", back_populates="parts")
+
+    # Re-sending a part replaces it rather than adding a second copy.
+    __table_args__ = (
+        Index("uq_upload_parts_upload_part", "upload_id", "part_number", unique=True),
+    )
+
 class Grade(Base):
     __tablename__ = "grades"
 
@@ -94,6 +157,11 @@ class Grade(Base):
     assignment = relationship("Assignment")
     student = relationship("Student")
 
+    # One grade per student per assignment; also backs the bulk upsert lookup.
+    __table_args__ = (
+        Index("uq_grades_student_assignment", "student_id", "assignment_id", unique=True),
+    )
+
 # --- NEW: MilestoneStatus Enum ---
 class MilestoneStatus(str, enum.Enum):
     PENDING = "pending"
@@ -121,12 +189,53 @@ class Milestone(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     description = Column(String, nullable=True)
-    due_date = Column(Date)
+    due_date = Column(Date, index=True)
     status = Column(Enum(MilestoneStatus), default=MilestoneStatus.PENDING)
     project_id = Column(Integer, ForeignKey("research_projects.id"))
 
     project = relationship("ResearchProject", back_populates="milestones")
 
+class SentReminder(Base):
+    __tablename__ = "reminders_sent"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(16), nullable=False) # "assignment" or "milestone"
+    item_id = Column(Integer, nullable=False)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    due_at = Column(DateTime, nullable=False) # A moved deadline earns a fresh reminder
+    sent_at = Column(DateTime, default=datetime.utcnow)
+
+    # At most one reminder per student per deadline; also the "already sent?" lookup.
+    __table_args__ = (
+        Index("uq_reminders_sent_item_student", "kind", "item_id", "student_id", "due_at", unique=True),
+    )
+
+class EmailStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+class OutboxEmail(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipient = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(String, nullable=False)
+    subtype = Column(String, nullable=False, default="html") # "html" or "plain"
+    status = Column(Enum(EmailStatus), nullable=False, default=EmailStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    claim_token = Column(String(32), nullable=True) # Set by the worker that is sending it
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    # The worker's "what is due" scan.
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
 # --- NEW: AuditLog Model ---
 class AuditLog(Base):
     __tablename__ = "audit_logs"
@@ -134,7 +243,15 @@ class AuditLog(Base):
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime, default=datetime.utcnow)
     action = Column(String, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     details = Column(String, nullable=True)
 
-    user = relationship("User")
\ No newline at end of file
+    user = relationship("User")
+
+    # Serves newest-first listing and (timestamp, id) keyset pagination.
+    # AUTOINCREMENT keeps ids unique after closed months are rotated out
+    # into audit_logs_YYYYMM partitions (see audit_partitions.py).
+    __table_args__ = (
+        Index("ix_audit_logs_timestamp_id", "timestamp", "id"),
+        {"sqlite_autoincrement": True},
+    )
@@ -0,0 +1,355 @@
+# backend/outbox.py
+"""
+Persistent email outbox.
+
+Handlers call `enqueue()` inside their own transaction, so an email is
+only queued if the change that caused it commits. A background worker
+claims due rows in batches, sends them over one reused SMTP connection at
+a bounded rate, and retries transient failures with exponential backoff.
+Delivery is at-least-once: a worker that dies mid-batch leaves its claim
+to expire, and those rows are sent again.
+
+Send everything that is due right now (e.g. from cron when the API runs
+with MAIL_OUTBOX_WORKER_ENABLED=false), from the project root:
+    python -m backend.outbox drain
+"""
+import argparse
+import logging
+import smtplib
+import ssl
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from . import models
+from .config import settings
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionFailed(Exception):
+    """The SMTP server could not be reached or refused the session."""
+
+
+def _is_permanent(error: Exception) -> bool:
+    """5xx replies will not succeed on a retry; 4xx ones (e.g. greylisting) might."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+
+class OutboxWorker:
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        batch_size: int,
+        poll_interval: float,
+        rate_per_second: float,
+        max_attempts: int,
+        retry_base: float,
+        claim_lease: float,
+        idle_disconnect: float,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.min_send_interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.claim_lease = claim_lease
+        self.idle_disconnect = idle_disconnect
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._next_send = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._wake = threading.Event()
+        self._start_lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="outbox-worker", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Stops the background thread after its current batch and closes the connection."""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._disconnect()
+
+    def wake(self):
+        """Skips the rest of the poll interval, e.g. right after new mail is committed."""
+        self._wake.set()
+
+    def drain(self) -> Dict[str, int]:
+        """Sends batches until nothing is due, returning how each email ended up."""
+        stats = {"sent": 0, "retried": 0, "failed": 0}
+        with self._drain_lock:
+            while not self._stopping.is_set():
+                batch_stats = self._process_batch()
+                if batch_stats is None:
+                    break
+                for key, value in batch_stats.items():
+                    stats[key] += value
+        return stats
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("Outbox worker failed to drain the queue")
+            if self._smtp is not None and time.monotonic() - self._last_used > self.idle_disconnect:
+                self._disconnect()
+            self._wake.wait(timeout=self.poll_interval)
+            self._wake.clear()
+
+    # --- Claiming & bookkeeping ---
+    def _process_batch(self) -> Optional[Dict[str, int]]:
+        db = self.session_factory()
+        try:
+            emails = self._claim(db)
+            if not emails:
+                return None
+            results = self._send_all(emails)
+            db.execute(update(models.OutboxEmail), results)
+            db.commit()
+        finally:
+            db.close()
+
+        stats = {"sent": 0, "retried": 0, "failed": 0}
+        for result in results:
+            if result["status"] == models.EmailStatus.SENT:
+                stats["sent"] += 1
+            elif result["status"] == models.EmailStatus.FAILED:
+                stats["failed"] += 1
+            else:
+                stats["retried"] += 1
+        return stats
+
+    def _claim(self, db: Session) -> List[models.OutboxEmail]:
+        """
+        Marks up to `batch_size` due rows as ours in one UPDATE.
+
+        Pushing next_attempt_at past the lease is what stops other workers
+        from picking the same rows; if we die, the rows come due again.
+        """
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        due = (
+            select(models.OutboxEmail.id)
+            .where(
+                models.OutboxEmail.status == models.EmailStatus.PENDING,
+                models.OutboxEmail.next_attempt_at <= now,
+            )
+            .order_by(models.OutboxEmail.next_attempt_at, models.OutboxEmail.id)
+            .limit(self.batch_size)
+        )
+        db.execute(
+            update(models.OutboxEmail)
+            .where(
+                models.OutboxEmail.id.in_(due.scalar_subquery()),
+                models.OutboxEmail.status == models.EmailStatus.PENDING,
+                models.OutboxEmail.next_attempt_at <= now,
+            )
+            .values(claim_token=token, next_attempt_at=now + timedelta(seconds=self.claim_lease))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return (
+            db.query(models.OutboxEmail)
+            .filter(models.OutboxEmail.claim_token == token)
+            .order_by(models.OutboxEmail.id)
+            .all()
+        )
+
+    def _send_all(self, emails: List[models.OutboxEmail]) -> List[dict]:
+        results = []
+        for index, email in enumerate(emails):
+            now = datetime.utcnow()
+            result = {
+                "id": email.id,
+                "status": models.EmailStatus.PENDING,
+                "attempts": email.attempts + 1,
+                "next_attempt_at": now,
+                "claim_token": None,
+                "last_error": None,
+                "sent_at": None,
+            }
+            try:
+                self._deliver(email)
+                result["status"] = models.EmailStatus.SENT
+                result["sent_at"] = now
+            except ConnectionFailed as e:
+                # The server is unreachable: put the rest of the batch back untouched
+                # so an outage does not burn through everyone's attempts
+                result["last_error"] = str(e)
+                result["next_attempt_at"] = now + timedelta(seconds=self.retry_base)
+                results.append(result)
+                for untried in emails[index + 1:]:
+                    results.append({
+                        "id": untried.id,
+                        "status": models.EmailStatus.PENDING,
+                        "attempts": untried.attempts,
+                        "next_attempt_at": result["next_attempt_at"],
+                        "claim_token": None,
+                        "last_error": untried.last_error,
+                        "sent_at": None,
+                    })
+                logger.warning("SMTP connection failed, %d emails put back: %s", len(emails) - index, e)
+                return results
+            except Exception as e:
+                result["last_error"] = str(e)[:500]
+                if _is_permanent(e) or result["attempts"] >= self.max_attempts:
+                    result["status"] = models.EmailStatus.FAILED
+                    logger.error("Giving up on email %d to %s: %s", email.id, email.recipient, e)
+                else:
+                    delay = self.retry_base * 2 ** (result["attempts"] - 1)
+                    result["next_attempt_at"] = now + timedelta(seconds=delay)
+            results.append(result)
+        return results
+
+    # --- SMTP ---
+    def _deliver(self, email: models.OutboxEmail):
+        message = EmailMessage()
+        message["From"] = formataddr((settings.MAIL_FROM_NAME, settings.MAIL_FROM))
+        message["To"] = email.recipient
+        message["Subject"] = email.subject
+        message.set_content(email.body, subtype=email.subtype)
+
+        self._throttle()
+        # A connection the server has since dropped gets one reconnect
+        for attempt in range(2):
+            smtp = self._connection()
+            try:
+                smtp.send_message(message)
+                self._last_used = time.monotonic()
+                return
+            except smtplib.SMTPServerDisconnected as e:
+                self._disconnect()
+                if attempt == 1:
+                    raise ConnectionFailed(str(e)) from e
+            except smtplib.SMTPException:
+                raise  # the server answered (SMTPException is an OSError too)
+            except OSError as e:
+                # A timeout or reset mid-message: the connection is unusable, and
+                # resending now could deliver the message twice
+                self._disconnect(quit=False)
+                raise ConnectionFailed(f"{settings.MAIL_SERVER}:{settings.MAIL_PORT}: {e}") from e
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._smtp is None:
+            try:
+                smtp = smtplib.SMTP(settings.MAIL_SERVER, settings.MAIL_PORT, timeout=settings.MAIL_TIMEOUT_SECONDS)
+                if settings.MAIL_STARTTLS:
+                    smtp.starttls(context=ssl.create_default_context())
+                if settings.MAIL_USE_CREDENTIALS:
+                    smtp.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
+            except (OSError, smtplib.SMTPException) as e:
+                raise ConnectionFailed(f"{settings.MAIL_SERVER}:{settings.MAIL_PORT}: {e}") from e
+            self._smtp = smtp
+        return self._smtp
+
+    def _disconnect(self, quit: bool = True):
+        """Closes the connection; `quit=False` skips the QUIT a broken socket would only time out on."""
+        if self._smtp is not None:
+            try:
+                if quit:
+                    self._smtp.quit()
+                else:
+                    self._smtp.close()
+            except (OSError, smtplib.SMTPException):
+                pass
+            self._smtp = None
+
+    def _throttle(self):
+        if not self.min_send_interval:
+            return
+        now = time.monotonic()
+        if self._next_send > now:
+            time.sleep(self._next_send - now)
+        self._next_send = max(now, self._next_send) + self.min_send_interval
+
+
+outbox_worker = OutboxWorker(
+    session_factory=SessionLocal,
+    batch_size=settings.MAIL_BATCH_SIZE,
+    poll_interval=settings.MAIL_POLL_INTERVAL_SECONDS,
+    rate_per_second=settings.MAIL_RATE_PER_SECOND,
+    max_attempts=settings.MAIL_MAX_ATTEMPTS,
+    retry_base=settings.MAIL_RETRY_BASE_SECONDS,
+    claim_lease=settings.MAIL_CLAIM_LEASE_SECONDS,
+    idle_disconnect=settings.MAIL_IDLE_DISCONNECT_SECONDS,
+)
+
+
+def _wake_worker(session):
+    outbox_worker.wake()
+
+
+def enqueue(
+    db: Session, recipients: Iterable[str], subject: str, body: str, subtype: str = "html"
+) -> List[models.OutboxEmail]:
+    """Adds one outbox row per recipient. The caller commits; the worker is woken when it does."""
+    emails = [
+        models.OutboxEmail(recipient=recipient, subject=subject, body=body, subtype=subtype)
+        for recipient in recipients
+    ]
+    db.add_all(emails)
+    if not event.contains(db, "after_commit", _wake_worker):
+        event.listen(db, "after_commit", _wake_worker)
+    return emails
+
+
+def enqueue_many(db: Session, messages: List[dict]) -> int:
+    """
+    Queues many emails (dicts of recipient/subject/body/subtype) with one
+    multi-row INSERT, for fan-outs too large to build ORM objects for.
+    The caller commits.
+    """
+    if not messages:
+        return 0
+    db.execute(insert(models.OutboxEmail), [{"subtype": "html", **message} for message in messages])
+    if not event.contains(db, "after_commit", _wake_worker):
+        event.listen(db, "after_commit", _wake_worker)
+    return len(messages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("drain", help="send every email that is due, then exit")
+    subparsers.add_parser("status", help="count outbox rows by status")
+    args = parser.parse_args()
+
+    if args.command == "drain":
+        try:
+            stats = outbox_worker.drain()
+        finally:
+            outbox_worker.stop()
+    else:
+        db = SessionLocal()
+        try:
+            rows = db.query(models.OutboxEmail.status, func.count()).group_by(models.OutboxEmail.status).all()
+        finally:
+            db.close()
+        stats = {status.value: count for status, count in rows}
+    print(", ".join(f"{key}={value}" for key, value in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
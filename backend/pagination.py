@@ -0,0 +1,39 @@
+# backend/pagination.py
+import base64
+import json
+from typing import Any, List
+
+from fastapi import HTTPException, Query
+
+MAX_PAGE_SIZE = 1000
+
+
+def page_size(default: int = 100):
+    """Query parameter for a page's `limit`; keyset paging needs at least one row per page."""
+    return Query(default, ge=1, le=MAX_PAGE_SIZE)
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Packs the sort key of the last row on a page into an opaque token."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Unpacks a token from encode_cursor, expecting `size` key values."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def decode_id_cursor(cursor: str) -> int:
+    """Unpacks a token holding the integer id of the last row on a page."""
+    (last_id,) = decode_cursor(cursor, 1)
+    if type(last_id) is not int:  # bool is an int subclass, and a tampered token may hold anything
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return last_id
@@ -0,0 +1,231 @@
+# backend/reminders.py
+"""
+Due-date reminders for assignments and research milestones.
+
+Every REMINDER_INTERVAL_MINUTES the scheduler range-scans the indexed
+due_date columns for items due within the next REMINDER_WINDOW_HOURS and
+queues one email per student through the outbox. Each reminder is first
+recorded in `reminders_sent`, in the same transaction as its email, so a
+rerun (or a second process) skips everyone already reminded.
+
+Run one pass by hand, from the project root:
+    python -m backend.reminders run [--window-hours 24]
+"""
+import argparse
+import logging
+import threading
+from datetime import datetime, time, timedelta
+from html import escape
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import exists, insert, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, sessionmaker
+
+from . import models, outbox
+from .config import settings
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def _chunks(rows: Sequence, size: int):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _record(db: Session, rows: List[dict]) -> Set[Tuple[int, int]]:
+    """
+    Inserts reminder rows of one kind, skipping ones that already exist, and
+    returns the (item_id, student_id) pairs actually inserted; only those get an email.
+    """
+    dialect_insert = {
+        "sqlite": sqlite.insert,
+        "postgresql": postgresql.insert,
+    }.get(db.get_bind().dialect.name)
+
+    if dialect_insert is not None:
+        stmt = (
+            dialect_insert(models.SentReminder)
+            .on_conflict_do_nothing(index_elements=["kind", "item_id", "student_id", "due_at"])
+            .returning(models.SentReminder.item_id, models.SentReminder.student_id)
+        )
+        return {tuple(row) for row in db.execute(stmt, rows)}
+
+    existing = set(
+        db.query(models.SentReminder.item_id, models.SentReminder.student_id).filter(
+            models.SentReminder.kind == rows[0]["kind"],
+            tuple_(models.SentReminder.item_id, models.SentReminder.student_id, models.SentReminder.due_at).in_(
+                [(row["item_id"], row["student_id"], row["due_at"]) for row in rows]
+            ),
+        ).all()
+    )
+    fresh = [row for row in rows if (row["item_id"], row["student_id"]) not in existing]
+    if fresh:
+        db.execute(insert(models.SentReminder), fresh)
+    return {(row["item_id"], row["student_id"]) for row in fresh}
+
+
+def _fan_out(db: Session, pending: List[Tuple[dict, dict]], batch_size: int) -> int:
+    """
+    Records and queues (reminder row, email) pairs, committing once per batch
+    so a crash part-way through loses nothing and sends nothing twice.
+    """
+    sent = 0
+    for chunk in _chunks(pending, batch_size):
+        claimed = _record(db, [row for row, _ in chunk])
+        sent += outbox.enqueue_many(db, [
+            message for row, message in chunk if (row["item_id"], row["student_id"]) in claimed
+        ])
+        db.commit()
+    return sent
+
+
+def _reminder(kind: str, item_id: int, due_at: datetime, student, subject: str, body: str) -> Tuple[dict, dict]:
+    row = {"kind": kind, "item_id": item_id, "student_id": student.id, "due_at": due_at}
+    message = {
+        "recipient": student.email,
+        "subject": subject,
+        "body": f"<p>Hi {escape(student.first_name or '')},</p>{body}",
+    }
+    return row, message
+
+
+def dispatch(
+    db: Session,
+    now: Optional[datetime] = None,
+    window_hours: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Queues reminders for everything due in [now, now + window). Safe to rerun.
+
+    Due dates are naive local times, stored as entered (and exported to .ics
+    as such), so `now` defaults to the local wall clock, not UTC.
+    """
+    now = now or datetime.now()
+    horizon = now + timedelta(hours=window_hours or settings.REMINDER_WINDOW_HOURS)
+    batch_size = batch_size or settings.REMINDER_BATCH_SIZE
+    stats = {"assignments": 0, "milestones": 0, "reminders": 0}
+
+    # 1. Assignments due in the window (range scan on ix_assignments_due_date)
+    assignments = db.query(
+        models.Assignment.id, models.Assignment.title, models.Assignment.due_date, models.Assignment.course_id,
+        models.Course.code,
+    ).outerjoin(models.Course, models.Course.id == models.Assignment.course_id).filter(
+        models.Assignment.due_date >= now, models.Assignment.due_date < horizon
+    ).order_by(models.Assignment.due_date).all()
+
+    for assignment in assignments:
+        stats["assignments"] += 1
+        # The enrolled students not reminded about this deadline yet, in one query
+        already = exists().where(
+            models.SentReminder.kind == "assignment",
+            models.SentReminder.item_id == assignment.id,
+            models.SentReminder.student_id == models.Student.id,
+            models.SentReminder.due_at == assignment.due_date,
+        )
+        recipients = db.query(models.Student.id, models.Student.email, models.Student.first_name).join(
+            models.Enrollment, models.Enrollment.student_id == models.Student.id
+        ).filter(
+            models.Enrollment.course_id == assignment.course_id, models.Student.email.isnot(None), ~already
+        ).order_by(models.Student.id).all()
+
+        label = f"{assignment.code}: {assignment.title}" if assignment.code else assignment.title
+        due = assignment.due_date.strftime("%a %d %b %H:%M")
+        subject = f"Reminder: {label} is due {due}"
+        body = f"<p><b>{escape(label)}</b> is due on {due}.</p>"
+        stats["reminders"] += _fan_out(db, [
+            _reminder("assignment", assignment.id, assignment.due_date, student, subject, body)
+            for student in recipients
+        ], batch_size)
+
+    # 2. Milestones due in the window (range scan on ix_milestones_due_date); each has a single student
+    milestones = db.query(
+        models.Milestone.id.label("milestone_id"), models.Milestone.title, models.Milestone.due_date,
+        models.ResearchProject.title.label("project_title"),
+        models.Student.id, models.Student.email, models.Student.first_name,
+    ).join(
+        models.ResearchProject, models.ResearchProject.id == models.Milestone.project_id
+    ).join(
+        models.Student, models.Student.id == models.ResearchProject.student_id
+    ).filter(
+        models.Milestone.due_date >= now.date(),
+        models.Milestone.due_date < horizon.date() + timedelta(days=1),
+        models.Milestone.status != models.MilestoneStatus.COMPLETED,
+        models.Student.email.isnot(None),
+    ).order_by(models.Milestone.due_date).all()
+
+    pending = []
+    for milestone in milestones:
+        label = f"{milestone.project_title}: {milestone.title}"
+        due = milestone.due_date.strftime("%a %d %b")
+        pending.append(_reminder(
+            "milestone", milestone.milestone_id, datetime.combine(milestone.due_date, time()), milestone,
+            subject=f"Reminder: {label} is due {due}",
+            body=f"<p>Your milestone <b>{escape(label)}</b> is due on {due}.</p>",
+        ))
+    stats["milestones"] = len(milestones)
+    stats["reminders"] += _fan_out(db, pending, batch_size)
+
+    return stats
+
+
+class ReminderScheduler:
+    """Runs `dispatch` on a fixed interval in a daemon thread."""
+
+    def __init__(self, session_factory: sessionmaker, interval_minutes: float):
+        self.session_factory = session_factory
+        self.interval = interval_minutes * 60
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopping.is_set():
+            db = self.session_factory()
+            try:
+                stats = dispatch(db)
+                if stats["reminders"]:
+                    logger.info("Queued %d due-date reminders", stats["reminders"])
+            except Exception:
+                logger.exception("Reminder dispatch failed")
+            finally:
+                db.close()
+            self._stopping.wait(timeout=self.interval)
+
+
+reminder_scheduler = ReminderScheduler(
+    session_factory=SessionLocal,
+    interval_minutes=settings.REMINDER_INTERVAL_MINUTES,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="queue reminders for everything due in the window, then exit")
+    run_parser.add_argument("--window-hours", type=int, default=None)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        stats = dispatch(db, window_hours=args.window_hours)
+    finally:
+        db.close()
+    print(", ".join(f"{key}={value}" for key, value in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
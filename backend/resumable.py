@@ -0,0 +1,148 @@
+# backend/resumable.py
+"""
+Resumable multipart uploads for large submissions.
+
+Parts are staged on disk under UPLOAD_DIR/sessions/<upload_id>/ as they
+arrive, each checked against its SHA-256, and are stitched into the blob
+store in a streaming pass when the client completes the session.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from . import models, storage
+from .config import settings
+
+
+def session_dir(upload_id: str) -> Path:
+    return Path(settings.UPLOAD_DIR) / "sessions" / upload_id
+
+
+def part_path(upload_id: str, part_number: int) -> Path:
+    return session_dir(upload_id) / f"{part_number:05d}.part"
+
+
+async def receive_part(
+    request: Request, upload_id: str, expected_sha256: Optional[str], max_bytes: int
+) -> Tuple[int, str, str]:
+    """
+    Streams one part's request body to a temp file and returns (size_bytes, sha256, temp_path).
+
+    Rejects parts over MAX_UPLOAD_PART_BYTES or `max_bytes` (what is left of
+    the session's budget) as they arrive, and parts whose digest does not
+    match `expected_sha256`. The temp file only replaces an earlier attempt
+    at the part once the caller has recorded it, via `keep_part`.
+    """
+    directory = session_dir(upload_id)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > settings.MAX_UPLOAD_PART_BYTES:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                        detail=f"Part exceeds the {settings.MAX_UPLOAD_PART_BYTES} byte limit",
+                    )
+                if size > max_bytes:
+                    raise upload_too_large()
+                digest.update(chunk)
+                await run_in_threadpool(buffer.write, chunk)
+
+        sha256 = digest.hexdigest()
+        if expected_sha256 and expected_sha256.lower() != sha256:
+            raise HTTPException(status_code=400, detail="Part checksum mismatch")
+    except BaseException:
+        drop_part(temp_path)
+        raise
+
+    return size, sha256, temp_path
+
+
+def upload_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+        detail=f"Upload exceeds the {settings.MAX_RESUMABLE_UPLOAD_BYTES} byte limit",
+    )
+
+
+def keep_part(temp_path: str, upload_id: str, part_number: int) -> None:
+    """Moves a recorded part into place, replacing any earlier attempt."""
+    os.replace(temp_path, part_path(upload_id, part_number))
+
+
+def drop_part(temp_path: str) -> None:
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+
+def assemble(upload_id: str, parts: List[models.UploadPart]) -> storage.StoredFile:
+    """
+    Concatenates the staged parts into the blob store, chunk by chunk.
+
+    Parts must be numbered 1..N without gaps. Each part is re-hashed on the
+    way through so disk corruption since upload is caught, and the whole
+    file's digest is computed in the same pass.
+    """
+    numbers = [part.part_number for part in parts]
+    if not parts or numbers != list(range(1, len(parts) + 1)):
+        raise HTTPException(status_code=400, detail="Parts must be numbered 1..N without gaps")
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = storage.temp_file()
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            for part in parts:
+                part_digest = hashlib.sha256()
+                try:
+                    source = open(part_path(upload_id, part.part_number), "rb")
+                except FileNotFoundError:
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail=f"Part {part.part_number} is missing, please upload it again",
+                    )
+                with source:
+                    while chunk := source.read(settings.UPLOAD_CHUNK_BYTES):
+                        part_digest.update(chunk)
+                        digest.update(chunk)
+                        buffer.write(chunk)
+                        size += len(chunk)
+                if part_digest.hexdigest() != part.sha256:
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail=f"Part {part.part_number} is corrupt, please upload it again",
+                    )
+
+        return storage.commit_blob(temp_path, digest.hexdigest(), size)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def discard(upload_id: str) -> None:
+    shutil.rmtree(session_dir(upload_id), ignore_errors=True)
+
+
+def expire_sessions(db: Session) -> int:
+    """Deletes sessions older than UPLOAD_SESSION_TTL_HOURS along with their parts."""
+    cutoff = datetime.utcnow() - timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+    expired = db.query(models.UploadSession).filter(models.UploadSession.created_at < cutoff).all()
+    for upload_session in expired:
+        db.delete(upload_session)
+        discard(upload_session.id)
+    db.commit()
+    return len(expired)
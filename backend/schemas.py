@@ -21,6 +21,11 @@ class Student(StudentBase):
     id: int
     model_config = ConfigDict(from_attributes=True)
 
+# Page of students returned in cursor mode
+class StudentPage(BaseModel):
+    items: List[Student]
+    next_cursor: Optional[str] = None
+
 # Schema for creating a user
 class UserCreate(BaseModel):
     email: EmailStr
@@ -51,6 +56,35 @@ class Course(CourseBase):
     class Config:
         from_attributes = True
 
+class CoursePage(BaseModel):
+    items: List[Course]
+    next_cursor: Optional[str] = None
+
+# --- ENROLLMENT SCHEMAS ---
+class EnrollmentCreate(BaseModel):
+    student_id: int
+
+class Enrollment(BaseModel):
+    id: int
+    course_id: int
+    student_id: int
+    enrolled_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+class BulkEnrollment(BaseModel):
+    student_ids: List[int]
+
+class BulkEnrollmentResult(BaseModel):
+    detail: str
+    enrolled: int
+    already_enrolled: int
+    unknown_student_ids: List[int]
+
+# One row of an enrollments CSV import
+class EnrollmentImport(EnrollmentCreate):
+    course_id: int
+
 # --- SESSION SCHEMAS ---
 class SessionBase(BaseModel):
     date: date
@@ -113,6 +147,8 @@ class Submission(BaseModel):
     student_id: int
     submission_date: datetime
     file_path: str
+    sha256: Optional[str] = None
+    size_bytes: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -121,6 +157,28 @@ class Submission(BaseModel):
 class SubmissionDetail(Submission): 
     student: Student 
 
+# --- RESUMABLE UPLOAD SCHEMAS ---
+class UploadSessionCreate(BaseModel):
+    student_id: int
+    filename: Optional[str] = None
+
+class UploadPart(BaseModel):
+    part_number: int
+    size_bytes: int
+    sha256: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+class UploadSession(BaseModel):
+    id: str
+    assignment_id: int
+    student_id: int
+    filename: Optional[str] = None
+    created_at: datetime
+    parts: List[UploadPart]
+
+    model_config = ConfigDict(from_attributes=True)
+
 # --- GRADE SCHEMAS ---
 class GradeBase(BaseModel):
     assignment_id: int
@@ -140,12 +198,50 @@ class Grade(GradeBase):
 class BulkGradeUpdate(BaseModel):
     grades: List[GradeCreate]
 
+# --- Schema for reporting how much work a bulk upsert did ---
+class BulkUpsertResult(BaseModel):
+    detail: str
+    inserted: int
+    updated: int
+    unchanged: int
+
+# --- Schemas for reporting on a bulk CSV import ---
+class ImportRowError(BaseModel):
+    row: int  # line number in the file, the header being line 1
+    errors: List[str]
+
+class ImportResult(BaseModel):
+    detail: str
+    rows: int
+    inserted: int
+    updated: int
+    skipped: int  # already stored, left as they are
+    failed: int
+    errors: List[ImportRowError]  # at most IMPORT_MAX_REPORTED_ERRORS of them
+
+# --- Signed calendar subscription link ---
+class CalendarLink(BaseModel):
+    url: str
+
 # --- Schema for the complete gradebook response ---
 class Gradebook(BaseModel):
     students: List[Student]
     assignments: List[Assignment]
     grades: List[Grade]
 
+# --- Schemas for the compact matrix gradebook response ---
+class ScoreStats(BaseModel):
+    mean: List[Optional[float]]
+    median: List[Optional[float]]
+    stddev: List[Optional[float]]
+
+class GradebookMatrix(BaseModel):
+    student_ids: List[int]
+    assignment_ids: List[int]
+    scores: List[List[Optional[float]]]  # scores[i][j] is student i on assignment j
+    assignment_stats: ScoreStats
+    student_stats: ScoreStats
+
 # --- RESEARCH PROJECT SCHEMAS ---
 class ResearchProjectBase(BaseModel):
     title: str
@@ -185,4 +281,8 @@ class AuditLog(BaseModel):
     user_id: int
     details: Optional[str] = None
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class AuditLogPage(BaseModel):
+    items: List[AuditLog]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,264 @@
+# backend/storage.py
+"""
+Content-addressed storage for submission files.
+
+Each distinct file is stored once under UPLOAD_DIR/blobs/ab/cd/<sha256>,
+with a `blobs` row counting how many submissions point at it.
+
+Garbage-collect unreferenced blobs and expired upload sessions, from the project root:
+    python -m backend.storage gc [--grace-minutes 60] [--dry-run]
+Move files uploaded before the blob store into it:
+    python -m backend.storage import-legacy
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy import func, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from . import models
+from .config import settings
+from .database import SessionLocal
+
+# Allowance for multipart boundaries, headers and the other form fields
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+BLOB_DIRNAME = "blobs"
+
+
+@dataclass
+class StoredFile:
+    path: str
+    sha256: str
+    size_bytes: int
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+        detail=f"File exceeds the {settings.MAX_UPLOAD_BYTES} byte upload limit",
+    )
+
+
+# --- Blob layout ---
+def blob_root() -> Path:
+    return Path(settings.UPLOAD_DIR) / BLOB_DIRNAME
+
+
+def blob_path(sha256: str) -> Path:
+    """Two levels of fan-out keep any one directory small."""
+    return blob_root() / sha256[:2] / sha256[2:4] / sha256
+
+
+def temp_file() -> Tuple[int, str]:
+    """Opens a temp file next to the blobs, so moving it into place is an atomic rename."""
+    root = blob_root()
+    root.mkdir(parents=True, exist_ok=True)
+    return tempfile.mkstemp(dir=root, prefix=".upload-", suffix=".part")
+
+
+def commit_blob(temp_path: str, sha256: str, size_bytes: int) -> StoredFile:
+    """
+    Moves a fully written temp file into the store.
+
+    If the same content is already stored the temp file is discarded and the
+    existing blob is touched, which restarts its GC grace period.
+    """
+    path = blob_path(sha256)
+    if path.exists():
+        os.remove(temp_path)
+        os.utime(path)
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(temp_path, path)
+    return StoredFile(path=path.as_posix(), sha256=sha256, size_bytes=size_bytes)
+
+
+async def save_upload(upload: UploadFile) -> StoredFile:
+    """
+    Streams an upload into the blob store in fixed-size chunks.
+
+    The SHA-256 and byte count are computed as the data goes by, the file is
+    written to a temp name and atomically renamed once complete, and the
+    upload is aborted as soon as it passes MAX_UPLOAD_BYTES.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = temp_file()
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while chunk := await upload.read(settings.UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > settings.MAX_UPLOAD_BYTES:
+                    raise _too_large()
+                digest.update(chunk)
+                await run_in_threadpool(buffer.write, chunk)
+
+        return commit_blob(temp_path, digest.hexdigest(), size)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def add_reference(db: Session, stored: StoredFile) -> None:
+    """Creates the blob row or bumps its reference count. The caller commits."""
+    dialect_insert = {
+        "sqlite": sqlite.insert,
+        "postgresql": postgresql.insert,
+    }.get(db.get_bind().dialect.name)
+
+    if dialect_insert is not None:
+        stmt = dialect_insert(models.Blob).values(
+            sha256=stored.sha256, size_bytes=stored.size_bytes, ref_count=1
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["sha256"],
+            set_={"ref_count": models.Blob.ref_count + 1},
+        )
+        db.execute(stmt)
+        return
+
+    blob = db.get(models.Blob, stored.sha256)
+    if blob is None:
+        db.add(models.Blob(sha256=stored.sha256, size_bytes=stored.size_bytes, ref_count=1))
+    else:
+        blob.ref_count = models.Blob.ref_count + 1
+
+
+def exceeds_upload_limit(content_length: Optional[str]) -> bool:
+    """True when a request declares a body too large to hold an acceptable upload."""
+    if not content_length or not content_length.isdigit():
+        return False
+    return int(content_length) > settings.MAX_UPLOAD_BYTES + FORM_OVERHEAD_BYTES
+
+
+# --- Maintenance ---
+def collect_garbage(db: Session, grace_seconds: float = 3600, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Recounts references from `submissions` and deletes unreferenced blobs.
+
+    Blobs and stray files touched within the grace period are kept, so an
+    upload that has written its file but not yet committed its row is safe.
+    """
+    stats = {"recounted": 0, "deleted_blobs": 0, "deleted_files": 0, "freed_bytes": 0}
+    cutoff = time.time() - grace_seconds
+
+    # 1. Recount references from the submissions that actually exist
+    counts = dict(
+        db.query(models.Submission.sha256, func.count())
+        .filter(models.Submission.sha256.isnot(None))
+        .group_by(models.Submission.sha256)
+        .all()
+    )
+    blobs = {blob.sha256: blob for blob in db.query(models.Blob)}
+    changed = [
+        {"sha256": sha256, "ref_count": counts.get(sha256, 0)}
+        for sha256, blob in blobs.items()
+        if blob.ref_count != counts.get(sha256, 0)
+    ]
+    stats["recounted"] = len(changed)
+    if changed and not dry_run:
+        db.execute(update(models.Blob), changed)
+
+    # 2. Delete blobs nobody references once they are past the grace period
+    for sha256, blob in blobs.items():
+        if counts.get(sha256, 0):
+            continue
+        path = blob_path(sha256)
+        if path.exists() and path.stat().st_mtime > cutoff:
+            continue
+        stats["deleted_blobs"] += 1
+        stats["freed_bytes"] += blob.size_bytes or 0
+        if not dry_run:
+            db.delete(blob)
+            if path.exists():
+                path.unlink()
+
+    # 3. Remove files with no row at all (e.g. crashed uploads, leftover temp parts)
+    root = blob_root()
+    if root.exists():
+        for path in root.rglob("*"):
+            if not path.is_file() or path.name in blobs or path.stat().st_mtime > cutoff:
+                continue
+            stats["deleted_files"] += 1
+            stats["freed_bytes"] += path.stat().st_size
+            if not dry_run:
+                path.unlink()
+
+    if not dry_run:
+        db.commit()
+    return stats
+
+
+def import_legacy(db: Session) -> Dict[str, int]:
+    """Moves submission files stored outside the blob store into it."""
+    stats = {"imported": 0, "missing": 0}
+    legacy = db.query(models.Submission).filter(
+        ~models.Submission.file_path.startswith(blob_root().as_posix())
+    ).all()
+
+    for submission in legacy:
+        source = Path(submission.file_path or "")
+        if not source.is_file():
+            stats["missing"] += 1
+            continue
+
+        # Copy rather than move, so the original stays put until the row points elsewhere
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = temp_file()
+        with os.fdopen(fd, "wb") as buffer, open(source, "rb") as original:
+            while chunk := original.read(settings.UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                digest.update(chunk)
+                buffer.write(chunk)
+        stored = commit_blob(temp_path, digest.hexdigest(), size)
+
+        add_reference(db, stored)
+        submission.file_path = stored.path
+        submission.sha256 = stored.sha256
+        submission.size_bytes = stored.size_bytes
+        db.commit()
+        source.unlink()
+        stats["imported"] += 1
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    gc_parser = subparsers.add_parser("gc", help="delete unreferenced blobs")
+    gc_parser.add_argument("--grace-minutes", type=float, default=60)
+    gc_parser.add_argument("--dry-run", action="store_true")
+    subparsers.add_parser("import-legacy", help="move pre-blob-store uploads into the store")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "gc":
+            stats = collect_garbage(db, grace_seconds=args.grace_minutes * 60, dry_run=args.dry_run)
+            if not args.dry_run:
+                # Imported here because resumable builds on this module
+                from .resumable import expire_sessions
+
+                stats["expired_upload_sessions"] = expire_sessions(db)
+        else:
+            stats = import_legacy(db)
+    finally:
+        db.close()
+    print(", ".join(f"{key}={value}" for key, value in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,16 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from backend.main import app
-from backend.database import Base, get_db
+from backend.audit import audit_writer
+from backend.auth import principal_cache
+from backend.calendars import feed_cache
+from backend.database import Base, get_async_db, get_db, get_write_db
+from backend.instrumentation import instrument
 
 # Use an in-memory SQLite database for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -14,15 +20,23 @@ engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# TestClient runs each request on a fresh event loop, so async connections are not pooled
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+instrument(engine)
+instrument(async_engine.sync_engine)
 
 # Fixture to set up and tear down the database for each test
 @pytest.fixture()
 def db_session():
     Base.metadata.create_all(bind=engine)
+    principal_cache.clear()
+    feed_cache.clear()
     db = TestingSessionLocal()
     try:
         yield db
     finally:
+        audit_writer.flush()
         db.close()
         Base.metadata.drop_all(bind=engine)
 
@@ -37,7 +51,24 @@ def test_client(db_session):
             db_session.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_write_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     client = TestClient(app)
     yield client
     # Clean up the override after the test
-    app.dependency_overrides.clear()
\ No newline at end of file
+    app.dependency_overrides.clear()
+
+# Fixture to provide auth headers for a freshly registered user
+@pytest.fixture()
+def auth_headers(test_client):
+    user_data = {"email": "test@example.com", "password": "testpassword"}
+    test_client.post("/users/", json=user_data)
+
+    login_data = {"username": user_data["email"], "password": user_data["password"]}
+    login_response = test_client.post("/token", data=login_data)
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,48 @@
+import anyio
+import httpx
+
+from backend.main import app
+
+
+def test_async_endpoints_do_not_wait_for_the_threadpool(test_client, auth_headers):
+    student_ids = [
+        test_client.post("/students/", json={"first_name": f"S{i}", "last_name": "T", "email": f"s{i}@example.com"}, headers=auth_headers).json()["id"]
+        for i in range(3)
+    ]
+    course_id = test_client.post("/courses/", json={"title": "Databases", "code": "CS340"}, headers=auth_headers).json()["id"]
+    session_id = test_client.post(f"/courses/{course_id}/sessions/", json={"date": "2026-10-19", "topic": "Indexes"}, headers=auth_headers).json()["id"]
+    for student_id in student_ids:
+        test_client.post(f"/courses/{course_id}/enrollments/", json={"student_id": student_id}, headers=auth_headers)
+
+    async def scenario():
+        results = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=auth_headers) as client:
+            # Take every threadpool thread: anything that needs one now waits
+            limiter = anyio.to_thread.current_default_thread_limiter()
+            limiter.total_tokens = 1
+            async with limiter:
+                # 1. Many more concurrent requests than threads, reads and writes, all complete
+                async def fetch(path, index):
+                    results[index] = await client.get(path)
+
+                with anyio.fail_after(10):
+                    async with anyio.create_task_group() as tasks:
+                        for index in range(50):
+                            path = ["/students/", f"/sessions/{session_id}/attendance/", f"/courses/{course_id}/gradebook/"][index % 3]
+                            tasks.start_soon(fetch, path, index)
+                    attendance = [{"student_id": student_id, "status": "present"} for student_id in student_ids]
+                    results["post"] = await client.post(f"/sessions/{session_id}/attendance/", json={"attendances": attendance})
+
+                # 2. A sync endpoint cannot run until a thread frees up
+                with anyio.move_on_after(0.5) as scope:
+                    await client.get(f"/students/{student_ids[0]}/projects/")
+                results["sync_blocked"] = scope.cancelled_caught
+        return results
+
+    results = anyio.run(scenario)
+    assert all(response.status_code == 200 for key, response in results.items() if key != "sync_blocked")
+    assert len(results[0].json()) == 3  # /students/
+    assert results["sync_blocked"]
+    statuses = [row["status"] for row in test_client.get(f"/sessions/{session_id}/attendance/", headers=auth_headers).json()]
+    assert statuses == ["present"] * 3
@@ -0,0 +1,28 @@
+def test_attendance_upsert_replaces_status(test_client, auth_headers):
+    # 1. Create a course, a session and an enrolled student
+    course = test_client.post(
+        "/courses/", json={"title": "Databases", "code": "CS340"}, headers=auth_headers
+    ).json()
+    session = test_client.post(
+        f"/courses/{course['id']}/sessions/",
+        json={"date": "2025-10-05", "topic": "Indexes"},
+        headers=auth_headers,
+    ).json()
+    student = test_client.post(
+        "/students/",
+        json={"first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.com"},
+        headers=auth_headers,
+    ).json()
+    test_client.post(
+        f"/courses/{course['id']}/enrollments/", json={"student_id": student["id"]}, headers=auth_headers
+    )
+
+    # 2. Mark the student twice; the second save overwrites the first
+    for status in ("absent", "late"):
+        payload = {"attendances": [{"student_id": student["id"], "status": status}]}
+        response = test_client.post(f"/sessions/{session['id']}/attendance/", json=payload, headers=auth_headers)
+        assert response.status_code == 200
+
+    # 3. Only one record exists, with the latest status
+    roster = test_client.get(f"/sessions/{session['id']}/attendance/", headers=auth_headers).json()
+    assert [entry["status"] for entry in roster if entry["student"]["id"] == student["id"]] == ["late"]
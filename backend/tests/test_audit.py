@@ -0,0 +1,159 @@
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import anyio
+from sqlalchemy import create_engine, insert, text
+
+from backend import audit, audit_partitions, models
+from backend.config import settings
+from backend.database import Base
+
+
+def test_mutations_are_audited_in_batches(test_client, auth_headers):
+    # 1. Create, update and delete a student
+    student = test_client.post(
+        "/students/",
+        json={"first_name": "Grace", "last_name": "Hopper", "email": "grace@example.com"},
+        headers=auth_headers,
+    ).json()
+    test_client.put(
+        f"/students/{student['id']}",
+        json={"first_name": "Grace", "last_name": "Hopper", "email": "ghopper@example.com"},
+        headers=auth_headers,
+    )
+    test_client.delete(f"/students/{student['id']}", headers=auth_headers)
+
+    # 2. Reading the log flushes the queue, so every mutation shows up newest first
+    logs = test_client.get("/audit-logs/", headers=auth_headers).json()
+    assert [log["action"] for log in logs] == ["DELETE_STUDENT", "UPDATE_STUDENT", "CREATE_STUDENT", "CREATE_USER"]
+
+
+def test_monthly_partitions_rotate_archive_and_search(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(settings, "AUDIT_ONLINE_MONTHS", 1)
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    Base.metadata.create_all(bind=engine)
+
+    # 1. Three months of history in the hot table
+    with engine.begin() as connection:
+        connection.execute(insert(models.AuditLog), [
+            {"timestamp": datetime(2025, 8, 10), "action": "CREATE_STUDENT", "user_id": 1},
+            {"timestamp": datetime(2025, 9, 10), "action": "DELETE_STUDENT", "user_id": 2},
+            {"timestamp": datetime(2025, 10, 10), "action": "CREATE_COURSE", "user_id": 1},
+        ])
+
+    # 2. Maintenance in October keeps September online and archives August
+    stats = audit_partitions.maintain(engine, now=datetime(2025, 10, 15))
+    assert stats["rotated"] == ["audit_logs_202508", "audit_logs_202509"]
+    assert stats["archived"] == ["audit_logs_202508"]
+    assert audit_partitions.online_months(engine) == [(2025, 9)]
+
+    # 3. Recent queries walk the hot table, then online months; the view sees both
+    logs = audit_partitions.query_recent(engine, limit=10)
+    assert [log["action"] for log in logs] == ["CREATE_COURSE", "DELETE_STUDENT"]
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT COUNT(*) FROM audit_logs_all")).scalar() == 2
+    # Offset pages are cut by the database across both
+    page = audit_partitions.query_recent(engine, limit=1, skip=1)
+    assert [(log["action"], log["timestamp"]) for log in page] == [("DELETE_STUDENT", datetime(2025, 9, 10))]
+    assert audit_partitions.query_recent(engine, limit=5, skip=2) == []
+    assert [log["action"] for log in audit_partitions.query_recent(engine, limit=5, skip=1, user_id=1)] == []
+
+    # 4. Archived months stay searchable by action and user
+    archived = audit_partitions.search_archives(action="CREATE_STUDENT", user_id=1)
+    assert [log["timestamp"] for log in archived] == [datetime(2025, 8, 10)]
+
+    # 5. A late entry for an archived month is archived again without losing the first archive
+    with engine.begin() as connection:
+        connection.execute(insert(models.AuditLog), [
+            {"timestamp": datetime(2025, 8, 20), "action": "CREATE_STUDENT", "user_id": 1},
+        ])
+    stats = audit_partitions.maintain(engine, now=datetime(2025, 10, 16))
+    assert stats["archived"] == ["audit_logs_202508"]
+    archived = audit_partitions.search_archives(action="CREATE_STUDENT", user_id=1)
+    assert [log["timestamp"] for log in archived] == [datetime(2025, 8, 20), datetime(2025, 8, 10)]
+
+
+def test_online_months_are_cached_until_maintenance(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(models.AuditLog), [{"timestamp": datetime(2025, 8, 10), "action": "A", "user_id": 1}])
+
+    # 1. Count schema lookups
+    inspections = []
+    real_inspect = audit_partitions.inspect
+    monkeypatch.setattr(audit_partitions, "inspect", lambda bind: inspections.append(bind) or real_inspect(bind))
+
+    # 2. Repeated reads inspect the schema once; rotating refreshes the list
+    for _ in range(3):
+        audit_partitions.query_recent(engine, limit=10)
+    assert len(inspections) == 1
+    audit_partitions.rotate(engine, now=datetime(2025, 9, 1))
+    assert audit_partitions.online_months(engine) == [(2025, 8)]
+    assert [log["action"] for log in audit_partitions.query_recent(engine, limit=10)] == ["A"]
+
+
+def make_writer(tmp_path, **options):
+    bind = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    Base.metadata.create_all(bind, tables=[models.AuditLog.__table__])
+    defaults = {"batch_size": 50, "flush_interval": 0.2, "max_queue": 100, "enqueue_timeout": 0.2, "flush_timeout": 5.0}
+    writer = audit.AuditWriter(**{**defaults, **options})
+    db = SimpleNamespace(get_bind=lambda: bind)
+    return writer, db, bind
+
+
+def test_flush_returns_while_entries_keep_arriving(tmp_path):
+    # 1. Another thread records without pause
+    writer, db, bind = make_writer(tmp_path)
+    stop = threading.Event()
+
+    def busy():
+        while not stop.is_set():
+            writer.record(db, None, "BUSY")
+
+    producer = threading.Thread(target=busy)
+    producer.start()
+    writer.record(db, None, "BEFORE_FLUSH")
+
+    # 2. The flush still returns, with what was queued before it written
+    started = time.monotonic()
+    writer.flush()
+    elapsed = time.monotonic() - started
+    stop.set()
+    producer.join()
+    writer.stop()
+    assert elapsed < 2
+    with bind.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM audit_logs WHERE action = 'BEFORE_FLUSH'")).scalar() == 1
+    bind.dispose()
+
+
+def test_async_record_waits_for_room_off_the_event_loop(tmp_path, monkeypatch):
+    # 1. A full queue that nobody drains
+    writer, db, bind = make_writer(tmp_path, max_queue=1, enqueue_timeout=0.3)
+    monkeypatch.setattr(writer, "start", lambda: None)
+    writer.record(db, None, "QUEUED")
+
+    # 2. The loop keeps running while the entry waits, then it is written inline
+    async def main():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await anyio.sleep(0.01)
+
+        async with anyio.create_task_group() as tasks:
+            tasks.start_soon(tick)
+            await writer.record_async(db, None, "INLINE")
+            tasks.cancel_scope.cancel()
+        return ticks
+
+    assert anyio.run(main) > 10
+    with bind.connect() as connection:
+        assert connection.execute(text("SELECT action FROM audit_logs")).scalars().all() == ["INLINE"]
+    bind.dispose()
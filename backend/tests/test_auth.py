@@ -1,5 +1,9 @@
 # backend/tests/test_auth.py
+from passlib.context import CryptContext
+
+from backend import models
 from backend.auth import get_password_hash, verify_password
+from backend.config import settings
 
 def test_password_hashing():
     password = "mysecretpassword"
@@ -14,4 +18,31 @@ def test_password_hashing():
     assert verify_password(password, hashed_password) == True
 
     # Verify that an incorrect password fails
-    assert verify_password("wrongpassword", hashed_password) == False
\ No newline at end of file
+    assert verify_password("wrongpassword", hashed_password) == False
+
+def test_principal_cache_serves_repeat_requests(test_client, auth_headers):
+    before = test_client.get("/auth/cache-stats", headers=auth_headers).json()
+
+    # Repeat requests with the same token are served from the cache
+    for _ in range(3):
+        assert test_client.get("/students/", headers=auth_headers).status_code == 200
+
+    after = test_client.get("/auth/cache-stats", headers=auth_headers).json()
+    assert after["hits"] - before["hits"] == 4
+    assert after["misses"] == before["misses"]
+
+
+def test_login_rehashes_outdated_bcrypt_rounds(test_client, db_session):
+    # 1. Store a user whose hash was made with a cheaper cost factor
+    weak_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+    db_session.add(models.User(email="old@example.com", hashed_password=weak_context.hash("oldpassword")))
+    db_session.commit()
+
+    # 2. Logging in succeeds and upgrades the stored hash
+    response = test_client.post("/token", data={"username": "old@example.com", "password": "oldpassword"})
+    assert response.status_code == 200
+
+    user = db_session.query(models.User).filter(models.User.email == "old@example.com").first()
+    db_session.refresh(user)
+    assert user.hashed_password.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    assert verify_password("oldpassword", user.hashed_password)
@@ -0,0 +1,159 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import backup
+
+
+def make_database(path, rows=2000, journal_mode="delete"):
+    connection = sqlite3.connect(path)
+    connection.execute(f"PRAGMA journal_mode={journal_mode}")
+    connection.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT)")
+    connection.executemany("INSERT INTO notes (body) VALUES (?)", [("x" * 200,) for _ in range(rows)])
+    connection.commit()
+    return connection
+
+
+def test_online_backup_is_consistent_and_compressed(tmp_path):
+    source = tmp_path / "sis.db"
+    live = make_database(source)
+
+    # An open writer connection must not stop the backup
+    live.execute("INSERT INTO notes (body) VALUES ('late')")
+    live.commit()
+
+    result = backup.create_backup(source, tmp_path / "backups", compression="gzip", pages_per_step=8, step_sleep=0)
+    live.close()
+    assert result is not None and result.name.endswith(".db.gz")
+
+    restored = backup.decompress(result, tmp_path / "restored.db")
+    assert backup.verify(restored)
+    connection = sqlite3.connect(restored)
+    assert connection.execute("SELECT COUNT(*) FROM notes").fetchone()[0] == 2001
+    connection.close()
+
+
+def test_retention_keeps_newest_daily_and_weekly(tmp_path):
+    backups_dir = tmp_path / "backups"
+    backups_dir.mkdir()
+    start = datetime(2026, 10, 18, 2, 0, 0)
+    for day in range(30):
+        for hour in (0, 1):
+            taken = start - timedelta(days=day, hours=hour)
+            (backups_dir / f"sis-backup-{taken.strftime(backup.TIMESTAMP_FORMAT)}.db").touch()
+    (backups_dir / "unrelated.txt").touch()
+    # Another run's copy in progress, older than anything kept
+    in_progress = backups_dir / f"sis-backup-{(start - timedelta(days=40)).strftime(backup.TIMESTAMP_FORMAT)}.db.partial"
+    in_progress.touch()
+
+    removed = backup.apply_retention(backups_dir, "sis", keep_daily=3, keep_weekly=2)
+
+    kept = sorted(p.name for p in backups_dir.iterdir() if p.name.startswith("sis-backup-") and p != in_progress)
+    assert len(removed) == 60 - len(kept)
+    # 3 newest days, plus the newest backup of the previous ISO week
+    assert kept == [
+        "sis-backup-2026-10-11_02-00-00.db",
+        "sis-backup-2026-10-16_02-00-00.db",
+        "sis-backup-2026-10-17_02-00-00.db",
+        "sis-backup-2026-10-18_02-00-00.db",
+    ]
+    assert (backups_dir / "unrelated.txt").exists() and in_progress.exists()
+
+
+def test_backup_of_a_wal_database_leaves_no_side_files(tmp_path):
+    # 1. The app's database runs in WAL mode, with a writer connected
+    source = tmp_path / "sis.db"
+    live = make_database(source, journal_mode="wal")
+    backups_dir = tmp_path / "backups"
+    backups_dir.mkdir()
+    older = backups_dir / f"sis-backup-{(datetime.now() - timedelta(days=1)).strftime(backup.TIMESTAMP_FORMAT)}.db.gz"
+    older.touch()
+
+    # 2. Retention sees only the finished backups, so both survive
+    result = backup.create_backup(source, backups_dir, compression="gzip", keep_daily=3, keep_weekly=2, step_sleep=0)
+    live.close()
+    assert result is not None
+    assert sorted(p.name for p in backups_dir.iterdir()) == sorted([older.name, result.name])
+
+    # 3. The copy is a plain rollback-journal database
+    restored = backup.decompress(result, tmp_path / "restored.db")
+    connection = sqlite3.connect(restored)
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    assert connection.execute("SELECT COUNT(*) FROM notes").fetchone()[0] == 2000
+    connection.close()
+
+    # 4. Stray side files of a copy are never taken for backups
+    stray = backups_dir / (result.name.replace(".db.gz", ".db.partial-wal"))
+    stray.touch()
+    assert backup.apply_retention(backups_dir, "sis", keep_daily=1, keep_weekly=0) == [older]
+    assert stray.exists() and result.exists()
+
+
+def test_copy_restarted_by_writers_finishes_unthrottled(tmp_path, monkeypatch):
+    source = tmp_path / "sis.db"
+    live = make_database(source)
+
+    # A writer that commits between every throttled step, restarting the copy each time
+    steps = []
+
+    def write_between_steps(seconds):
+        steps.append(seconds)
+        live.execute("INSERT INTO notes (body) VALUES ('busy')")
+        live.commit()
+
+    monkeypatch.setattr(backup.time, "sleep", write_between_steps)
+    backup.online_copy(source, tmp_path / "copy.db", pages_per_step=8, step_sleep=0.001, max_restarts=3)
+    live.close()
+
+    assert 3 < len(steps) < 100
+    assert backup.verify(tmp_path / "copy.db")
+
+
+def test_incremental_chain_restores_any_point_in_time(tmp_path, monkeypatch):
+    moments = iter(datetime(2026, 10, 18, hour) for hour in range(9, 13))
+
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return next(moments)
+
+    monkeypatch.setattr(backup, "datetime", Clock)
+    source = tmp_path / "sis.db"
+    live = make_database(source, journal_mode="wal")
+    backups_dir = tmp_path / "backups"
+
+    base = backup.create_incremental_backup(source, backups_dir, step_sleep=0)
+    live.execute("UPDATE notes SET body = 'changed' WHERE id = 1")
+    live.commit()
+    first = backup.create_incremental_backup(source, backups_dir, step_sleep=0)
+    live.execute("DELETE FROM notes WHERE id > 10")
+    live.commit()
+    live.execute("VACUUM")
+    second = backup.create_incremental_backup(source, backups_dir, step_sleep=0)
+    live.close()
+
+    assert [base["kind"], first["kind"], second["kind"]] == ["base", "incremental", "incremental"]
+    # Only the touched pages are stored, not the whole database
+    assert 0 < first["pages_changed"] < base["page_count"] // 10
+    assert second["page_count"] < first["page_count"]
+
+    def count_rows(at):
+        output = tmp_path / f"restored-{at.hour}.db"
+        backup.restore(at, output, source, backups_dir)
+        connection = sqlite3.connect(output)
+        try:
+            return connection.execute("SELECT COUNT(*), MIN(body) FROM notes").fetchone()
+        finally:
+            connection.close()
+
+    assert count_rows(datetime(2026, 10, 18, 9, 30)) == (2000, "x" * 200)
+    assert count_rows(datetime(2026, 10, 18, 10, 30)) == (2000, "changed")
+    assert count_rows(datetime(2026, 10, 18, 11, 0)) == (10, "changed")
+
+    # A new base after `full_every` increments, and old chains can be pruned
+    third = backup.create_incremental_backup(source, backups_dir, full_every=2, keep_chains=1, step_sleep=0)
+    assert third["kind"] == "base"
+    chain = backup.chain_dir(backups_dir, "sis")
+    assert [entry["kind"] for entry in backup.load_manifest(chain)["entries"]] == ["base"]
+    assert sorted(p.name for p in chain.iterdir() if p.name.startswith(("base-", "incr-"))) == [third["file"]]
+    # No temporary snapshot, or WAL side files of one, is left in the chain
+    assert sorted(p.name for p in chain.iterdir()) == sorted([third["file"], backup.MANIFEST_NAME, backup.PAGE_HASHES_NAME])
@@ -0,0 +1,27 @@
+import copy
+
+from backend import datagen
+from backend.benchmarks import api
+
+
+def test_api_benchmark_run_and_compare():
+    # 1. A tiny run covers every scenario and reports each metric
+    volumes = datagen.Volumes(students=40, courses=4, sessions_per_course=4, assignments_per_course=2)
+    baseline = api.run(volumes, requests=4, warmup=1)
+    assert set(baseline["results"]) == set(api.SCENARIOS)
+    for result in baseline["results"].values():
+        assert 0 < result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+        assert result["throughput_rps"] > 0 and result["queries_per_request"] >= 1
+    assert baseline["results"]["token"]["requests"] == 1
+
+    # 2. A run is not a regression of itself
+    assert api.compare(baseline, baseline) == []
+
+    # 3. Slower percentiles, lower throughput and extra queries are all caught
+    current = copy.deepcopy(baseline)
+    current["results"]["gradebook"]["p95_ms"] *= 1.5
+    current["results"]["students_page"]["throughput_rps"] /= 2
+    current["results"]["attendance_get"]["queries_per_request"] += 1
+    current["results"]["upload"]["p99_ms"] *= 1.1
+    regressions = api.compare(baseline, current, threshold=0.2)
+    assert [line.split(":")[0] for line in regressions] == ["students_page", "gradebook", "attendance_get"]
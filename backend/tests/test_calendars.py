@@ -0,0 +1,118 @@
+from datetime import datetime
+
+from sqlalchemy import event
+
+from backend.audit import audit_writer
+from backend import calendars, models
+from backend.calendars import feed_cache
+from backend.tests.conftest import engine
+
+
+def test_calendar_feeds_are_cached_and_revalidated(test_client, auth_headers):
+    # 1. A course with an assignment and a session, and one enrolled student with a project milestone
+    course = test_client.post("/courses/", json={"title": "Databases", "code": "CS340"}, headers=auth_headers).json()
+    test_client.post(
+        f"/courses/{course['id']}/assignments/",
+        json={"title": "B-trees", "description": "Problem set", "due_date": "2026-11-02T17:00:00"},
+        headers=auth_headers,
+    )
+    test_client.post(
+        f"/courses/{course['id']}/sessions/", json={"date": "2026-10-26", "topic": "Indexes"}, headers=auth_headers
+    )
+    student = test_client.post(
+        "/students/", json={"first_name": "Ada", "last_name": "L", "email": "ada@example.com"}, headers=auth_headers
+    ).json()
+    test_client.post(
+        f"/courses/{course['id']}/enrollments/bulk", json={"student_ids": [student["id"]]}, headers=auth_headers
+    )
+    project = test_client.post(
+        f"/students/{student['id']}/projects/",
+        json={"title": "Thesis", "start_date": "2026-09-01"},
+        headers=auth_headers,
+    ).json()
+    test_client.post(
+        f"/projects/{project['id']}/milestones/",
+        json={"title": "Proposal", "due_date": "2026-11-15", "status": "pending"},
+        headers=auth_headers,
+    )
+
+    # 2. Feeds are only served at the signed links handed out to signed-in users
+    course_url = test_client.get(f"/courses/{course['id']}/calendar-link", headers=auth_headers).json()["url"]
+    student_url = test_client.get(f"/students/{student['id']}/calendar-link", headers=auth_headers).json()["url"]
+    assert test_client.get(f"/students/{student['id']}/calendar-link").status_code == 401
+    assert test_client.get(f"/students/{student['id']}/calendar.ics").status_code == 404
+    assert test_client.get(f"/students/{student['id']}/calendar.ics", params={"token": "0" * 32}).status_code == 404
+    assert test_client.get(student_url.replace(f"/students/{student['id']}/", f"/students/{student['id'] + 1}/")).status_code == 404
+
+    # 3. Both feeds list their events and carry a strong ETag
+    response = test_client.get(course_url)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/calendar")
+    assert "CS340: Due: B-trees" in response.text and "CS340: Indexes" in response.text
+    course_etag = response.headers["etag"]
+    assert course_etag.startswith('"')
+
+    response = test_client.get(student_url)
+    assert all(name in response.text for name in ("Due: B-trees", "Indexes", "Thesis: Proposal"))
+    student_etag = response.headers["etag"]
+
+    # 4. Polling an unchanged feed is a 304 without touching the database
+    audit_writer.flush()
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = test_client.get(course_url, headers={"If-None-Match": course_etag})
+        assert response.status_code == 304 and response.content == b""
+        response = test_client.get(student_url, headers={"If-None-Match": student_etag})
+        assert response.status_code == 304
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert statements == []
+
+    # 5. A new session drops the course feed and the enrolled student's feed, but nothing else
+    test_client.post(
+        f"/courses/{course['id']}/sessions/", json={"date": "2026-11-09", "topic": "Joins"}, headers=auth_headers
+    )
+    assert feed_cache.get(("course", course["id"])) is None
+    assert feed_cache.get(("student", student["id"])) is None
+    response = test_client.get(student_url, headers={"If-None-Match": student_etag})
+    assert response.status_code == 200
+    assert "CS340: Joins" in response.text
+    assert response.headers["etag"] != student_etag
+
+    # 6. Unknown ids are a 404, signed or not
+    assert test_client.get("/courses/9999/calendar-link", headers=auth_headers).status_code == 404
+    token = calendars.feed_token(("course", 9999))
+    assert test_client.get("/courses/9999/calendar.ics", params={"token": token}).status_code == 404
+
+
+def test_feeds_are_dropped_on_commit_not_on_flush(db_session):
+    # 1. A cached course feed, and an assignment added to the course but only flushed
+    course = models.Course(title="Databases", code="CS340")
+    db_session.add(course)
+    db_session.commit()
+    key = ("course", course.id)
+    feed_cache.set(key, calendars.Feed(body="cached", etag='"1"'), [key])
+    db_session.add(models.Assignment(title="B-trees", due_date=datetime(2026, 11, 2), course_id=course.id))
+    db_session.flush()
+    assert feed_cache.get(key) is not None
+
+    # 2. A rollback keeps the feed, a commit drops it
+    db_session.rollback()
+    assert feed_cache.get(key) is not None
+    db_session.add(models.Assignment(title="B-trees", due_date=datetime(2026, 11, 2), course_id=course.id))
+    db_session.commit()
+    assert feed_cache.get(key) is None
+
+
+def test_dependency_index_is_pruned():
+    cache = calendars.FeedCache(max_entries=10, ttl=60)
+    feed = calendars.Feed(body="", etag='""')
+    # A student feed re-rendered after dropping a course no longer depends on it
+    cache.set(("student", 1), feed, [("student", 1), ("course", 1), ("course", 2)])
+    cache.set(("student", 1), feed, [("student", 1), ("course", 2)])
+    assert set(cache._dependents) == {("student", 1), ("course", 2)}
+    # Invalidating one dependency removes the feed from all of them
+    cache.invalidate(("course", 2))
+    assert cache._dependents == {} and cache._depends_on == {}
@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+
+from backend import database, models
+
+
+def test_sqlite_profile_pragmas_and_read_only_pool(tmp_path):
+    url = f"sqlite:///{tmp_path / 'profile.db'}"
+    writer = database.create_app_engine(url)
+    reader = database.create_app_engine(url, read_only=True)
+    models.Base.metadata.create_all(writer)
+
+    with writer.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == 10000
+        connection.execute(text("INSERT INTO students (first_name, last_name, email) VALUES ('A', 'B', 'a@b.c')"))
+        connection.commit()
+    assert writer.pool.size() == 10
+
+    # Readers see committed rows but cannot write
+    with reader.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM students")).scalar() == 1
+        with pytest.raises(OperationalError, match="readonly"):
+            connection.execute(text("DELETE FROM students"))
+    writer.dispose()
+    reader.dispose()
+
+
+def test_concurrent_writers_wait_instead_of_failing(tmp_path):
+    url = f"sqlite:///{tmp_path / 'concurrent.db'}"
+    writer = database.create_app_engine(url)
+    reader = database.create_app_engine(url, read_only=True)
+    models.Base.metadata.create_all(writer)
+    Writes, Reads = sessionmaker(bind=writer), sessionmaker(bind=reader)
+    errors = []
+
+    def write(worker: int):
+        try:
+            for i in range(25):
+                with Writes() as db:
+                    db.add(models.Student(first_name=f"W{worker}", last_name=str(i), email=f"{worker}.{i}@example.com"))
+                    db.commit()
+        except Exception as e:
+            errors.append(e)
+
+    def read():
+        try:
+            for _ in range(50):
+                with Reads() as db:
+                    db.query(models.Student).count()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(8)] + [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with Reads() as db:
+        assert db.query(models.Student).count() == 8 * 25
+    writer.dispose()
+    reader.dispose()
+
+
+@pytest.mark.parametrize("method, bind", [("GET", "read_engine"), ("HEAD", "read_engine"), ("POST", "engine"), ("DELETE", "engine")])
+def test_get_db_routes_reads_to_the_read_pool(method, bind):
+    dependency = database.get_db(Request({"type": "http", "method": method, "headers": []}))
+    db = next(dependency)
+    assert db.get_bind() is getattr(database, bind)
+    dependency.close()
+
+
+def test_async_engines_need_a_supported_backend():
+    assert database.async_url("postgresql://u:p@db/sis").drivername == "postgresql+asyncpg"
+    with pytest.raises(ValueError, match="'mysql', which has no async driver"):
+        database.async_url("mysql://u:p@db/sis")
+
+
+def test_sync_engine_for_never_returns_the_read_pool(tmp_path, monkeypatch):
+    # 1. The sync and async read pools both map to the writable engine
+    url = f"sqlite:///{tmp_path / 'twins.db'}"
+    writer, reader = database.create_app_engine(url), database.create_app_engine(url, read_only=True)
+    monkeypatch.setattr(database, "engine", writer)
+    monkeypatch.setattr(database, "read_engine", reader)
+    monkeypatch.setattr(database, "SQLALCHEMY_DATABASE_URL", url)
+    async_reader = database.create_async_app_engine(url, read_only=True)
+    assert database.sync_engine_for(reader) is writer
+    assert database.sync_engine_for(async_reader.sync_engine) is writer
+
+    # 2. Any other sync engine is already what the caller needs
+    other = database.create_app_engine(f"sqlite:///{tmp_path / 'other.db'}")
+    assert database.sync_engine_for(other) is other
+    for bind in (writer, reader, async_reader.sync_engine, other):
+        bind.dispose()
@@ -0,0 +1,91 @@
+from datetime import datetime
+
+from sqlalchemy import func
+
+from backend import audit, datagen, models, resumable
+from backend.config import settings
+from backend.tests.conftest import engine
+
+
+def _snapshot(db_session):
+    return {
+        "students": db_session.query(models.Student.id, models.Student.email).order_by(models.Student.id).all(),
+        "enrollments": db_session.query(models.Enrollment.student_id, models.Enrollment.course_id).order_by(models.Enrollment.id).all(),
+        "attendance": db_session.query(models.Attendance.student_id, models.Attendance.status).order_by(models.Attendance.id).all(),
+        "grades": db_session.query(models.Grade.student_id, models.Grade.score).order_by(models.Grade.id).all(),
+    }
+
+
+def test_generate_is_deterministic_and_consistent(db_session):
+    volumes = datagen.Volumes(students=60, courses=7, sessions_per_course=6, assignments_per_course=3, seed=7)
+
+    # 1. Counts line up with the requested volumes
+    counts = datagen.generate(engine, volumes)
+    assert counts["students"] == 60 and counts["courses"] == 7
+    assert "users" not in counts
+    enrollments = counts["enrollments"]
+    assert 60 <= enrollments <= 60 * volumes.max_courses_per_student
+    assert counts["sessions"] == 7 * 6 and counts["attendance"] == enrollments * 6
+    assert counts["grades"] <= enrollments * 3
+    assert counts["milestones"] == counts["research_projects"] * len(datagen.MILESTONE_TITLES)
+
+    # 2. No student is enrolled twice in a course, and every attendance row belongs to an enrollment
+    duplicates = db_session.query(models.Enrollment.student_id, models.Enrollment.course_id).group_by(
+        models.Enrollment.student_id, models.Enrollment.course_id
+    ).having(func.count() > 1).count()
+    assert duplicates == 0
+    orphans = db_session.query(models.Attendance).join(models.Session).outerjoin(
+        models.Enrollment,
+        (models.Enrollment.course_id == models.Session.course_id) & (models.Enrollment.student_id == models.Attendance.student_id),
+    ).filter(models.Enrollment.id.is_(None)).count()
+    assert orphans == 0
+    first = _snapshot(db_session)
+    db_session.rollback()
+
+    # 3. The same seed reproduces the same rows; a different one does not
+    datagen.generate(engine, volumes)
+    assert _snapshot(db_session) == first
+    db_session.rollback()
+    datagen.generate(engine, datagen.Volumes(students=60, courses=7, sessions_per_course=6, assignments_per_course=3, seed=8))
+    assert _snapshot(db_session) != first
+
+
+def test_seed_db_endpoint_creates_admin(test_client, auth_headers, db_session, tmp_path, monkeypatch):
+    # 1. Seeding needs a login, and leaves users, audit logs and blobs alone
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    assert test_client.get("/seed-db/", params={"students": 30, "courses": 4}).status_code == 401
+    db_session.add(models.Blob(sha256="a" * 64, size_bytes=3, ref_count=1))
+    student = models.Student(first_name="Old", last_name="Timer", email="old@example.com")
+    db_session.add(student)
+    db_session.flush()
+    db_session.add(models.SentReminder(kind="assignment", item_id=1, student_id=student.id, due_at=datetime(2026, 11, 1)))
+    db_session.add(models.UploadSession(id="u" * 32, student_id=student.id, parts=[
+        models.UploadPart(part_number=1, size_bytes=3, sha256="b" * 64),
+    ]))
+    db_session.commit()
+    resumable.session_dir("u" * 32).mkdir(parents=True)
+
+    response = test_client.get("/seed-db/", params={"students": 30, "courses": 4}, headers=auth_headers)
+    assert response.status_code == 200
+    counts = response.json()["counts"]
+    assert counts["users"] == 1 and counts["students"] == 30 and counts["courses"] == 4
+    assert db_session.query(models.User).count() == 2
+    assert db_session.query(models.Blob).count() == 1
+    # Rows pointing at the old students and their staged parts go with them
+    for model in (models.SentReminder, models.UploadSession, models.UploadPart):
+        assert db_session.query(model).count() == 0
+    assert not resumable.session_dir("u" * 32).exists()
+    audit.audit_writer.flush()
+    assert db_session.query(models.AuditLog).filter_by(action="CREATE_USER").count() == 1
+
+    # 2. The admin can log in and new rows get fresh ids after the generated ones
+    login = test_client.post("/token", data={"username": datagen.ADMIN_EMAIL, "password": datagen.ADMIN_PASSWORD})
+    assert login.status_code == 200
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    assert len(test_client.get("/students/", params={"limit": 100}, headers=headers).json()) == 30
+    student = test_client.post(
+        "/students/", json={"first_name": "New", "last_name": "Student", "email": "new@example.com"}, headers=headers
+    )
+    assert student.status_code == 201 and student.json()["id"] == 31
+
+    assert test_client.get("/seed-db/", params={"students": 1_000_000}, headers=headers).status_code == 400
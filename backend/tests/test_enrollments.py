@@ -0,0 +1,47 @@
+def test_roster_endpoints_only_include_enrolled_students(test_client, auth_headers):
+    # 1. Create a course, a session and three students
+    course = test_client.post(
+        "/courses/", json={"title": "Compilers", "code": "CS440"}, headers=auth_headers
+    ).json()
+    session = test_client.post(
+        f"/courses/{course['id']}/sessions/",
+        json={"date": "2025-10-06", "topic": "Parsing"},
+        headers=auth_headers,
+    ).json()
+    student_ids = [
+        test_client.post(
+            "/students/",
+            json={"first_name": "S", "last_name": str(i), "email": f"s{i}@example.com"},
+            headers=auth_headers,
+        ).json()["id"]
+        for i in range(3)
+    ]
+
+    # 2. Bulk-enroll two of them, plus a repeat and an unknown id
+    response = test_client.post(
+        f"/courses/{course['id']}/enrollments/bulk",
+        json={"student_ids": student_ids[:2] + [student_ids[0], 9999]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["enrolled"] == 2
+    assert data["unknown_student_ids"] == [9999]
+
+    # 3. Enrolling again is a no-op
+    data = test_client.post(
+        f"/courses/{course['id']}/enrollments/bulk", json={"student_ids": student_ids[:2]}, headers=auth_headers
+    ).json()
+    assert (data["enrolled"], data["already_enrolled"]) == (0, 2)
+
+    # 4. Attendance and gradebook only list the enrolled students
+    roster = test_client.get(f"/sessions/{session['id']}/attendance/", headers=auth_headers).json()
+    assert [entry["student"]["id"] for entry in roster] == student_ids[:2]
+    gradebook = test_client.get(f"/courses/{course['id']}/gradebook/", headers=auth_headers).json()
+    assert [student["id"] for student in gradebook["students"]] == student_ids[:2]
+
+    # 5. Dropping a student removes them from the roster
+    response = test_client.delete(f"/courses/{course['id']}/enrollments/{student_ids[0]}", headers=auth_headers)
+    assert response.status_code == 200
+    students = test_client.get(f"/courses/{course['id']}/students/", headers=auth_headers).json()
+    assert [student["id"] for student in students] == [student_ids[1]]
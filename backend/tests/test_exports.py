@@ -0,0 +1,89 @@
+import csv
+import gzip
+import io
+import json
+from datetime import date, datetime
+
+import anyio
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from backend import exports, models
+
+
+def test_exports_stream_filtered_rows(db_session, test_client, auth_headers):
+    # 1. Two courses; attendance over three session dates and grades on two deadlines
+    courses = [models.Course(title="Networks", code="CS451"), models.Course(title="Graphics", code="CS488")]
+    students = [models.Student(first_name=f"S{i}", last_name="T", email=f"s{i}@example.com") for i in range(3)]
+    db_session.add_all([*courses, *students])
+    db_session.flush()
+    db_session.add_all([models.Enrollment(course_id=courses[0].id, student_id=s.id) for s in students[:2]])
+    sessions = [models.Session(date=date(2026, 10, day), topic="Week", course_id=courses[0].id) for day in (5, 12, 19)]
+    sessions.append(models.Session(date=date(2026, 10, 12), topic="Week", course_id=courses[1].id))
+    assignments = [
+        models.Assignment(title="TCP", due_date=datetime(2026, 10, 12, 23, 59), course_id=courses[0].id),
+        models.Assignment(title="Ray tracer", due_date=datetime(2026, 10, 20, 12, 0), course_id=courses[1].id),
+    ]
+    db_session.add_all([*sessions, *assignments])
+    db_session.flush()
+    db_session.add_all([
+        models.Attendance(session_id=session.id, student_id=student.id, status=models.AttendanceStatus.PRESENT)
+        for session in sessions for student in students
+    ])
+    db_session.add_all([
+        models.Grade(assignment_id=assignments[0].id, student_id=students[0].id, score=88.5, comments="Good, mostly"),
+        models.Grade(assignment_id=assignments[1].id, student_id=students[1].id, score=72.0),
+    ])
+    db_session.commit()
+
+    def export(dataset, **params):
+        response = test_client.get(f"/exports/{dataset}", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        return response, response.content
+
+    # 2. NDJSON: one object per line, filtered by course and an inclusive date range
+    response, body = export("attendance", course_id=courses[0].id, start="2026-10-12", end="2026-10-19")
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert 'filename="attendance.ndjson"' in response.headers["content-disposition"]
+    rows = [json.loads(line) for line in body.decode().splitlines()]
+    assert len(rows) == 6
+    assert {row["date"] for row in rows} == {"2026-10-12", "2026-10-19"}
+    assert rows[0] == {
+        "id": rows[0]["id"], "session_id": sessions[1].id, "course_id": courses[0].id, "date": "2026-10-12",
+        "student_id": students[0].id, "status": "present",
+    }
+
+    # 3. CSV: a header row, quoting where needed, enums and dates as text
+    response, body = export("grades", format="csv", end="2026-10-12")
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    rows = list(csv.reader(io.StringIO(body.decode())))
+    assert rows == [
+        ["id", "assignment_id", "course_id", "due_date", "student_id", "score", "comments"],
+        [str(rows[1][0]), str(assignments[0].id), str(courses[0].id), "2026-10-12T23:59:00", str(students[0].id), "88.5", "Good, mostly"],
+    ]
+
+    # 4. Gzip, as a .gz download
+    response, body = export("students", format="csv", course_id=courses[0].id, gzip=True)
+    assert response.headers["content-type"] == "application/gzip"
+    assert 'filename="students.csv.gz"' in response.headers["content-disposition"]
+    assert gzip.decompress(body).decode().splitlines() == [
+        "id,first_name,last_name,email",
+        f"{students[0].id},S0,T,s0@example.com",
+        f"{students[1].id},S1,T,s1@example.com",
+    ]
+
+    assert test_client.get("/exports/users", headers=auth_headers).status_code == 422
+
+    # 5. Rows are read and sent a partition at a time, gzip included
+    async def chunks(compress):
+        bind = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+        try:
+            return [chunk async for chunk in exports.stream(bind, exports.attendance_query(), "ndjson", compress, chunk_rows=4)]
+        finally:
+            await bind.dispose()
+
+    plain = anyio.run(chunks, False)
+    assert len(plain) == 3 and [chunk.count(b"\n") for chunk in plain] == [4, 4, 4]
+    zipped = anyio.run(chunks, True)
+    assert len(zipped) == 4 and all(zipped[:3])  # every partition is flushed, then the gzip trailer
+    assert gzip.decompress(b"".join(zipped)) == b"".join(plain)
@@ -0,0 +1,54 @@
+from datetime import date, datetime
+from typing import List
+
+from pydantic import TypeAdapter
+
+from backend import models, schemas
+
+
+def _as_schema(schema, value):
+    """What FastAPI's response_model path would have sent."""
+    adapter = TypeAdapter(schema)
+    return adapter.dump_python(adapter.validate_python(value, from_attributes=True), mode="json")
+
+
+def test_fast_path_matches_the_response_models(db_session, test_client, auth_headers):
+    # 1. A course with a roster, sessions, assignments and some grades and attendance
+    course = models.Course(title="Compilers", code="CS440", description=None)
+    students = [models.Student(first_name=f"S{i}", last_name="T", email=f"s{i}@example.com") for i in range(4)]
+    db_session.add_all([course, *students])
+    db_session.flush()
+    db_session.add_all([models.Enrollment(course_id=course.id, student_id=s.id) for s in students[:3]])
+    session = models.Session(date=date(2026, 10, 19), topic="Parsing", course_id=course.id)
+    assignment = models.Assignment(title="Lexer", due_date=datetime(2026, 10, 30, 23, 59, 30, 250), course_id=course.id)
+    db_session.add_all([session, assignment])
+    db_session.flush()
+    db_session.add_all([
+        models.Attendance(session_id=session.id, student_id=students[0].id, status=models.AttendanceStatus.LATE),
+        models.Grade(assignment_id=assignment.id, student_id=students[0].id, score=91.5, comments="Tidy"),
+        models.Grade(assignment_id=assignment.id, student_id=students[1].id, score=70),
+    ])
+    db_session.commit()
+
+    def get(path, **params):
+        response = test_client.get(path, params=params, headers=auth_headers)
+        assert response.status_code == 200 and response.headers["content-type"] == "application/json"
+        return response.json()
+
+    # 2. Every fast route returns exactly what its response_model describes
+    assert get("/students/") == _as_schema(List[schemas.Student], students)
+    assert get("/students/", cursor="", limit=3) == _as_schema(schemas.StudentPage, {
+        "items": students[:3], "next_cursor": get("/students/", cursor="", limit=3)["next_cursor"],
+    })
+    assert get("/courses/") == _as_schema(List[schemas.Course], [course])
+    assert get(f"/courses/{course.id}/sessions/") == _as_schema(List[schemas.Session], [session])
+    assert get(f"/courses/{course.id}/assignments/") == _as_schema(List[schemas.Assignment], [assignment])
+    assert get(f"/sessions/{session.id}/attendance/") == _as_schema(List[schemas.StudentAttendance], [
+        {"student": students[0], "status": models.AttendanceStatus.LATE},
+        {"student": students[1], "status": None},
+        {"student": students[2], "status": None},
+    ])
+    grades = db_session.query(models.Grade).order_by(models.Grade.id).all()
+    assert get(f"/courses/{course.id}/gradebook/") == _as_schema(schemas.Gradebook, {
+        "students": students[:3], "assignments": [assignment], "grades": grades,
+    })
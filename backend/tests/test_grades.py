@@ -0,0 +1,95 @@
+from datetime import datetime
+
+from backend import bulk, models, schemas
+from backend.gradebook import build_matrix
+
+
+def test_bulk_grade_upsert_counts(test_client, auth_headers):
+    # 1. Create a course with one assignment and two students
+    course = test_client.post(
+        "/courses/", json={"title": "Algorithms", "code": "CS301"}, headers=auth_headers
+    ).json()
+    assignment = test_client.post(
+        f"/courses/{course['id']}/assignments/",
+        json={"title": "Sorting", "due_date": "2025-11-01T23:59:00"},
+        headers=auth_headers,
+    ).json()
+    student_ids = [
+        test_client.post(
+            "/students/",
+            json={"first_name": "S", "last_name": str(i), "email": f"s{i}@example.com"},
+            headers=auth_headers,
+        ).json()["id"]
+        for i in range(2)
+    ]
+    test_client.post(
+        f"/courses/{course['id']}/enrollments/bulk", json={"student_ids": student_ids}, headers=auth_headers
+    )
+
+    def grade(student_id, score):
+        return {"assignment_id": assignment["id"], "student_id": student_id, "score": score}
+
+    # 2. The first save inserts every grade
+    response = test_client.post(
+        "/grades/", json={"grades": [grade(student_ids[0], 90), grade(student_ids[1], 80)]}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 2
+
+    # 3. Saving again updates only the changed grade
+    response = test_client.post(
+        "/grades/", json={"grades": [grade(student_ids[0], 95), grade(student_ids[1], 80)]}, headers=auth_headers
+    )
+    data = response.json()
+    assert (data["inserted"], data["updated"], data["unchanged"]) == (0, 1, 1)
+
+    # 4. The gradebook holds exactly one grade per student
+    gradebook = test_client.get(f"/courses/{course['id']}/gradebook/", headers=auth_headers).json()
+    scores = {g["student_id"]: g["score"] for g in gradebook["grades"]}
+    assert len(gradebook["grades"]) == 2
+    assert scores[student_ids[0]] == 95
+
+    # 5. The matrix format carries the same scores as id vectors plus a dense grid
+    matrix = test_client.get(
+        f"/courses/{course['id']}/gradebook/", params={"format": "matrix"}, headers=auth_headers
+    ).json()
+    assert matrix["student_ids"] == student_ids
+    assert matrix["scores"] == [[95.0], [80.0]]
+
+
+def test_bulk_upsert_updates_a_grade_inserted_since_the_lookup(db_session, monkeypatch):
+    # 1. Another request stores the grade after this one loaded the existing rows
+    course = models.Course(title="Algorithms", code="CS301")
+    student = models.Student(first_name="Ada", last_name="Lovelace", email="ada@example.com")
+    db_session.add_all([course, student])
+    db_session.flush()
+    assignment = models.Assignment(title="Sorting", due_date=datetime(2025, 11, 1), course_id=course.id)
+    db_session.add(assignment)
+    db_session.flush()
+    db_session.add(models.Grade(assignment_id=assignment.id, student_id=student.id, score=50))
+    db_session.commit()
+
+    class Stale:
+        def filter(self, *criteria):
+            return self
+
+        def all(self):
+            return []
+
+    monkeypatch.setattr(db_session, "query", lambda *columns: Stale())
+
+    # 2. The INSERT turns into an update instead of failing on the unique index
+    grade = schemas.GradeCreate(assignment_id=assignment.id, student_id=student.id, score=90, comments="Late but good")
+    assert bulk.upsert_grades(db_session, [grade])["inserted"] == 1
+    db_session.commit()
+    monkeypatch.undo()
+    assert db_session.query(models.Grade.score, models.Grade.comments).all() == [(90, "Late but good")]
+
+
+def test_build_matrix_stats():
+    matrix = build_matrix([1, 2], [10, 20], [(1, 10, 80.0), (2, 10, 90.0), (1, 20, 70.0)])
+
+    assert matrix["scores"] == [[80.0, 70.0], [90.0, None]]
+    assert matrix["assignment_stats"]["mean"] == [85.0, 70.0]
+    assert matrix["assignment_stats"]["stddev"] == [5.0, 0.0]
+    assert matrix["student_stats"]["median"] == [75.0, 90.0]
@@ -0,0 +1,107 @@
+from datetime import datetime
+
+from backend import calendars, datagen, models
+from backend.config import settings
+
+
+def test_csv_import_reports_rows_it_could_not_import(db_session, test_client, auth_headers, monkeypatch):
+    # 1. Small batches, so duplicates and lookups have to work across them
+    monkeypatch.setattr(settings, "IMPORT_BATCH_ROWS", 2)
+    db_session.add(models.Student(first_name="Old", last_name="Timer", email="old@example.com"))
+    db_session.commit()
+
+    def upload(dataset, text, **params):
+        response = test_client.post(
+            f"/imports/{dataset}", params=params, files={"file": ("data.csv", text.encode("utf-8-sig"))}, headers=auth_headers
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    students_csv = (
+        "first_name,last_name,email\n"
+        "Ada,Lovelace,ada@example.com\n"
+        "Alan,Turing,not-an-email\n"
+        "Old,Timer,old@example.com\n"
+        ",Hopper,grace@example.com\n"
+        "Ada,Again,ada@example.com\n"
+        '"Edsger, W.",Dijkstra , edsger@example.com\n'
+    )
+
+    # 2. A dry run reports everything and saves nothing
+    report = upload("students", students_csv, dry_run=True)
+    assert (report["rows"], report["inserted"], report["skipped"], report["failed"]) == (6, 2, 1, 3)
+    assert db_session.query(models.Student).count() == 1
+
+    # 3. The real import: valid rows in, stored emails skipped, bad rows reported by line
+    report = upload("students", students_csv)
+    assert report["detail"] == "Import complete"
+    assert (report["inserted"], report["updated"], report["skipped"], report["failed"]) == (2, 0, 1, 3)
+    assert [error["row"] for error in report["errors"]] == [3, 5, 6]
+    assert "email" in report["errors"][0]["errors"][0]
+    assert report["errors"][1]["errors"] == ["first_name: Field required"]
+    assert report["errors"][2]["errors"] == ["duplicate of line 2"]
+    students = {s.email: s for s in db_session.query(models.Student)}
+    assert (students["edsger@example.com"].first_name, students["edsger@example.com"].last_name) == ("Edsger, W.", "Dijkstra")
+    student_ids = {email: student.id for email, student in students.items()}
+    ada, edsger = student_ids["ada@example.com"], student_ids["edsger@example.com"]
+
+    # 4. Enrollments: unknown ids are reported, existing enrollments skipped
+    course = models.Course(title="Logic", code="CS101")
+    db_session.add(course)
+    db_session.flush()
+    db_session.add(models.Enrollment(course_id=course.id, student_id=student_ids["old@example.com"]))
+    assignment = models.Assignment(title="Proofs", due_date=datetime(2026, 11, 1), course_id=course.id)
+    db_session.add(assignment)
+    db_session.flush()
+    db_session.add(models.Grade(assignment_id=assignment.id, student_id=ada, score=50))
+    course_id, assignment_id = course.id, assignment.id
+    db_session.commit()
+
+    pairs = [(course_id, student_id) for student_id in student_ids.values()] + [(course_id, 9999), (9999, ada)]
+    report = upload("enrollments", "course_id,student_id\n" + "".join(f"{c},{s}\n" for c, s in pairs))
+    assert (report["inserted"], report["skipped"], report["failed"]) == (2, 1, 2)
+    assert report["errors"] == [
+        {"row": 5, "errors": ["student_id: no students row with id 9999"]},
+        {"row": 6, "errors": ["course_id: no courses row with id 9999"]},
+    ]
+    assert db_session.query(models.Enrollment).filter_by(course_id=course_id).count() == 3
+
+    # 5. Grades are upserted; blank comments fall back to None
+    report = upload("grades", (
+        "assignment_id,student_id,score,comments\n"
+        f"{assignment_id},{ada},95,Much better\n"
+        f"{assignment_id},{edsger},88,\n"
+        f"{assignment_id},{ada},10,\n"
+    ))
+    assert (report["inserted"], report["updated"], report["failed"]) == (1, 1, 1)
+    grades = {g.student_id: (g.score, g.comments) for g in db_session.query(models.Grade)}
+    assert grades == {ada: (95, "Much better"), edsger: (88, None)}
+
+    # 6. A file without the required columns is rejected as a whole
+    response = test_client.post(
+        "/imports/students", files={"file": ("data.csv", b"name,email\nAda,ada@example.com\n")}, headers=auth_headers
+    )
+    assert response.status_code == 400 and response.json()["detail"] == "Missing columns: first_name, last_name"
+
+
+def test_enrollment_import_skips_stored_keys_and_refreshes_feeds_after_commit(db_session, test_client, auth_headers, monkeypatch):
+    # 1. A row stored after any check would have run is skipped by the INSERT itself
+    db_session.add(models.Student(first_name="Ada", last_name="Lovelace", email="ada@example.com"))
+    db_session.commit()
+    data = {"first_name": ["Ada", "Alan"], "last_name": ["Lovelace", "Turing"], "email": ["ada@example.com", "alan@example.com"]}
+    assert datagen.insert_rows(db_session.connection(), models.Student.__table__, data, skip_conflicts_on=("email",)) == 1
+    course = models.Course(title="Logic", code="CS101")
+    db_session.add(course)
+    db_session.commit()
+    course_id, student_ids = course.id, [student.id for student in db_session.query(models.Student).order_by(models.Student.id)]
+
+    # 2. Feeds are dropped only once the enrollments are committed, and never on a dry run
+    invalidated = []
+    monkeypatch.setattr(calendars.feed_cache, "invalidate", lambda dependency: invalidated.append((dependency, db_session.in_transaction())))
+    csv_text = "course_id,student_id\n" + "".join(f"{course_id},{student_id}\n" for student_id in student_ids)
+    for dry_run in (True, False):
+        response = test_client.post(
+            "/imports/enrollments", params={"dry_run": dry_run}, files={"file": ("data.csv", csv_text.encode())}, headers=auth_headers
+        )
+        assert response.status_code == 200 and response.json()["inserted"] == 2
+    assert sorted(invalidated) == [(("student", student_id), False) for student_id in student_ids]
@@ -0,0 +1,45 @@
+import logging
+
+from backend import instrumentation
+from backend.config import settings
+
+
+def test_requests_report_their_queries(test_client, auth_headers, monkeypatch, caplog):
+    instrumentation.route_stats.clear()
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", "admin@example.com, test@example.com")
+    for i in range(3):
+        test_client.post("/students/", json={"first_name": f"S{i}", "last_name": "T", "email": f"s{i}@example.com"}, headers=auth_headers)
+
+    # 1. Every response carries its query count and DB time
+    response = test_client.get("/students/", headers=auth_headers)
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith("db;dur=") and 'desc="1 queries"' in timing and "app;dur=" in timing
+
+    # 2. Statements over the threshold are logged with the route template
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="backend.instrumentation"):
+        test_client.get("/students/1", headers=auth_headers)
+    assert any("Slow query" in record.message and "GET /students/{student_id}" in record.message for record in caplog.records)
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 200.0)
+
+    # 3. Per-route totals, grouped by template rather than by concrete path
+    stats = {row["route"]: row for row in test_client.get("/admin/query-stats", headers=auth_headers).json()}
+    assert stats["POST /students/"]["requests"] == 3
+    assert stats["POST /students/"]["queries"] >= 3
+    assert stats["GET /students/{student_id}"]["slow_queries"] >= 1
+    assert stats["GET /students/"]["avg_queries"] == 1
+
+    # 4. Paths that match no route share one entry
+    for i in range(3):
+        assert test_client.get(f"/no-such-page-{i}", headers=auth_headers).status_code == 404
+    stats = {row["route"]: row for row in test_client.get("/admin/query-stats", headers=auth_headers).json()}
+    assert stats["GET <unmatched>"]["requests"] == 3
+    assert not any("no-such-page" in route for route in stats)
+
+    assert test_client.delete("/admin/query-stats", headers=auth_headers).status_code == 200
+    assert [row["route"] for row in test_client.get("/admin/query-stats", headers=auth_headers).json()] == ["DELETE /admin/query-stats"]
+
+
+def test_query_stats_are_for_admins_only(test_client, auth_headers):
+    assert test_client.get("/admin/query-stats", headers=auth_headers).status_code == 403
+    assert test_client.delete("/admin/query-stats", headers=auth_headers).status_code == 403
@@ -0,0 +1,143 @@
+import socket
+import time
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from backend import models, outbox
+from backend.config import settings
+from backend.tests.conftest import TestingSessionLocal
+
+
+class RecordingHandler:
+    """Accepts mail like a real server, except for a couple of magic recipients."""
+
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("bounce"):
+            return "550 No such user"
+        if address.startswith("later"):
+            return "451 Mailbox busy, try again later"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(id(session))
+        self.messages.append((envelope.rcpt_tos, envelope.content.decode()))
+        return "250 Message accepted for delivery"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture()
+def smtp_server(monkeypatch):
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    monkeypatch.setattr(settings, "MAIL_SERVER", "127.0.0.1")
+    monkeypatch.setattr(settings, "MAIL_PORT", controller.port)
+    monkeypatch.setattr(settings, "MAIL_STARTTLS", False)
+    monkeypatch.setattr(settings, "MAIL_USE_CREDENTIALS", False)
+    yield controller, handler
+    controller.stop()
+
+
+def make_worker(**overrides):
+    options = dict(
+        session_factory=TestingSessionLocal, batch_size=2, poll_interval=0.1, rate_per_second=0,
+        max_attempts=2, retry_base=0, claim_lease=300, idle_disconnect=60,
+    )
+    options.update(overrides)
+    return outbox.OutboxWorker(**options)
+
+
+def test_outbox_batches_over_one_connection(test_client, auth_headers, db_session, smtp_server):
+    _, handler = smtp_server
+
+    # 1. The endpoint only queues; nothing is sent inside the request
+    response = test_client.post("/email-test/", headers=auth_headers)
+    assert response.status_code == 202
+    assert handler.messages == []
+
+    outbox.enqueue(db_session, [f"s{i}@example.com" for i in range(4)], "Grades posted", "Check the portal", "plain")
+    db_session.commit()
+
+    # 2. Five emails in batches of two, rate limited, over a single SMTP session
+    worker = make_worker(rate_per_second=50)
+    started = time.monotonic()
+    try:
+        assert worker.drain() == {"sent": 5, "retried": 0, "failed": 0}
+    finally:
+        worker.stop()
+    assert time.monotonic() - started >= 4 / 50
+    assert len(handler.messages) == 5
+    assert len(handler.sessions) == 1
+    assert handler.messages[0][0] == ["test@example.com"]
+    assert "Subject: FastAPI Mail Test" in handler.messages[0][1]
+
+    statuses = {email.status for email in db_session.query(models.OutboxEmail)}
+    assert statuses == {models.EmailStatus.SENT}
+
+
+def test_outbox_retries_transient_failures_and_survives_outages(db_session, smtp_server, monkeypatch):
+    outbox.enqueue(db_session, ["ok@example.com", "bounce@example.com", "later@example.com"], "Reminder", "<p>Due soon</p>")
+    db_session.commit()
+
+    # 1. A 550 fails at once; a 451 is retried until max_attempts
+    worker = make_worker()
+    try:
+        assert worker.drain() == {"sent": 1, "retried": 1, "failed": 2}
+    finally:
+        worker.stop()
+    emails = {email.recipient: email for email in db_session.query(models.OutboxEmail)}
+    assert (emails["bounce@example.com"].status, emails["bounce@example.com"].attempts) == (models.EmailStatus.FAILED, 1)
+    assert (emails["later@example.com"].status, emails["later@example.com"].attempts) == (models.EmailStatus.FAILED, 2)
+    assert "451" in emails["later@example.com"].last_error
+
+    # 2. With the server down, the batch goes back without using up the untried emails' attempts
+    monkeypatch.setattr(settings, "MAIL_PORT", free_port())
+    outbox.enqueue(db_session, ["a@example.com", "b@example.com"], "Reminder", "<p>Due soon</p>")
+    db_session.commit()
+    worker = make_worker(retry_base=60)
+    try:
+        assert worker.drain() == {"sent": 0, "retried": 2, "failed": 0}
+    finally:
+        worker.stop()
+    db_session.expire_all()
+    pending = (
+        db_session.query(models.OutboxEmail)
+        .filter(models.OutboxEmail.status == models.EmailStatus.PENDING)
+        .order_by(models.OutboxEmail.id)
+        .all()
+    )
+    assert [email.attempts for email in pending] == [1, 0]
+    assert all(email.claim_token is None for email in pending)
+
+
+def test_socket_error_mid_send_drops_the_connection(db_session, smtp_server, monkeypatch):
+    # 1. The connection times out while the first email is being sent
+    outbox.enqueue(db_session, ["a@example.com", "b@example.com"], "Reminder", "<p>Due soon</p>")
+    db_session.commit()
+
+    def time_out(self, message):
+        raise socket.timeout("timed out")
+
+    monkeypatch.setattr(outbox.smtplib.SMTP, "send_message", time_out)
+    worker = make_worker(retry_base=60)
+    try:
+        # 2. The broken connection is not reused, and the untried email keeps its attempts
+        assert worker.drain() == {"sent": 0, "retried": 2, "failed": 0}
+        assert worker._smtp is None
+    finally:
+        worker.stop()
+    db_session.expire_all()
+    emails = db_session.query(models.OutboxEmail).order_by(models.OutboxEmail.id).all()
+    assert [(email.status, email.attempts) for email in emails] == [(models.EmailStatus.PENDING, 1), (models.EmailStatus.PENDING, 0)]
+    assert "timed out" in emails[0].last_error
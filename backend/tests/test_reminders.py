@@ -0,0 +1,67 @@
+import time
+from datetime import datetime, timedelta
+
+from backend import models, reminders
+
+
+def test_reminders_fan_out_once_per_deadline(db_session):
+    now = datetime(2026, 10, 18, 9, 0)
+
+    # 1. A course with three enrolled students (and one who is not), two assignments and a milestone
+    course = models.Course(title="Operating Systems", code="CS350")
+    students = [models.Student(first_name=f"S{i}", last_name="T", email=f"s{i}@example.com") for i in range(4)]
+    db_session.add_all([course, *students])
+    db_session.flush()
+    db_session.add_all([models.Enrollment(course_id=course.id, student_id=s.id) for s in students[:3]])
+    soon = models.Assignment(title="Scheduler lab", course_id=course.id, due_date=now + timedelta(hours=5))
+    later = models.Assignment(title="File systems lab", course_id=course.id, due_date=now + timedelta(days=3))
+    project = models.ResearchProject(title="Thesis", student_id=students[3].id)
+    db_session.add_all([soon, later, project])
+    db_session.flush()
+    db_session.add(models.Milestone(title="Draft", project_id=project.id, due_date=(now + timedelta(hours=20)).date()))
+    db_session.commit()
+
+    # 2. Only what is due inside the window is sent, to the right people, in batches
+    stats = reminders.dispatch(db_session, now=now, window_hours=24, batch_size=2)
+    assert stats == {"assignments": 1, "milestones": 1, "reminders": 4}
+    emails = db_session.query(models.OutboxEmail).order_by(models.OutboxEmail.id).all()
+    assert [email.recipient for email in emails] == [f"s{i}@example.com" for i in range(4)]
+    assert emails[0].subject.startswith("Reminder: CS350: Scheduler lab is due")
+    assert "Thesis: Draft" in emails[3].subject
+
+    # 3. Rerunning is a no-op
+    stats = reminders.dispatch(db_session, now=now + timedelta(minutes=15), window_hours=24)
+    assert stats["reminders"] == 0
+    assert db_session.query(models.OutboxEmail).count() == 4
+
+    # 4. A moved deadline is a new deadline
+    soon.due_date = now + timedelta(hours=8)
+    db_session.commit()
+    assert reminders.dispatch(db_session, now=now, window_hours=24)["reminders"] == 3
+    assert db_session.query(models.SentReminder).count() == 7
+
+
+def test_default_clock_matches_local_due_dates(db_session, monkeypatch):
+    # 1. A server ten hours ahead of UTC
+    monkeypatch.setenv("TZ", "Etc/GMT-10")
+    time.tzset()
+    try:
+        now = datetime.now()
+        course = models.Course(title="Compilers", code="CS444")
+        student = models.Student(first_name="Ada", last_name="L", email="ada@example.com")
+        db_session.add_all([course, student])
+        db_session.flush()
+        db_session.add(models.Enrollment(course_id=course.id, student_id=student.id))
+        # Local times, as the API stores them: one just past, one due tonight
+        db_session.add_all([
+            models.Assignment(title="Past", course_id=course.id, due_date=now - timedelta(hours=2)),
+            models.Assignment(title="Tonight", course_id=course.id, due_date=now + timedelta(hours=20)),
+        ])
+        db_session.commit()
+
+        # 2. Without an explicit `now`, the window starts at local time, not UTC
+        assert reminders.dispatch(db_session, window_hours=24)["assignments"] == 1
+        assert "Tonight" in db_session.query(models.OutboxEmail).one().subject
+    finally:
+        monkeypatch.undo()
+        time.tzset()
@@ -1,4 +1,7 @@
 # backend/tests/test_students.py
+from backend.pagination import encode_cursor
+
+
 def test_create_student(test_client):
     # 1. Create a test user first to get a token
     user_data = {"email": "test@example.com", "password": "testpassword"}
@@ -23,4 +26,44 @@ def test_create_student(test_client):
     response_data = response.json()
     assert response_data["first_name"] == student_data["first_name"]
     assert response_data["email"] == student_data["email"]
-    assert "id" in response_data
\ No newline at end of file
+    assert "id" in response_data
+
+def test_read_students_cursor_pagination(test_client, auth_headers):
+    # 1. Create five students (each one also writes an audit log entry)
+    for i in range(5):
+        test_client.post(
+            "/students/",
+            json={"first_name": "S", "last_name": str(i), "email": f"s{i}@example.com"},
+            headers=auth_headers,
+        )
+
+    # 2. Walk the students two at a time until the cursor runs out
+    seen, cursor = [], ""
+    while cursor is not None:
+        page = test_client.get("/students/", params={"limit": 2, "cursor": cursor}, headers=auth_headers).json()
+        seen.extend(student["id"] for student in page["items"])
+        cursor = page["next_cursor"]
+    assert seen == sorted(seen) and len(seen) == 5
+
+    # 3. Audit logs page newest first without repeats (five students plus the user sign-up)
+    seen, cursor = [], ""
+    while cursor is not None:
+        page = test_client.get("/audit-logs/", params={"limit": 2, "cursor": cursor}, headers=auth_headers).json()
+        seen.extend(log["id"] for log in page["items"])
+        cursor = page["next_cursor"]
+    assert seen == sorted(seen, reverse=True) and len(seen) == 6
+
+    # 4. Offset mode still returns a plain list, and bad cursors are rejected
+    assert isinstance(test_client.get("/students/", headers=auth_headers).json(), list)
+    assert test_client.get("/students/", params={"cursor": "bogus"}, headers=auth_headers).status_code == 400
+    # Well-formed tokens whose id is not an integer are rejected too
+    for value in ("x", 1.5, True, None):
+        for path in ("/students/", "/courses/"):
+            response = test_client.get(path, params={"cursor": encode_cursor([value])}, headers=auth_headers)
+            assert response.status_code == 400
+
+    # 5. Page sizes outside 1..MAX_PAGE_SIZE are rejected rather than paged with a bogus cursor
+    for path in ("/students/", "/courses/", "/audit-logs/"):
+        for limit in (0, -1, 1001):
+            response = test_client.get(path, params={"limit": limit, "cursor": ""}, headers=auth_headers)
+            assert response.status_code == 422
@@ -0,0 +1,154 @@
+import hashlib
+
+from backend import models, resumable, storage
+from backend.config import settings
+
+
+def upload(test_client, auth_headers, content, filename="solution.py"):
+    return test_client.post(
+        "/assignments/1/submissions/",
+        data={"student_id": "1"},
+        files={"file": (filename, content)},
+        headers=auth_headers,
+    )
+
+
+def test_upload_records_checksum_and_size(test_client, auth_headers, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_BYTES", 4)
+    content = b"print('hello, world')\n"
+
+    response = upload(test_client, auth_headers, content)
+
+    assert response.status_code == 201
+    data = response.json()
+    assert data["sha256"] == hashlib.sha256(content).hexdigest()
+    assert data["size_bytes"] == len(content)
+    assert data["file_path"] == storage.blob_path(data["sha256"]).as_posix()
+    # Only the finished blob remains; no temp parts are left behind
+    assert [p for p in tmp_path.rglob("*") if p.is_file()] == [storage.blob_path(data["sha256"])]
+
+
+def test_oversized_upload_is_rejected(test_client, auth_headers, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 10)
+
+    response = upload(test_client, auth_headers, b"x" * 11, filename="big.bin")
+
+    assert response.status_code == 413
+    assert [p for p in tmp_path.rglob("*") if p.is_file()] == []
+
+
+def test_resubmissions_share_one_blob_until_collected(test_client, auth_headers, db_session, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+
+    # 1. The same file submitted twice is stored once with two references
+    first = upload(test_client, auth_headers, b"same bytes").json()
+    second = upload(test_client, auth_headers, b"same bytes").json()
+    assert first["file_path"] == second["file_path"]
+    blob = db_session.get(models.Blob, first["sha256"])
+    assert blob.ref_count == 2
+
+    # 2. Once no submission references it, GC removes the row and the file
+    db_session.query(models.Submission).delete()
+    db_session.commit()
+    stats = storage.collect_garbage(db_session, grace_seconds=0)
+    assert stats["deleted_blobs"] == 1
+    assert db_session.get(models.Blob, first["sha256"]) is None
+    assert not storage.blob_path(first["sha256"]).exists()
+
+
+def test_resumable_upload_creates_submission(test_client, auth_headers, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    course = test_client.post("/courses/", json={"title": "Thesis", "code": "RS900"}, headers=auth_headers).json()
+    assignment = test_client.post(
+        f"/courses/{course['id']}/assignments/",
+        json={"title": "Dataset", "due_date": "2025-12-01T23:59:00"},
+        headers=auth_headers,
+    ).json()
+    parts = [b"first chunk|", b"second chunk|", b"last"]
+
+    # 1. Open a session and send the parts out of order, one with a bad checksum first
+    upload_session = test_client.post(
+        f"/assignments/{assignment['id']}/upload-sessions/",
+        json={"student_id": 1, "filename": "data.csv"},
+        headers=auth_headers,
+    ).json()
+    url = f"/upload-sessions/{upload_session['id']}"
+
+    bad = test_client.put(f"{url}/parts/2", content=parts[1], headers={**auth_headers, "X-Part-SHA256": "0" * 64})
+    assert bad.status_code == 400
+    for number in (3, 1, 2):
+        body = parts[number - 1]
+        response = test_client.put(
+            f"{url}/parts/{number}",
+            content=body,
+            headers={**auth_headers, "X-Part-SHA256": hashlib.sha256(body).hexdigest()},
+        )
+        assert response.status_code == 200
+
+    # 2. The session reports every part, so a client could resume from here
+    status = test_client.get(url, headers=auth_headers).json()
+    assert [part["part_number"] for part in status["parts"]] == [1, 2, 3]
+
+    # 3. Completing it assembles the file and creates the submission
+    submission = test_client.post(f"{url}/complete", headers=auth_headers).json()
+    content = b"".join(parts)
+    assert submission["sha256"] == hashlib.sha256(content).hexdigest()
+    assert storage.blob_path(submission["sha256"]).read_bytes() == content
+    assert test_client.get(url, headers=auth_headers).status_code == 404
+    assert not (tmp_path / "sessions" / upload_session["id"]).exists()
+
+
+def test_upload_without_content_length_is_rejected(test_client, auth_headers, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+
+    # A generator body goes out chunked, with no Content-Length to check up front
+    def body():
+        yield b"--boundary\r\n"
+        yield b"x" * 1024
+
+    response = test_client.post(
+        "/assignments/1/submissions/",
+        content=body(),
+        headers={**auth_headers, "Content-Type": "multipart/form-data; boundary=boundary"},
+    )
+
+    assert response.status_code == 411
+    assert [p for p in tmp_path.rglob("*") if p.is_file()] == []
+
+
+def test_rejected_part_keeps_the_accepted_one(test_client, auth_headers, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "MAX_RESUMABLE_UPLOAD_BYTES", 8)
+    course = test_client.post("/courses/", json={"title": "Thesis", "code": "RS900"}, headers=auth_headers).json()
+    assignment = test_client.post(
+        f"/courses/{course['id']}/assignments/",
+        json={"title": "Dataset", "due_date": "2025-12-01T23:59:00"},
+        headers=auth_headers,
+    ).json()
+
+    def open_session():
+        upload_session = test_client.post(
+            f"/assignments/{assignment['id']}/upload-sessions/",
+            json={"student_id": 1, "filename": "data.csv"},
+            headers=auth_headers,
+        ).json()
+        return f"/upload-sessions/{upload_session['id']}", upload_session["id"]
+
+    # 1. A re-sent part that would take the session over its budget is refused...
+    url, upload_id = open_session()
+    assert test_client.put(f"{url}/parts/1", content=b"12345", headers=auth_headers).status_code == 200
+    assert test_client.put(f"{url}/parts/2", content=b"678", headers=auth_headers).status_code == 200
+    assert test_client.put(f"{url}/parts/2", content=b"678910", headers=auth_headers).status_code == 413
+
+    # 2. ...and the part accepted earlier is still there to complete with
+    submission = test_client.post(f"{url}/complete", headers=auth_headers).json()
+    assert storage.blob_path(submission["sha256"]).read_bytes() == b"12345678"
+
+    # 3. A part whose staged file has gone missing is named, not a server error
+    url, upload_id = open_session()
+    assert test_client.put(f"{url}/parts/1", content=b"abc", headers=auth_headers).status_code == 200
+    resumable.part_path(upload_id, 1).unlink()
+    response = test_client.post(f"{url}/complete", headers=auth_headers)
+    assert response.status_code == 409 and response.json()["detail"] == "Part 1 is missing, please upload it again"
@@ -1,34 +1,535 @@
 # backup.py
+"""
+Online, consistent backups of the SQLite database.
+
+Uses SQLite's backup API, so a live database is copied page by page into a
+consistent snapshot without blocking writers for the whole run. Each copy
+is integrity-checked, optionally compressed, and old backups are pruned
+with a keep-N-daily / keep-N-weekly policy.
+
+Incremental mode keeps a chain per database under backups/incremental/:
+a full base snapshot followed by increments holding only the pages that
+changed since the previous snapshot, all listed in manifest.json.
+
+Usage, from the project root:
+    python backup.py [--source sis.db] [--compress gzip|zstd] [--keep-daily 7] [--keep-weekly 4]
+    python backup.py incremental [--source sis.db] [--full-every 24] [--keep-chains 2]
+    python backup.py restore --at 2026-10-18T09:00 --output restored.db [--source sis.db]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
 import shutil
+import sqlite3
+import struct
+import time
 from datetime import datetime
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
 # --- Configuration ---
 SOURCE_DB_PATH = Path("sis.db")
 BACKUP_DIR = Path("backups")
 
-def create_backup():
-    """Copies the source database to the backup directory with a timestamp."""
+TIMESTAMP_FORMAT = "%Y-%m-%d_%H-%M-%S"
+COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+# What follows the timestamp in a finished backup's name; anything else is left alone by retention
+BACKUP_SUFFIXES = tuple(".db" + suffix for suffix in COMPRESSION_SUFFIXES.values())
+# Files SQLite may create next to a database while it is open
+SQLITE_SIDE_SUFFIXES = ("-journal", "-wal", "-shm")
+COPY_CHUNK_BYTES = 1024 * 1024
+# Throttled copies restarted this often by writers finish in one unthrottled pass
+MAX_COPY_RESTARTS = 5
+
+INCREMENTAL_DIRNAME = "incremental"
+MANIFEST_NAME = "manifest.json"
+PAGE_HASHES_NAME = "latest.pagehashes"
+PAGE_HASH_BYTES = 16
+# Increment files: gzip of (magic, page size) then (page number, page bytes) records
+INCREMENT_HEADER = struct.Struct("<8sI")
+INCREMENT_MAGIC = b"SISINC01"
+PAGE_NUMBER = struct.Struct("<I")
+
+
+# --- Copy & verify ---
+class _KeptRestarting(Exception):
+    """Raised from the progress callback to stop a copy that writers keep restarting."""
+
+
+def online_copy(
+    source: Path,
+    destination: Path,
+    pages_per_step: int = 256,
+    step_sleep: float = 0.005,
+    max_restarts: int = MAX_COPY_RESTARTS,
+):
+    """
+    Copies a live database with the backup API.
+
+    Copying `pages_per_step` pages at a time and sleeping between steps lets
+    writers get the lock in between, so a large database does not stall the API.
+    A write to the source restarts the copy, though; after `max_restarts`
+    restarts the copy is finished in one unthrottled step, which holds the
+    read lock until done instead of chasing a busy database forever.
+
+    The copy inherits the source's WAL flag; it is switched back to a
+    rollback journal, so opening it later leaves no -wal/-shm files behind.
+    """
+    progress = {"remaining": None, "restarts": 0}
+
+    def throttle(status, remaining, total):
+        last = progress["remaining"]
+        # A restarted copy gets no further than where the last step left it
+        if last is not None and remaining >= last:
+            progress["restarts"] += 1
+            if progress["restarts"] > max_restarts:
+                raise _KeptRestarting()
+        progress["remaining"] = remaining
+        if remaining and step_sleep:
+            time.sleep(step_sleep)
+
+    src = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+    dst = sqlite3.connect(destination)
+    try:
+        try:
+            src.backup(dst, pages=pages_per_step, progress=throttle)
+        except _KeptRestarting:
+            src.backup(dst)
+        dst.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        dst.close()
+        src.close()
+
+
+def remove_side_files(path: Path) -> None:
+    """Deletes the journal, -wal and -shm files SQLite may have left next to `path`."""
+    for suffix in SQLITE_SIDE_SUFFIXES:
+        path.with_name(path.name + suffix).unlink(missing_ok=True)
+
+
+def verify(path: Path) -> bool:
+    """Runs SQLite's integrity check against an uncompressed database file."""
+    # immutable: nothing writes a backup copy, so there is no WAL or shared memory to open
+    connection = sqlite3.connect(f"file:{path}?mode=ro&immutable=1", uri=True)
+    try:
+        result = connection.execute("PRAGMA integrity_check").fetchone()
+    finally:
+        connection.close()
+    return result is not None and result[0] == "ok"
+
+
+def compress(path: Path, method: str) -> Path:
+    """Compresses `path` next to itself with gzip or zstd and removes the original."""
+    if method == "none":
+        return path
+    target = path.with_name(path.name + COMPRESSION_SUFFIXES[method])
+
+    with open(path, "rb") as source, open(target, "wb") as raw:
+        if method == "gzip":
+            with gzip.GzipFile(fileobj=raw, mode="wb") as out:
+                shutil.copyfileobj(source, out, COPY_CHUNK_BYTES)
+        else:
+            try:
+                import zstandard
+            except ImportError:
+                raise SystemExit("zstd compression needs the 'zstandard' package (pip install zstandard)")
+            zstandard.ZstdCompressor(level=10).copy_stream(source, raw)
+
+    path.unlink()
+    return target
+
+
+def decompress(path: Path, destination: Path) -> Path:
+    """Writes the plain database for a (possibly compressed) backup file to `destination`."""
+    with open(destination, "wb") as out:
+        if path.suffix == ".gz":
+            with gzip.open(path, "rb") as source:
+                shutil.copyfileobj(source, out, COPY_CHUNK_BYTES)
+        elif path.suffix == ".zst":
+            import zstandard
+
+            with open(path, "rb") as source:
+                zstandard.ZstdDecompressor().copy_stream(source, out)
+        else:
+            with open(path, "rb") as source:
+                shutil.copyfileobj(source, out, COPY_CHUNK_BYTES)
+    return destination
+
+
+# --- Retention ---
+def parse_backup_time(path: Path, stem: str) -> Optional[datetime]:
+    name = path.name
+    prefix = f"{stem}-backup-"
+    if not name.startswith(prefix) or name[len(prefix) + 19:] not in BACKUP_SUFFIXES:
+        return None  # not ours, or another run's copy (.partial) or its side files
+    try:
+        return datetime.strptime(name[len(prefix):len(prefix) + 19], TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+
+
+def apply_retention(backup_dir: Path, stem: str, keep_daily: int, keep_weekly: int) -> List[Path]:
+    """
+    Keeps the newest backup of each of the last `keep_daily` days and of each of
+    the last `keep_weekly` ISO weeks; deletes every other backup of `stem`.
+    """
+    backups: List[Tuple[datetime, Path]] = []
+    for path in backup_dir.iterdir():
+        taken = parse_backup_time(path, stem)
+        if taken is not None and path.is_file():
+            backups.append((taken, path))
+    backups.sort(reverse=True)
+
+    keep = set()
+    days, weeks = [], []
+    for taken, path in backups:
+        day = taken.date()
+        week = taken.isocalendar()[:2]
+        if day not in days and len(days) < keep_daily:
+            days.append(day)
+            keep.add(path)
+        if week not in weeks and len(weeks) < keep_weekly:
+            weeks.append(week)
+            keep.add(path)
+
+    removed = [path for _, path in backups if path not in keep]
+    for path in removed:
+        path.unlink()
+    return removed
+
+
+# --- Entry point ---
+def create_backup(
+    source: Path = SOURCE_DB_PATH,
+    backup_dir: Path = BACKUP_DIR,
+    compression: str = "none",
+    keep_daily: Optional[int] = None,
+    keep_weekly: Optional[int] = None,
+    pages_per_step: int = 256,
+    step_sleep: float = 0.005,
+    check: bool = True,
+) -> Optional[Path]:
+    """Takes one verified backup of `source` and applies the retention policy."""
 
     # 1. Ensure the source database exists
-    if not SOURCE_DB_PATH.exists():
-        print(f"Error: Source database not found at '{SOURCE_DB_PATH}'")
-        return
+    if not source.exists():
+        print(f"Error: Source database not found at '{source}'")
+        return None
 
     # 2. Ensure the backup directory exists
-    BACKUP_DIR.mkdir(exist_ok=True)
+    backup_dir.mkdir(parents=True, exist_ok=True)
 
     # 3. Create a timestamped filename for the backup
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    backup_filename = f"{SOURCE_DB_PATH.stem}-backup-{timestamp}{SOURCE_DB_PATH.suffix}"
-    destination_path = BACKUP_DIR / backup_filename
+    timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
+    destination = backup_dir / f"{source.stem}-backup-{timestamp}{source.suffix}"
+    partial = destination.with_name(destination.name + ".partial")
+
+    # 4. Copy with the backup API, verify, then compress
+    try:
+        online_copy(source, partial, pages_per_step=pages_per_step, step_sleep=step_sleep)
+        if check and not verify(partial):
+            raise RuntimeError("integrity check failed on the copy")
+        os.replace(partial, destination)
+        destination = compress(destination, compression)
+        print(f"✅ Backup successful! Created: {destination}")
+    except Exception as e:
+        partial.unlink(missing_ok=True)
+        print(f"❌ Error creating backup: {e}")
+        return None
+    finally:
+        remove_side_files(partial)
+
+    # 5. Prune old backups
+    if keep_daily is not None or keep_weekly is not None:
+        removed = apply_retention(backup_dir, source.stem, keep_daily or 0, keep_weekly or 0)
+        for path in removed:
+            print(f"🗑️  Removed old backup: {path}")
+
+    return destination
+
+
+# --- Incremental chains ---
+def chain_dir(backup_dir: Path, stem: str) -> Path:
+    return backup_dir / INCREMENTAL_DIRNAME / stem
+
+
+def load_manifest(directory: Path) -> Dict:
+    path = directory / MANIFEST_NAME
+    if not path.exists():
+        return {"entries": []}
+    with open(path, encoding="utf-8") as manifest:
+        return json.load(manifest)
+
+
+def save_manifest(directory: Path, manifest: Dict) -> None:
+    """Writes the manifest atomically, so a crash never leaves a half-written chain."""
+    temp_path = directory / (MANIFEST_NAME + ".tmp")
+    with open(temp_path, "w", encoding="utf-8") as out:
+        json.dump(manifest, out, indent=2)
+    os.replace(temp_path, directory / MANIFEST_NAME)
+
+
+def page_size_of(path: Path) -> int:
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return connection.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def scan_pages(path: Path, page_size: int, previous: bytes, changed_out=None) -> Tuple[bytes, int, str]:
+    """
+    Hashes a snapshot page by page.
+
+    Returns (page hashes, page count, sha256 of the whole file). When
+    `changed_out` is given, every page whose hash differs from `previous`
+    is written to it as (page number, page bytes).
+    """
+    hashes = bytearray()
+    whole = hashlib.sha256()
+    changed = 0
+    with open(path, "rb") as snapshot:
+        number = 0
+        while page := snapshot.read(page_size):
+            whole.update(page)
+            page_hash = hashlib.blake2b(page, digest_size=PAGE_HASH_BYTES).digest()
+            offset = number * PAGE_HASH_BYTES
+            if changed_out is not None and previous[offset:offset + PAGE_HASH_BYTES] != page_hash:
+                changed_out.write(PAGE_NUMBER.pack(number))
+                changed_out.write(page)
+                changed += 1
+            hashes += page_hash
+            number += 1
+    return bytes(hashes), changed, whole.hexdigest()
+
+
+def create_incremental_backup(
+    source: Path = SOURCE_DB_PATH,
+    backup_dir: Path = BACKUP_DIR,
+    compression: str = "gzip",
+    full_every: int = 24,
+    keep_chains: Optional[int] = None,
+    pages_per_step: int = 256,
+    step_sleep: float = 0.005,
+    check: bool = True,
+) -> Optional[Dict]:
+    """
+    Adds one snapshot to the chain for `source` and returns its manifest entry.
+
+    A new base is taken when there is none yet, the page size changed, or the
+    current base already has `full_every` increments; otherwise only the pages
+    that differ from the previous snapshot are stored.
+    """
+
+    # 1. Ensure the source database exists
+    if not source.exists():
+        print(f"Error: Source database not found at '{source}'")
+        return None
+
+    directory = chain_dir(backup_dir, source.stem)
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(directory)
+    entries = manifest["entries"]
+    hashes_path = directory / PAGE_HASHES_NAME
+
+    taken_at = datetime.now()
+    timestamp = taken_at.strftime(TIMESTAMP_FORMAT)
+    snapshot = directory / f".snapshot-{timestamp}.partial"
 
-    # 4. Copy the file
     try:
-        shutil.copyfile(SOURCE_DB_PATH, destination_path)
-        print(f"✅ Backup successful! Created: {destination_path}")
+        # 2. Take a consistent snapshot with the backup API
+        online_copy(source, snapshot, pages_per_step=pages_per_step, step_sleep=step_sleep)
+        if check and not verify(snapshot):
+            raise RuntimeError("integrity check failed on the copy")
+        page_size = page_size_of(snapshot)
+
+        # 3. Decide between a new base and an increment
+        since_base = 0
+        for entry in reversed(entries):
+            if entry["kind"] == "base":
+                break
+            since_base += 1
+        previous = entries[-1] if entries else None
+        need_base = (
+            previous is None
+            or previous["page_size"] != page_size
+            or since_base >= full_every
+            or not hashes_path.exists()
+        )
+
+        # 4. Write the base or the changed pages
+        if need_base:
+            hashes, _, sha256 = scan_pages(snapshot, page_size, b"")
+            base = directory / f"base-{timestamp}{source.suffix}"
+            os.replace(snapshot, base)
+            stored = compress(base, compression)
+            entry = {"kind": "base", "file": stored.name, "pages_changed": None}
+        else:
+            with open(hashes_path, "rb") as previous_hashes:
+                previous_bytes = previous_hashes.read()
+            stored = directory / f"incr-{timestamp}.pages.gz"
+            partial = stored.with_name(stored.name + ".partial")
+            with gzip.open(partial, "wb") as out:
+                out.write(INCREMENT_HEADER.pack(INCREMENT_MAGIC, page_size))
+                hashes, changed, sha256 = scan_pages(snapshot, page_size, previous_bytes, changed_out=out)
+            os.replace(partial, stored)
+            snapshot.unlink()
+            entry = {"kind": "incremental", "file": stored.name, "pages_changed": changed}
+
+        entry.update({
+            "taken_at": taken_at.isoformat(timespec="seconds"),
+            "page_size": page_size,
+            "page_count": len(hashes) // PAGE_HASH_BYTES,
+            "sha256": sha256,
+            "stored_bytes": stored.stat().st_size,
+        })
+
+        # 5. Record the page hashes for the next run, then the manifest entry
+        with open(hashes_path.with_suffix(".tmp"), "wb") as out:
+            out.write(hashes)
+        os.replace(hashes_path.with_suffix(".tmp"), hashes_path)
+        entries.append(entry)
+        save_manifest(directory, manifest)
+        print(f"✅ {entry['kind'].capitalize()} backup successful! Created: {stored}")
     except Exception as e:
+        for leftover in directory.glob("*.partial"):
+            leftover.unlink()
         print(f"❌ Error creating backup: {e}")
+        return None
+    finally:
+        snapshot.unlink(missing_ok=True)
+        remove_side_files(snapshot)
+
+    # 6. Prune whole chains beyond the newest `keep_chains` bases
+    if keep_chains:
+        for path in prune_chains(directory, manifest, keep_chains):
+            print(f"🗑️  Removed old backup: {path}")
+
+    return entry
+
+
+def prune_chains(directory: Path, manifest: Dict, keep_chains: int) -> List[Path]:
+    entries = manifest["entries"]
+    base_indexes = [index for index, entry in enumerate(entries) if entry["kind"] == "base"]
+    if len(base_indexes) <= keep_chains:
+        return []
+
+    cut = base_indexes[-keep_chains]
+    removed = [directory / entry["file"] for entry in entries[:cut]]
+    manifest["entries"] = entries[cut:]
+    save_manifest(directory, manifest)
+    for path in removed:
+        if path.exists():
+            path.unlink()
+    return removed
+
+
+def restore(
+    at: datetime,
+    output: Path,
+    source: Path = SOURCE_DB_PATH,
+    backup_dir: Path = BACKUP_DIR,
+) -> Dict:
+    """
+    Rebuilds the database as of the newest snapshot taken at or before `at`.
+
+    The base is decompressed into `output` and each increment's pages are
+    written over it in order; the result is checked against the snapshot's
+    recorded SHA-256 and SQLite's integrity check before it is kept.
+    """
+    directory = chain_dir(backup_dir, source.stem)
+    entries = load_manifest(directory)["entries"]
+
+    # 1. Find the target snapshot and the base it builds on
+    target = None
+    for index, entry in enumerate(entries):
+        if datetime.fromisoformat(entry["taken_at"]) <= at:
+            target = index
+    if target is None:
+        raise RuntimeError(f"No backup of {source.stem} taken at or before {at.isoformat()}")
+    base = max(index for index in range(target + 1) if entries[index]["kind"] == "base")
+
+    # 2. Lay down the base, then replay the increments
+    partial = output.with_name(output.name + ".partial")
+    decompress(directory / entries[base]["file"], partial)
+    with open(partial, "r+b") as database:
+        for entry in entries[base + 1:target + 1]:
+            with gzip.open(directory / entry["file"], "rb") as increment:
+                magic, page_size = INCREMENT_HEADER.unpack(increment.read(INCREMENT_HEADER.size))
+                if magic != INCREMENT_MAGIC:
+                    raise RuntimeError(f"{entry['file']} is not an increment file")
+                while record := increment.read(PAGE_NUMBER.size):
+                    (number,) = PAGE_NUMBER.unpack(record)
+                    database.seek(number * page_size)
+                    database.write(increment.read(page_size))
+            # The database may have shrunk since the previous snapshot
+            database.truncate(entry["page_count"] * page_size)
+
+    # 3. Verify before handing the file over
+    digest = hashlib.sha256()
+    with open(partial, "rb") as database:
+        while chunk := database.read(COPY_CHUNK_BYTES):
+            digest.update(chunk)
+    if digest.hexdigest() != entries[target]["sha256"] or not verify(partial):
+        partial.unlink()
+        raise RuntimeError("Restored database failed verification")
+
+    os.replace(partial, output)
+    return entries[target]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", type=Path, default=SOURCE_DB_PATH)
+    parser.add_argument("--dest-dir", type=Path, default=BACKUP_DIR)
+    parser.add_argument("--compress", choices=sorted(COMPRESSION_SUFFIXES), default="none")
+    parser.add_argument("--keep-daily", type=int, default=None, help="keep the newest backup of each of the last N days")
+    parser.add_argument("--keep-weekly", type=int, default=None, help="keep the newest backup of each of the last N weeks")
+    parser.add_argument("--pages-per-step", type=int, default=256)
+    parser.add_argument("--step-sleep", type=float, default=0.005, help="seconds to yield to writers between steps")
+    parser.add_argument("--no-verify", action="store_true", help="skip PRAGMA integrity_check on the copy")
+
+    subparsers = parser.add_subparsers(dest="command")
+    incremental_parser = subparsers.add_parser("incremental", help="add a snapshot to the incremental chain")
+    incremental_parser.add_argument("--full-every", type=int, default=24, help="start a new base after N increments")
+    incremental_parser.add_argument("--keep-chains", type=int, default=None, help="keep only the newest N bases and their increments")
+    restore_parser = subparsers.add_parser("restore", help="rebuild a database from the incremental chain")
+    restore_parser.add_argument("--at", type=datetime.fromisoformat, required=True, help="e.g. 2026-10-18T09:00")
+    restore_parser.add_argument("--output", type=Path, required=True)
+    args = parser.parse_args()
+
+    if args.command == "incremental":
+        create_incremental_backup(
+            source=args.source,
+            backup_dir=args.dest_dir,
+            compression="gzip" if args.compress == "none" else args.compress,
+            full_every=args.full_every,
+            keep_chains=args.keep_chains,
+            pages_per_step=args.pages_per_step,
+            step_sleep=args.step_sleep,
+            check=not args.no_verify,
+        )
+    elif args.command == "restore":
+        try:
+            entry = restore(args.at, args.output, source=args.source, backup_dir=args.dest_dir)
+        except Exception as e:
+            print(f"❌ Error restoring backup: {e}")
+            raise SystemExit(1)
+        print(f"✅ Restored snapshot from {entry['taken_at']} to {args.output}")
+    else:
+        create_backup(
+            source=args.source,
+            backup_dir=args.dest_dir,
+            compression=args.compress,
+            keep_daily=args.keep_daily,
+            keep_weekly=args.keep_weekly,
+            pages_per_step=args.pages_per_step,
+            step_sleep=args.step_sleep,
+            check=not args.no_verify,
+        )
+
 
 if __name__ == "__main__":
-    create_backup()
\ No newline at end of file
+    main()